@@ -0,0 +1,167 @@
+"""
+Cache of agent answers to repeated questions.
+
+Answers are keyed by the normalised question, the order filters and the
+tenant, and are reused until their TTL passes or any of the Printavo data
+the agent read while answering is invalidated.
+"""
+
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from app.printavo.versions import DataDependencies
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_APOSTROPHES = re.compile(r"['‘’`]")
+_PUNCTUATION = re.compile(r"[^\w\s$.-]|(?<!\d)[.-]|[.-](?!\d)")
+
+
+def normalize_query(query: str) -> str:
+    """Normalise a question so trivially different phrasings share an answer.
+    
+    Case, whitespace, apostrophes and punctuation are ignored, except for
+    the points and dashes inside numbers and dates.
+    
+    Args:
+        query: The user's question
+        
+    Returns:
+        The normalised question
+    """
+    query = _APOSTROPHES.sub("", query.casefold())
+    return " ".join(_PUNCTUATION.sub(" ", query).split())
+
+
+class CachedAnswer(NamedTuple):
+    """A cached agent result and what it was derived from."""
+    result: Dict[str, Any]
+    dependencies: DataDependencies
+    expires_at: float
+
+
+class AnswerCache:
+    """TTL + LRU cache of agent results.
+    
+    Results are only stored when every tool call was answered with fresh
+    data, and are dropped on lookup once any data version they depend on
+    has been bumped.
+    """
+    
+    def __init__(self,
+                 enabled: bool = True,
+                 ttl: float = 300,
+                 max_entries: int = 500,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the answer cache.
+        
+        Args:
+            enabled: Whether answers are cached at all
+            ttl: Seconds an answer is reused
+            max_entries: Maximum number of cached answers
+            clock: Time source in seconds (mainly useful for testing)
+        """
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def key(self, query: str, exclude_completed: bool, exclude_quotes: bool, tenant_id: Optional[str] = None) -> str:
+        """Build the cache key of a question.
+        
+        Args:
+            query: The user's question
+            exclude_completed: Whether completed orders are excluded
+            exclude_quotes: Whether quotes are excluded
+            tenant_id: The tenant asking
+            
+        Returns:
+            The cache key
+        """
+        return f"{tenant_id or ''}:{int(exclude_completed)}{int(exclude_quotes)}:{normalize_query(query)}"
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached answer.
+        
+        Args:
+            key: The cache key
+            
+        Returns:
+            The cached result, or None if missing, expired or derived from data that changed
+        """
+        if not self.enabled:
+            return None
+            
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+            
+        if entry.expires_at <= self.clock():
+            del self._entries[key]
+            self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return None
+            
+        if not entry.dependencies.is_current():
+            del self._entries[key]
+            self.stats["invalidations"] += 1
+            self.stats["misses"] += 1
+            return None
+            
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry.result
+    
+    def set(self, key: str, result: Dict[str, Any], dependencies: DataDependencies):
+        """Cache an answer.
+        
+        Args:
+            key: The cache key
+            result: The agent result to reuse
+            dependencies: The data read while producing the result
+        """
+        if not self.enabled or self.ttl <= 0 or not dependencies.cacheable:
+            return
+            
+        self._entries.pop(key, None)
+        self._entries[key] = CachedAnswer(result, dependencies, self.clock() + self.ttl)
+        self.stats["stores"] += 1
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+    
+    def clear(self):
+        """Remove all answers."""
+        self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics.
+        
+        Returns:
+            Counters plus the current number of answers
+        """
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl
+        }
@@ -0,0 +1,217 @@
+"""
+Deterministic fast path for simple agent questions.
+
+Questions that match one of a few strict patterns ("show order 1234",
+"status of 1234", "list statuses") are answered by calling the agent tool
+directly and filling in a template, without running the model. Anything
+that doesn't match a pattern in full, or whose tool call fails, is left to
+the agent.
+"""
+
+import logging
+import re
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Pattern, Tuple
+
+from app.agents.answer_cache import normalize_query
+from app.printavo.freshness import UNAVAILABLE, Freshness, track_freshness
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def _format_date(value: Optional[str]) -> Optional[str]:
+    """Format an ISO date as e.g. "March 15, 2023"."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    return f"{parsed:%B} {parsed.day}, {parsed.year}"
+
+
+def _is_not_found(result: Any) -> bool:
+    return isinstance(result, dict) and str(result.get("error", "")).startswith("No order found")
+
+
+def render_order(result: Any, visual_id: str) -> Optional[str]:
+    """Describe an order returned by get_order_by_visual_id."""
+    if _is_not_found(result):
+        return f"I couldn't find an order with visual ID {visual_id}."
+    if not isinstance(result, dict) or "error" in result:
+        return None
+        
+    title = f"Order {result.get('visualId') or visual_id}"
+    if result.get("name"):
+        title += f" ({result['name']})"
+    if result.get("customer"):
+        title += f" for {result['customer']}"
+        
+    lines = [f"{title} is {result.get('status') or 'without a status'}."]
+    created = _format_date(result.get("date"))
+    if created:
+        lines.append(f"It was created on {created}.")
+    lines.append(f"The total is ${result.get('total') or 0:,.2f}.")
+    return " ".join(lines)
+
+
+def render_order_status(result: Any, visual_id: str) -> Optional[str]:
+    """Give the status of an order returned by get_order_by_visual_id."""
+    if _is_not_found(result):
+        return f"I couldn't find an order with visual ID {visual_id}."
+    if not isinstance(result, dict) or "error" in result or not result.get("status"):
+        return None
+    return f"Order {result.get('visualId') or visual_id} is currently {result['status']}."
+
+
+def render_statuses(result: Any) -> Optional[str]:
+    """List the statuses returned by get_statuses."""
+    if not isinstance(result, list) or any("error" in status for status in result):
+        return None
+    names = [status["name"] for status in result if status.get("name")]
+    if not names:
+        return "There are no order statuses set up in Printavo."
+    if len(names) == 1:
+        return f"The only order status is {names[0]}."
+    return f"The available order statuses are {', '.join(names[:-1])} and {names[-1]}."
+
+
+def render_freshness(freshness: Freshness) -> str:
+    """Note how old stale data is, as the agent is instructed to."""
+    minutes = max(1, round(freshness.age / 60))
+    note = f"This is based on data from about {minutes} minute{'s' if minutes != 1 else ''} ago"
+    if freshness.reason == UNAVAILABLE:
+        note += ", as Printavo is currently unavailable"
+    return note + "."
+
+
+class Intent(NamedTuple):
+    """A question pattern answered by one tool call and a template."""
+    name: str
+    pattern: Pattern
+    tool: str
+    render: Callable[..., Optional[str]]
+
+
+_ORDER = r"(?:order|invoice|job)(?: number| no)?"
+_VISUAL_ID = r"(?P<visual_id>\d+)"
+
+# Patterns must match the whole normalised question (see normalize_query)
+INTENTS: List[Intent] = [
+    Intent(
+        "order_status",
+        re.compile(rf"(?:(?:what is|whats|show|get|check)(?: me)? )?(?:the )?(?:current )?status (?:of|for) (?:{_ORDER} )?{_VISUAL_ID}"),
+        "get_order_by_visual_id",
+        render_order_status
+    ),
+    Intent(
+        "order_lookup",
+        re.compile(rf"(?:(?:show|get|find|look up|lookup|pull up|open)(?: me)? )?(?:the )?(?:details (?:of|for) )?{_ORDER} {_VISUAL_ID}"),
+        "get_order_by_visual_id",
+        render_order
+    ),
+    Intent(
+        "statuses",
+        re.compile(r"(?:(?:list|show|get|what are)(?: me)? )?(?:all )?(?:the )?(?:available |possible )?(?:order )?statuses"
+                   r"|what statuses are (?:there|available)"),
+        "get_statuses",
+        render_statuses
+    )
+]
+
+
+class FastPathRouter:
+    """Answers simple questions without the model, escalating everything else.
+    
+    Hits are counted per intent; questions matching no intent count as
+    unmatched, and matched questions whose tool call failed as fallbacks.
+    """
+    
+    def __init__(self,
+                 tools: Dict[str, Callable[..., Awaitable[Any]]],
+                 intents: List[Intent] = None,
+                 enabled: bool = True):
+        """Initialize the router.
+        
+        Args:
+            tools: Agent tool functions by name (unwrapped, returning Python values)
+            intents: Question patterns to answer (defaults to INTENTS)
+            enabled: Whether questions are routed at all
+        """
+        self.tools = tools
+        self.intents = INTENTS if intents is None else intents
+        self.enabled = enabled
+        self.intent_hits: Dict[str, int] = {intent.name: 0 for intent in self.intents}
+        self.stats = {
+            "queries": 0,
+            "hits": 0,
+            "unmatched": 0,
+            "fallbacks": 0
+        }
+    
+    def match(self, query: str) -> Optional[Tuple[Intent, Dict[str, str]]]:
+        """Find the intent a question matches in full, if any.
+        
+        Args:
+            query: The user's question
+            
+        Returns:
+            The matching intent and the tool arguments taken from the
+            question, or None
+        """
+        normalized = normalize_query(query)
+        for intent in self.intents:
+            match = intent.pattern.fullmatch(normalized)
+            if match:
+                return intent, match.groupdict()
+        return None
+    
+    async def route(self, query: str) -> Optional[str]:
+        """Answer a question if it is simple enough.
+        
+        Args:
+            query: The user's question
+            
+        Returns:
+            The answer, or None if the agent should answer instead
+        """
+        if not self.enabled:
+            return None
+            
+        self.stats["queries"] += 1
+        matched = self.match(query)
+        if matched is None:
+            self.stats["unmatched"] += 1
+            return None
+            
+        intent, args = matched
+        with track_freshness() as freshness:
+            result = await self.tools[intent.tool](**args)
+        answer = intent.render(result, **args)
+        if answer is None:
+            logger.info(f"Fast path {intent.name} fell back to the agent")
+            self.stats["fallbacks"] += 1
+            return None
+            
+        if freshness.stale:
+            answer += " " + render_freshness(freshness)
+            
+        self.stats["hits"] += 1
+        self.intent_hits[intent.name] += 1
+        logger.info(f"Answered query with fast path {intent.name}")
+        return answer
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing statistics.
+        
+        Returns:
+            Counters, hits per intent and the share of questions answered without the model
+        """
+        queries = self.stats["queries"]
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "hit_rate": self.stats["hits"] / queries if queries else 0.0,
+            "intents": dict(self.intent_hits)
+        }
@@ -2,53 +2,91 @@
 PrintavoAgent implementation using the OpenAI Agents SDK.
 """
 
+import asyncio
+import functools
 import time
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple, Union
 import logging
-from agents import Agent, FunctionTool
+from agents import Agent, FunctionTool, ModelSettings
 from agents.runner import Runner
 
+from app.agents.answer_cache import AnswerCache
+from app.agents.fast_path import FastPathRouter
+from app.agents.tool_calls import ToolCalls, bind_arguments, current_tool_calls, predict_tool_calls, run_tool, use_tool_calls
+from app.agents.tool_results import EncodingStats, encode_tool_result, track_encoding
 from app.config import settings
-from app.printavo.api import printavo_client
+from app.printavo.analytics import order_analytics
+from app.printavo.filters import OrderFilters
+from app.printavo.orders import OrderRecord
+from app.printavo.selection import AGENT_ORDER_FIELDS
+from app.printavo.tenants import current_client
+from app.printavo.versions import mark_uncacheable, track_reads
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Define the tools to provide to the agent
 
-async def get_orders(query: str = "", exclude_completed: bool = True, exclude_quotes: bool = True) -> List[Dict]:
+async def get_orders(query: str = "",
+                     exclude_completed: bool = True,
+                     exclude_quotes: bool = True,
+                     production_after: Optional[str] = None,
+                     production_before: Optional[str] = None,
+                     customer_id: Optional[str] = None,
+                     min_total: Optional[float] = None,
+                     sort_by: Optional[str] = None,
+                     sort_descending: bool = False,
+                     limit: int = 10) -> Union[List[Dict], Dict]:
     """Get orders from Printavo.
     
+    Filtering, sorting and limiting happen before results are returned, so
+    prefer these parameters to fetching orders and filtering them yourself.
+    
     Args:
         query: Search terms to filter orders
         exclude_completed: Whether to exclude completed orders
         exclude_quotes: Whether to exclude quotes
+        production_after: Only orders in production on or after this date (YYYY-MM-DD)
+        production_before: Only orders in production on or before this date (YYYY-MM-DD)
+        customer_id: Only orders for this customer (the customerId of a returned order)
+        min_total: Only orders with at least this total
+        sort_by: Sort by "visual_id", "customer_name", "due_date", "status" or "total"
+        sort_descending: Whether to sort in descending order
+        limit: Maximum number of orders to return (at most 100)
         
     Returns:
-        List of orders
+        List of orders, or {"results": [...], "truncated": true} when
+        customer_id or min_total filtering gave up before finding limit
+        orders, so more matching orders may exist
     """
     logger.info(f"Getting orders with query: {query}")
     try:
-        orders = await printavo_client.get_orders(
+        filters = OrderFilters.from_tool_args(
+            production_after=production_after,
+            production_before=production_before,
+            customer_id=customer_id,
+            min_total=min_total,
+            sort_by=sort_by,
+            sort_descending=sort_descending
+        )
+        orders = await current_client().get_orders(
             query=query,
+            first=max(1, min(limit, 100)),
             exclude_completed=exclude_completed,
-            exclude_quotes=exclude_quotes
+            exclude_quotes=exclude_quotes,
+            fields=AGENT_ORDER_FIELDS,
+            transform=OrderRecord.from_order_node,
+            filters=filters
         )
         
-        # Convert to a more simplified format for the agent
-        formatted_orders = []
-        for order in orders:
-            formatted_orders.append({
-                "id": order["id"],
-                "name": order["name"],
-                "visualId": order["visualId"],
-                "date": order["createdAt"],
-                "status": order["status"]["name"],
-                "customer": order["customer"]["name"],
-                "total": float(order["total"]) if order["total"] else 0.0
-            })
-            
-        return formatted_orders
+        results = [order.to_dict() for order in orders]
+        if getattr(orders, "truncated", False):
+            return {
+                "results": results,
+                "truncated": True,
+                "note": f"Only {settings.printavo_filter_max_scan} orders were checked against the filters"
+            }
+        return results
     except Exception as e:
         logger.error(f"Error getting orders: {e}")
         # Return a formatted error message that the agent can understand
@@ -66,23 +104,12 @@ async def get_order_by_visual_id(visual_id: str) -> Optional[Dict]:
     """
     logger.info(f"Getting order with visual ID: {visual_id}")
     try:
-        order = await printavo_client.get_order_by_visual_id(visual_id)
+        order = await current_client().get_order_by_visual_id(visual_id, transform=OrderRecord.from_invoice_node)
         
         if not order:
             return {"error": f"No order found with visual ID: {visual_id}"}
             
-        # Format the order
-        formatted_order = {
-            "id": order["id"],
-            "name": order["name"],
-            "visualId": order["visualId"],
-            "date": order["createdAt"],
-            "status": order["status"]["name"],
-            "customer": order["customer"]["name"],
-            "total": float(order["total"]) if order["total"] else 0.0
-        }
-            
-        return formatted_order
+        return order.to_dict()
     except Exception as e:
         logger.error(f"Error getting order by visual ID: {e}")
         return {"error": f"Failed to retrieve order: {str(e)}"}
@@ -96,13 +123,124 @@ async def get_statuses() -> List[Dict]:
     """
     logger.info("Getting statuses")
     try:
-        statuses = await printavo_client.get_statuses()
+        statuses = await current_client().get_statuses()
         return statuses
     except Exception as e:
         logger.error(f"Error getting statuses: {e}")
         return [{"error": f"Failed to retrieve statuses: {str(e)}"}]
 
 
+async def get_order_analytics(group_by: str = "status",
+                              period: Optional[str] = None,
+                              start_date: Optional[str] = None,
+                              end_date: Optional[str] = None,
+                              exclude_completed: bool = True,
+                              exclude_quotes: bool = True,
+                              top_n: int = 10) -> Dict:
+    """Get order counts and revenue totals, optionally grouped.
+    
+    Use this for totals, breakdowns and rankings instead of adding up orders.
+    
+    Args:
+        group_by: How to group orders: "none", "status", "customer", "day", "week" or "month"
+        period: Date range by name: "today", "this_week", "last_week", "this_month",
+            "last_month", "last_30_days" or "this_year"
+        start_date: Only count orders created on or after this date (YYYY-MM-DD)
+        end_date: Only count orders created on or before this date (YYYY-MM-DD)
+        exclude_completed: Whether to exclude completed orders
+        exclude_quotes: Whether to exclude quotes
+        top_n: Maximum number of groups to return
+        
+    Returns:
+        Overall order count and revenue, and per-group counts and revenue;
+        snapshot.complete is false when only the most recently created orders were counted
+    """
+    logger.info(f"Getting order analytics grouped by {group_by} for period {period}")
+    try:
+        return await order_analytics.aggregate(
+            group_by=group_by,
+            period=period,
+            start_date=start_date,
+            end_date=end_date,
+            exclude_completed=exclude_completed,
+            exclude_quotes=exclude_quotes,
+            top_n=top_n,
+            client=current_client()
+        )
+    except Exception as e:
+        logger.error(f"Error getting order analytics: {e}")
+        return {"error": f"Failed to compute order analytics: {str(e)}"}
+
+
+def _is_error(result: Any) -> bool:
+    """Whether a tool result reports a failure (the tools return their errors as {"error": ...})."""
+    if isinstance(result, dict):
+        return "error" in result
+    return isinstance(result, list) and any(isinstance(item, dict) and "error" in item for item in result)
+
+
+def json_tool(fn):
+    """Wrap a tool so its result reaches the model in a compact encoding.
+    
+    The Agents SDK passes str(result) to the model, which for dicts and lists
+    is a Python repr. Results are instead encoded by encode_tool_result:
+    lists of records as tables within AGENT_TOOL_RESULT_MAX_TOKENS, the rest
+    as JSON. When the tool was answered with stale data, the result gains a
+    "freshness" entry (lists are wrapped as {"results": [...]}) so the agent
+    can say how old the data is. Answers based on stale data or on a tool
+    error aren't cached.
+    
+    During an agent run, the call goes through the run's ToolCalls, which
+    bounds concurrent calls and hands over matching prefetched results.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        arguments = bind_arguments(fn, args, kwargs)
+        tool_calls = current_tool_calls()
+        if tool_calls is not None:
+            result, freshness = await tool_calls.call(fn, arguments)
+        else:
+            result, freshness = await run_tool(fn, arguments)
+            
+        # An answer based on stale data or on a failed call (such as while
+        # Printavo is unavailable) mustn't outlive it in the answer cache
+        if freshness.stale or _is_error(result):
+            mark_uncacheable()
+        if freshness.stale:
+            if isinstance(result, dict):
+                result = {**result, "freshness": freshness.to_dict()}
+            else:
+                result = {"results": result, "freshness": freshness.to_dict()}
+        return encode_tool_result(
+            result,
+            max_tokens=settings.agent_tool_result_max_tokens,
+            compact=settings.agent_compact_tool_results
+        )
+    return wrapper
+
+
+def _run_usage(result, encoding: EncodingStats) -> Dict[str, int]:
+    """Token usage of an agent run, including the tokens its tool results took and saved."""
+    if getattr(result, "usage", None):
+        usage = {
+            "prompt_tokens": result.usage.prompt_tokens,
+            "completion_tokens": result.usage.completion_tokens,
+            "total_tokens": result.usage.total_tokens
+        }
+    else:
+        # Add up the usage of every model response in the run
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        for response in getattr(result, "raw_responses", None) or []:
+            if response.usage:
+                usage["prompt_tokens"] += response.usage.input_tokens
+                usage["completion_tokens"] += response.usage.output_tokens
+                usage["total_tokens"] += response.usage.total_tokens
+                
+    usage["tool_result_tokens"] = encoding.tokens
+    usage["tool_result_tokens_saved"] = encoding.tokens_saved
+    return usage
+
+
 class PrintavoAgentManager:
     """Manager for the Printavo agent."""
     
@@ -110,9 +248,10 @@ class PrintavoAgentManager:
         """Initialize the Printavo agent manager."""
         # Create the function tools
         self.tools = [
-            FunctionTool(get_orders),
-            FunctionTool(get_order_by_visual_id),
-            FunctionTool(get_statuses)
+            FunctionTool(json_tool(get_orders)),
+            FunctionTool(json_tool(get_order_by_visual_id)),
+            FunctionTool(json_tool(get_statuses)),
+            FunctionTool(json_tool(get_order_analytics))
         ]
         
         # Create the agent
@@ -125,20 +264,86 @@ class PrintavoAgentManager:
             1. Retrieving orders from Printavo
             2. Finding specific orders by visual ID
             3. Getting information about available order statuses
+            4. Computing order counts and revenue totals, grouped by status, customer or date
+            
+            For totals, breakdowns or rankings, use the order analytics tool rather than
+            adding up individual orders.
             
             By default, you will exclude orders with "completed" status and those with "quote" status.
             If the user specifically asks for these, you can include them by setting the appropriate parameters.
             
+            When you need several independent pieces of data, request all of the tool calls
+            in the same step so they run at the same time.
+            
             Always format currency values with $ and two decimal places.
             Dates should be formatted in a human-readable format (e.g., "March 15, 2023").
             
             If there are no results matching the user's query, let them know clearly.
             If there's an error in retrieving data, explain the problem and suggest trying again.
+            Results listing several records are tables: a header line name[count]{column,...}:
+            followed by one comma-separated row per record, with empty cells for missing values.
+            If a table ends with a line saying more rows were not shown, the list is incomplete:
+            say so, and call the tool again with narrower filters or sorting if that would help.
+            
+            If a result includes "freshness" with "stale": true, tell the user the data may be
+            out of date and roughly how old it is (age_seconds), and whether Printavo is
+            currently unavailable (reason "printavo_unavailable").
             """,
             tools=self.tools,
-            model=settings.openai_model
+            model=settings.openai_model,
+            # Let the model request independent tool calls in one step; the SDK runs them concurrently
+            model_settings=ModelSettings(parallel_tool_calls=True)
+        )
+        
+        # Answers to repeated questions, reused until the data behind them changes
+        self.answer_cache = AnswerCache(
+            enabled=settings.agent_answer_cache_enabled,
+            ttl=settings.agent_answer_cache_ttl,
+            max_entries=settings.agent_answer_cache_max_entries
         )
         
+        # Answers simple lookups by calling the tools directly, without the model
+        self.fast_path = FastPathRouter(
+            {
+                "get_order_by_visual_id": get_order_by_visual_id,
+                "get_statuses": get_statuses
+            },
+            enabled=settings.agent_fast_path_enabled
+        )
+        
+        # Tools whose calls can be predicted from the question and started early
+        self.prefetchable_tools = {
+            "get_order_by_visual_id": get_order_by_visual_id,
+            "get_statuses": get_statuses
+        }
+        self.tool_call_stats: Dict[str, int] = {}
+        
+    def _build_query(self, query: str, exclude_completed: bool, exclude_quotes: bool) -> str:
+        """Add context about the order filters to a user query."""
+        context = f"The user wants to {'' if exclude_completed else 'include'} completed orders and {'' if exclude_quotes else 'include'} quotes."
+        return f"{query}\n\nContext: {context}"
+        
+    def _start_tool_calls(self, query: str) -> ToolCalls:
+        """Create the tool call execution of a run, prefetching the calls the question suggests."""
+        tool_calls = ToolCalls(settings.agent_max_concurrent_tool_calls, self.tool_call_stats)
+        if settings.agent_prefetch_enabled:
+            for name, kwargs in predict_tool_calls(query):
+                fn = self.prefetchable_tools[name]
+                tool_calls.prefetch(fn, bind_arguments(fn, kwargs=kwargs))
+        return tool_calls
+        
+    async def _answer_without_agent(self, cache_key: str, query: str) -> Optional[Dict[str, Any]]:
+        """Answer from the answer cache or the fast path, if possible."""
+        cached = self.answer_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Answered query from the answer cache")
+            return {**cached, "cached": True, "fast_path": False}
+            
+        answer = await self.fast_path.route(query)
+        if answer is not None:
+            return {"response": answer, "usage": None, "cached": False, "fast_path": True}
+        return None
+        
     async def process_query(self, query: str, exclude_completed: bool = True, exclude_quotes: bool = True):
         """Process a user query using the Printavo agent.
         
@@ -148,35 +353,44 @@ class PrintavoAgentManager:
             exclude_quotes: Whether to exclude quotes
             
         Returns:
-            The agent's response and usage information
+            The agent's response and usage information; "cached" is True when
+            the response was reused from an earlier identical question and
+            "fast_path" when it was answered without running the model
         """
         logger.info(f"Processing query: {query}")
         start_time = time.time()
         
         try:
-            # Provide additional context about filters in the query
-            context = f"The user wants to {'' if exclude_completed else 'include'} completed orders and {'' if exclude_quotes else 'include'} quotes."
-            full_query = f"{query}\n\nContext: {context}"
+            cache_key = self.answer_cache.key(query, exclude_completed, exclude_quotes, current_client().tenant_id)
+            shortcut = await self._answer_without_agent(cache_key, query)
+            if shortcut is not None:
+                return {**shortcut, "elapsed_time": time.time() - start_time}
+                
+            full_query = self._build_query(query, exclude_completed, exclude_quotes)
             
-            # Run the agent
-            result = await Runner.run(self.agent, full_query)
+            # Run the agent, noting the Printavo data its tools read and how their results were
+            # encoded; likely tool calls are prefetched while the model works on its first step
+            with track_reads() as reads, track_encoding() as encoding:
+                tool_calls = self._start_tool_calls(query)
+                try:
+                    with use_tool_calls(tool_calls):
+                        result = await Runner.run(self.agent, full_query)
+                finally:
+                    tool_calls.close()
             
             elapsed_time = time.time() - start_time
             logger.info(f"Query processed in {elapsed_time:.2f} seconds")
             
-            # Extract usage information if available
-            usage = None
-            if hasattr(result, 'usage') and result.usage:
-                usage = {
-                    "prompt_tokens": result.usage.prompt_tokens,
-                    "completion_tokens": result.usage.completion_tokens,
-                    "total_tokens": result.usage.total_tokens
-                }
+            usage = _run_usage(result, encoding)
+            
+            self.answer_cache.set(cache_key, {"response": result.final_output, "usage": usage}, reads)
             
             return {
                 "response": result.final_output,
                 "usage": usage,
-                "elapsed_time": elapsed_time
+                "elapsed_time": elapsed_time,
+                "cached": False,
+                "fast_path": False
             }
         except Exception as e:
             logger.error(f"Error processing query: {e}")
@@ -186,6 +400,124 @@ class PrintavoAgentManager:
                 "elapsed_time": elapsed_time
             }
 
+    
+    async def stream_query(self,
+                           query: str,
+                           exclude_completed: bool = True,
+                           exclude_quotes: bool = True) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Process a user query, yielding progress events as the agent runs.
+        
+        Events are (name, data) pairs:
+        
+        - "delta": {"text"} for each piece of the response text
+        - "tool_call": {"call_id", "name", "arguments"} when the agent calls a tool
+        - "tool_result": {"call_id", "name", "elapsed_time"} when the tool's result is ready
+        - "done": {"response", "usage", "elapsed_time", "cached", "fast_path"} once the run has finished
+        - "error": {"error", "elapsed_time"} if the run failed
+        
+        Closing the generator before "done" cancels the run, including any
+        tool calls still in flight; their Printavo requests are cancelled
+        unless other callers share them. Cached and fast path answers are
+        sent as a single "delta" followed by "done".
+        
+        Args:
+            query: The user's query
+            exclude_completed: Whether to exclude completed orders
+            exclude_quotes: Whether to exclude quotes
+            
+        Yields:
+            Event names and data
+        """
+        logger.info(f"Streaming query: {query}")
+        start_time = time.time()
+        pump = None
+        tool_calls = None
+        pending_calls: Dict[str, Tuple[str, float]] = {}
+        
+        try:
+            cache_key = self.answer_cache.key(query, exclude_completed, exclude_quotes, current_client().tenant_id)
+            shortcut = await self._answer_without_agent(cache_key, query)
+            if shortcut is not None:
+                yield "delta", {"text": shortcut["response"]}
+                yield "done", {**shortcut, "elapsed_time": time.time() - start_time}
+                return
+                
+            full_query = self._build_query(query, exclude_completed, exclude_quotes)
+            
+            # Start the agent; it runs in a task that copies the current context,
+            # so its tools record their reads and result encoding here and go through tool_calls
+            with track_reads() as reads, track_encoding() as encoding:
+                tool_calls = self._start_tool_calls(query)
+                with use_tool_calls(tool_calls):
+                    result = Runner.run_streamed(self.agent, full_query)
+                    
+            # Events are read in a task of their own: stream_events() stops the
+            # run when the task iterating it is cancelled
+            events: asyncio.Queue = asyncio.Queue()
+            
+            async def read_events():
+                try:
+                    async for event in result.stream_events():
+                        events.put_nowait(event)
+                finally:
+                    events.put_nowait(None)
+                    
+            pump = asyncio.create_task(read_events())
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                if event.type == "raw_response_event":
+                    data = event.data
+                    if data.type == "response.output_text.delta":
+                        yield "delta", {"text": data.delta}
+                    elif data.type == "response.output_item.done" and getattr(data.item, "type", None) == "function_call":
+                        # The model has finished writing the call; the SDK runs it next
+                        pending_calls[data.item.call_id] = (data.item.name, time.time())
+                        yield "tool_call", {
+                            "call_id": data.item.call_id,
+                            "name": data.item.name,
+                            "arguments": data.item.arguments
+                        }
+                elif event.type == "run_item_stream_event" and event.name == "tool_output":
+                    raw_item = event.item.raw_item
+                    call_id = raw_item.get("call_id") if isinstance(raw_item, dict) else getattr(raw_item, "call_id", None)
+                    name, called_at = pending_calls.pop(call_id, (None, start_time))
+                    yield "tool_result", {
+                        "call_id": call_id,
+                        "name": name,
+                        "elapsed_time": time.time() - called_at
+                    }
+            # Raises the run's error, if any
+            await pump
+            
+            elapsed_time = time.time() - start_time
+            logger.info(f"Streamed query processed in {elapsed_time:.2f} seconds")
+            
+            usage = _run_usage(result, encoding)
+            self.answer_cache.set(cache_key, {"response": result.final_output, "usage": usage}, reads)
+            
+            yield "done", {
+                "response": result.final_output,
+                "usage": usage,
+                "elapsed_time": elapsed_time,
+                "cached": False,
+                "fast_path": False
+            }
+        except Exception as e:
+            logger.error(f"Error streaming query: {e}")
+            yield "error", {
+                "error": f"Failed to process query: {str(e)}",
+                "elapsed_time": time.time() - start_time
+            }
+        finally:
+            if pump is not None and not pump.done():
+                logger.info("Cancelling streamed query")
+                pump.cancel()
+                await asyncio.wait([pump])
+            if tool_calls is not None:
+                tool_calls.close()
+
 
 # Create a singleton instance
 printavo_agent_manager = PrintavoAgentManager() 
\ No newline at end of file
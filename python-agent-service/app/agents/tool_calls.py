@@ -0,0 +1,171 @@
+"""
+Bounded, prefetching execution of agent tool calls.
+
+The Agents SDK runs the tool calls of one model step concurrently. During
+a run, every call goes through the run's ToolCalls, which bounds how many
+run at once (and so how many Printavo requests one question fans out to).
+Before the first model call, ToolCalls can also start the tool calls the
+question is likely to need, such as an order whose visual ID is mentioned.
+If the model then makes the same call, it gets the prefetched result;
+prefetches the model doesn't use are cancelled once the run ends.
+Prefetches never take the last free slot, so a guess can't hold up a call
+the model actually makes.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.printavo.freshness import Freshness, track_freshness
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ToolFunction = Callable[..., Awaitable[Any]]
+
+# Most visual IDs prefetched for one question
+MAX_PREFETCHED_VISUAL_IDS = 5
+
+_STATUS = re.compile(r"\bstatus(?:es)?\b", re.IGNORECASE)
+_VISUAL_ID = re.compile(r"(?:#|\b(?:order|invoice|job)s?\s+(?:(?:number|no\.?)\s+)?#?)(\d{2,})\b", re.IGNORECASE)
+
+
+def predict_tool_calls(query: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """Guess the tool calls the agent is likely to make for a question.
+    
+    Args:
+        query: The user's question
+        
+    Returns:
+        Tool names and arguments: the statuses if the question mentions
+        status, plus a lookup of each visual ID it mentions
+    """
+    calls = [("get_statuses", {})] if _STATUS.search(query) else []
+    visual_ids = list(dict.fromkeys(_VISUAL_ID.findall(query)))
+    for visual_id in visual_ids[:MAX_PREFETCHED_VISUAL_IDS]:
+        calls.append(("get_order_by_visual_id", {"visual_id": visual_id}))
+    return calls
+
+
+def bind_arguments(fn: ToolFunction, args: tuple = (), kwargs: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Map a call's arguments to fn's parameter names, including defaults."""
+    bound = inspect.signature(fn).bind(*args, **(kwargs or {}))
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def _call_key(fn: ToolFunction, arguments: Dict[str, Any]) -> str:
+    return f"{fn.__name__}:{json.dumps(arguments, sort_keys=True, default=str)}"
+
+
+async def run_tool(fn: ToolFunction, arguments: Dict[str, Any]) -> Tuple[Any, Freshness]:
+    """Call a tool, tracking the freshness of the data it was answered with.
+    
+    Args:
+        fn: The tool function
+        arguments: Its arguments by name
+        
+    Returns:
+        The tool result and its freshness
+    """
+    with track_freshness() as freshness:
+        result = await fn(**arguments)
+    return result, freshness
+
+
+class ToolCalls:
+    """Tool call execution for one agent run."""
+    
+    def __init__(self, max_concurrency: int = 4, stats: Dict[str, int] = None):
+        """Initialize tool call execution.
+        
+        Args:
+            max_concurrency: Tool calls (including prefetches) allowed to run
+                at once; prefetches may use all but one of them
+            stats: Counters to update, shared between runs
+        """
+        max_concurrency = max(max_concurrency, 1)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_prefetches = max_concurrency - 1
+        self._prefetch_semaphore = asyncio.Semaphore(self.max_prefetches) if self.max_prefetches else None
+        self._prefetched: Dict[str, asyncio.Task] = {}
+        self.stats = stats if stats is not None else {}
+        for key in ("calls", "prefetched", "prefetch_hits", "prefetch_discarded"):
+            self.stats.setdefault(key, 0)
+    
+    async def _run(self, fn: ToolFunction, arguments: Dict[str, Any]) -> Tuple[Any, Freshness]:
+        async with self._semaphore:
+            return await run_tool(fn, arguments)
+    
+    async def _run_prefetch(self, fn: ToolFunction, arguments: Dict[str, Any]) -> Tuple[Any, Freshness]:
+        async with self._prefetch_semaphore:
+            return await self._run(fn, arguments)
+    
+    def prefetch(self, fn: ToolFunction, arguments: Dict[str, Any]):
+        """Start a tool call the model is expected to make.
+        
+        Args:
+            fn: The tool function
+            arguments: Its arguments by name, including defaults (see bind_arguments)
+        """
+        key = _call_key(fn, arguments)
+        if self._prefetch_semaphore is None or key in self._prefetched:
+            return
+        task = asyncio.ensure_future(self._run_prefetch(fn, arguments))
+        # Results of discarded prefetches are never awaited
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._prefetched[key] = task
+        self.stats["prefetched"] += 1
+    
+    async def call(self, fn: ToolFunction, arguments: Dict[str, Any]) -> Tuple[Any, Freshness]:
+        """Make a tool call, reusing a matching prefetch.
+        
+        Args:
+            fn: The tool function
+            arguments: Its arguments by name, including defaults
+            
+        Returns:
+            The tool result and its freshness
+        """
+        self.stats["calls"] += 1
+        task = self._prefetched.pop(_call_key(fn, arguments), None)
+        if task is not None:
+            self.stats["prefetch_hits"] += 1
+            return await task
+        return await self._run(fn, arguments)
+    
+    def close(self):
+        """Cancel the prefetches the model didn't use."""
+        for task in self._prefetched.values():
+            task.cancel()
+        if self._prefetched:
+            logger.debug(f"Discarded {len(self._prefetched)} unused prefetched tool calls")
+        self.stats["prefetch_discarded"] += len(self._prefetched)
+        self._prefetched.clear()
+
+
+_current: ContextVar[Optional[ToolCalls]] = ContextVar("agent_tool_calls", default=None)
+
+
+@contextmanager
+def use_tool_calls(tool_calls: ToolCalls) -> Iterator[ToolCalls]:
+    """Route the tool calls made within the block (and tasks started in it) through tool_calls.
+    
+    Args:
+        tool_calls: Tool call execution of the current run
+    """
+    token = _current.set(tool_calls)
+    try:
+        yield tool_calls
+    finally:
+        _current.reset(token)
+
+
+def current_tool_calls() -> Optional[ToolCalls]:
+    """Get the tool call execution of the current run, if any."""
+    return _current.get()
@@ -0,0 +1,231 @@
+"""
+Compact, token-budgeted encoding of agent tool results.
+
+Lists of records are sent to the model as tables: a header naming the
+columns once, then one CSV row per record, instead of JSON repeating every
+key for every record. Each result is held to a token budget; rows that
+don't fit are replaced by a line saying how many were left out, so the
+agent can ask for a narrower query instead of working from a silently
+partial list.
+
+Token counts use tiktoken when it is installed and an estimate of four
+characters per token otherwise.
+"""
+
+import csv
+import io
+import logging
+import math
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app import json_codec
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - depends on the environment
+    tiktoken = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Name of the table a top-level list result is given
+RESULTS = "results"
+
+
+@lru_cache(maxsize=1)
+def _tokenizer():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:  # The encoding is downloaded on first use
+        logger.warning(f"Falling back to estimated token counts: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count (or estimate) the tokens text takes up in a prompt."""
+    tokenizer = _tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def _is_table(value: Any) -> bool:
+    """Whether value is a list of records worth sending as a table."""
+    return isinstance(value, list) and len(value) >= 2 and all(isinstance(item, dict) for item in value)
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (str, int, float)):
+        return str(value)
+    return json_codec.dumps_str(value)
+
+
+def _csv_line(values: List[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(values)
+    return buffer.getvalue()
+
+
+def _omitted_note(count: int, name: str = None) -> str:
+    lead = f"{name}: {count} rows" if name else f"... {count} more rows"
+    return f"{lead} not shown; refine the query (filters, sorting or a lower limit) to see them"
+
+
+def _table(name: str, rows: List[Dict], budget: Optional[int]) -> Tuple[List[str], int, int]:
+    """Encode records as a table, keeping rows while they fit in budget tokens.
+    
+    The budget covers the header and the note on left out rows. If not even
+    the header fits, the table is replaced by the note alone (or nothing, if
+    that doesn't fit either).
+    
+    Returns:
+        The table's lines, the number of rows left out and the tokens used
+    """
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    # Columns that are empty in every row carry no information
+    columns = [column for column in columns if any(row.get(column) not in (None, "") for row in rows)]
+    
+    header = f"{name}[{len(rows)}]{{{','.join(columns)}}}:"
+    used = count_tokens(header)
+    # Reserved for the note, sized for the largest count it can show
+    note_cost = 0 if budget is None else count_tokens(_omitted_note(len(rows))) + 1
+    if budget is not None and used + note_cost > budget:
+        note = _omitted_note(len(rows), name)
+        cost = count_tokens(note)
+        return ([note], len(rows), cost) if cost <= budget else ([], len(rows), 0)
+        
+    lines = [header]
+    for index, row in enumerate(rows):
+        line = _csv_line([_cell(row.get(column)) for column in columns])
+        cost = count_tokens(line) + 1
+        reserve = note_cost if index < len(rows) - 1 else 0
+        if budget is not None and used + cost + reserve > budget:
+            omitted = len(rows) - index
+            note = _omitted_note(omitted)
+            lines.append(note)
+            return lines, omitted, used + count_tokens(note) + 1
+        lines.append(line)
+        used += cost
+    return lines, 0, used
+
+
+def _has_table(result: Any) -> bool:
+    """Whether any part of a result is encoded as a table."""
+    return _is_table(result) or (isinstance(result, dict) and any(_is_table(value) for value in result.values()))
+
+
+def encode(result: Any, max_tokens: Optional[int] = None) -> Tuple[str, int]:
+    """Encode a tool result compactly.
+    
+    Lists of two or more records become tables, whether they are the
+    result itself or values of a result dict (whose other entries are
+    sent as "key: JSON" lines). Anything else is sent as JSON.
+    
+    Args:
+        result: The tool result
+        max_tokens: Token budget for the encoded result (unlimited if None);
+            it only limits the rows of tables
+        
+    Returns:
+        The encoded result and the number of rows left out to fit the budget
+    """
+    if _is_table(result):
+        lines, omitted, _ = _table(RESULTS, result, max_tokens)
+        return "\n".join(lines), omitted
+        
+    if not _has_table(result):
+        return json_codec.dumps_str(result), 0
+        
+    lines = [f"{key}: {json_codec.dumps_str(value)}" for key, value in result.items() if not _is_table(value)]
+    remaining = None if max_tokens is None else max_tokens - sum(count_tokens(line) + 1 for line in lines)
+    omitted = 0
+    for key, value in result.items():
+        if _is_table(value):
+            table, table_omitted, used = _table(key, value, None if remaining is None else max(remaining, 0))
+            lines.extend(table)
+            omitted += table_omitted
+            if remaining is not None:
+                remaining -= used
+    return "\n".join(lines), omitted
+
+
+class EncodingStats:
+    """Token counts of the tool results sent to the model during one run."""
+    
+    def __init__(self):
+        """Initialize with no results."""
+        self.json_tokens = 0
+        self.tokens = 0
+        self.omitted_rows = 0
+    
+    def record(self, json_tokens: int, tokens: int, omitted_rows: int):
+        """Add one encoded tool result.
+        
+        Args:
+            json_tokens: Tokens the full result would have taken as JSON
+            tokens: Tokens the encoded result takes
+            omitted_rows: Rows left out to fit the budget
+        """
+        self.json_tokens += json_tokens
+        self.tokens += tokens
+        self.omitted_rows += omitted_rows
+    
+    @property
+    def tokens_saved(self) -> int:
+        """Tokens saved compared to sending every result as full JSON."""
+        return max(self.json_tokens - self.tokens, 0)
+
+
+_current: ContextVar[Optional[EncodingStats]] = ContextVar("tool_result_encoding", default=None)
+
+
+@contextmanager
+def track_encoding() -> Iterator[EncodingStats]:
+    """Track the tool results encoded within the block (and tasks started in it).
+    
+    Yields:
+        The EncodingStats updated as results are encoded
+    """
+    stats = EncodingStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def encode_tool_result(result: Any, max_tokens: Optional[int] = None, compact: bool = True) -> str:
+    """Encode a tool result for the model, recording the tokens saved if tracked.
+    
+    Args:
+        result: The tool result
+        max_tokens: Token budget for the encoded result (unlimited if None)
+        compact: Whether to use the compact encoding rather than plain JSON
+        
+    Returns:
+        The text passed to the model
+    """
+    if not compact:
+        return json_codec.dumps_str(result)
+        
+    text, omitted = encode(result, max_tokens)
+    stats = _current.get()
+    if stats is not None:
+        tokens = count_tokens(text)
+        # Results without tables were sent as JSON already
+        json_tokens = count_tokens(json_codec.dumps_str(result)) if _has_table(result) else tokens
+        stats.record(json_tokens, tokens, omitted)
+    if omitted:
+        logger.info(f"Left {omitted} rows out of a tool result to fit {max_tokens} tokens")
+    return text
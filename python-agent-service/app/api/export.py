@@ -0,0 +1,122 @@
+"""
+Streaming bulk export of Printavo orders as NDJSON or CSV.
+"""
+
+import csv
+import io
+import logging
+import zlib
+from typing import AsyncIterator, List, Optional
+
+from app import json_codec
+from app.api.models import Order
+from app.printavo.api import PrintavoAPIClient
+from app.printavo.orders import OrderRecord
+from app.printavo.selection import AGENT_ORDER_FIELDS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Orders requested per page while exporting
+EXPORT_PAGE_SIZE = 100
+
+# Columns of an exported row: the Order model's fields plus the resume cursor
+EXPORT_COLUMNS: List[str] = list(Order.model_fields) + ["cursor"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+
+def _encode_page(rows: List[dict], export_format: str, header: bool) -> bytes:
+    """Encode a page of export rows."""
+    if export_format == "ndjson":
+        return b"".join(json_codec.dumps(row) + b"\n" for row in rows)
+        
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, lineterminator="\n")
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+async def export_orders(client: PrintavoAPIClient,
+                        export_format: str = "ndjson",
+                        query: str = "",
+                        exclude_completed: bool = True,
+                        exclude_quotes: bool = True,
+                        cursor: Optional[str] = None,
+                        limit: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Stream matching orders page by page.
+    
+    Only one page (plus the prefetched next page) is held in memory at a time.
+    Every row carries the cursor its page was fetched with; passing the last
+    received row's cursor resumes the export at that row's page, so rows of
+    that page are sent again.
+    
+    If fetching a page fails, an NDJSON export ends with an error line
+    carrying the resume cursor. A CSV export has no room for one, so the
+    error is raised instead, aborting the chunked response rather than
+    ending it as if the file were complete.
+    
+    Args:
+        client: The Printavo API client
+        export_format: "ndjson" or "csv"
+        query: Search query to filter orders
+        exclude_completed: Whether to exclude completed orders
+        exclude_quotes: Whether to exclude quotes
+        cursor: Cursor to resume from (the cursor of a previously exported row)
+        limit: Maximum number of orders to export
+        
+    Yields:
+        Encoded chunks, one per page
+    """
+    page_cursor = cursor or ""
+    header = True
+    pages = client.iter_order_pages(
+        query=query,
+        page_size=EXPORT_PAGE_SIZE,
+        exclude_completed=exclude_completed,
+        exclude_quotes=exclude_quotes,
+        after=cursor,
+        limit=limit,
+        prefetch=True,
+        fields=AGENT_ORDER_FIELDS,
+        transform=OrderRecord.from_order_node
+    )
+    try:
+        async for page in pages:
+            rows = [{**record.to_dict(), "cursor": page_cursor} for record in page.orders]
+            yield _encode_page(rows, export_format, header)
+            header = False
+            page_cursor = page.end_cursor or ""
+            
+        if header and export_format == "csv":
+            yield _encode_page([], export_format, header)
+    except Exception as e:
+        logger.error(f"Error exporting orders after cursor {page_cursor!r}: {e}")
+        if export_format != "ndjson":
+            raise
+        yield json_codec.dumps({"error": f"Export interrupted: {str(e)}", "cursor": page_cursor}) + b"\n"
+    finally:
+        await pages.aclose()
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Gzip a byte stream on the fly, flushing after every chunk.
+    
+    Args:
+        chunks: The uncompressed chunks
+        level: zlib compression level
+        
+    Yields:
+        Gzip-encoded chunks
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
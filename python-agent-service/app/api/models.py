@@ -18,6 +18,8 @@ class TokenUsage(BaseModel):
     prompt_tokens: int = Field(..., description="Number of prompt tokens used")
     completion_tokens: int = Field(..., description="Number of completion tokens used")
     total_tokens: int = Field(..., description="Total number of tokens used")
+    tool_result_tokens: int = Field(0, description="Tokens taken by tool results sent to the model")
+    tool_result_tokens_saved: int = Field(0, description="Tokens saved by the compact tool result encoding")
 
 
 class AgentResponseData(BaseModel):
@@ -25,6 +27,8 @@ class AgentResponseData(BaseModel):
     response: str = Field(..., description="The agent's response")
     elapsed_time: Optional[float] = Field(None, description="Time taken to process the request in seconds")
     usage: Optional[TokenUsage] = Field(None, description="Token usage information")
+    cached: bool = Field(False, description="Whether the response was reused from an earlier identical question")
+    fast_path: bool = Field(False, description="Whether the response was answered without running the model")
 
 
 class AgentResponse(BaseModel):
@@ -43,6 +47,7 @@ class Order(BaseModel):
     status: str = Field(..., description="Order status")
     customer: str = Field(..., description="Customer name")
     total: float = Field(..., description="Order total")
+    customerId: Optional[str] = Field(None, description="Customer ID")
 
 
 class OrdersResponse(BaseModel):
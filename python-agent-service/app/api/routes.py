@@ -3,10 +3,17 @@ API routes for the Python Agent Service.
 """
 
 import logging
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from typing import AsyncIterator, Literal, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from app import json_codec
+from app.api.export import MEDIA_TYPES, export_orders, gzip_stream
+from app.api.streaming import HEADERS as SSE_HEADERS, MEDIA_TYPE as SSE_MEDIA_TYPE, sse_stream
 from app.api.models import AgentRequest, AgentResponse, AgentResponseData, TokenUsage
 from app.agents.printavo_agent import printavo_agent_manager
+from app.printavo.api import PrintavoAPIClient, printavo_client
+from app.printavo.tenants import UnknownTenantError, client_registry, use_client
+from app.printavo.webhooks import parse_event, verify_signature, webhook_processor
 from app.config import settings
 
 # Configure logging
@@ -15,12 +22,32 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter()
 
+def tenant_id(request: Request) -> Optional[str]:
+    """Get the tenant a request is for from the tenant header."""
+    return request.headers.get(settings.printavo_tenant_header) or None
+
+async def tenant_client(request: Request) -> AsyncIterator[PrintavoAPIClient]:
+    """Lease the Printavo client of the request's tenant until the response is sent.
+    
+    Args:
+        request: The incoming request
+        
+    Yields:
+        The tenant's client, or the default client without a tenant header
+    """
+    try:
+        async with client_registry.lease(tenant_id(request)) as client:
+            yield client
+    except UnknownTenantError:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant: {tenant_id(request)}")
+
 @router.post("/api/agent", response_model=AgentResponse)
-async def process_agent_request(request: AgentRequest):
+async def process_agent_request(request: AgentRequest, client: PrintavoAPIClient = Depends(tenant_client)):
     """Process a request to the agent.
     
     Args:
         request: The agent request
+        client: The Printavo client of the request's tenant
         
     Returns:
         The agent response
@@ -28,12 +55,13 @@ async def process_agent_request(request: AgentRequest):
     try:
         logger.info(f"Processing agent request: {request.query}")
         
-        # Call the agent manager
-        result = await printavo_agent_manager.process_query(
-            query=request.query,
-            exclude_completed=request.exclude_completed,
-            exclude_quotes=request.exclude_quotes
-        )
+        # Call the agent manager with the tenant's client
+        with use_client(client):
+            result = await printavo_agent_manager.process_query(
+                query=request.query,
+                exclude_completed=request.exclude_completed,
+                exclude_quotes=request.exclude_quotes
+            )
         
         # Check if there was an error
         if "error" in result:
@@ -46,7 +74,9 @@ async def process_agent_request(request: AgentRequest):
         # Create response
         response_data = AgentResponseData(
             response=result["response"],
-            elapsed_time=result.get("elapsed_time")
+            elapsed_time=result.get("elapsed_time"),
+            cached=result.get("cached", False),
+            fast_path=result.get("fast_path", False)
         )
         
         # Add token usage if available
@@ -54,7 +84,9 @@ async def process_agent_request(request: AgentRequest):
             response_data.usage = TokenUsage(
                 prompt_tokens=result["usage"]["prompt_tokens"],
                 completion_tokens=result["usage"]["completion_tokens"],
-                total_tokens=result["usage"]["total_tokens"]
+                total_tokens=result["usage"]["total_tokens"],
+                tool_result_tokens=result["usage"].get("tool_result_tokens", 0),
+                tool_result_tokens_saved=result["usage"].get("tool_result_tokens_saved", 0)
             )
         
         return {
@@ -70,6 +102,118 @@ async def process_agent_request(request: AgentRequest):
             "data": None
         }
 
+@router.post("/api/agent/stream")
+async def stream_agent_request(request: AgentRequest, client: PrintavoAPIClient = Depends(tenant_client)):
+    """Process a request to the agent, streaming its progress as Server-Sent Events.
+    
+    Emits "delta" events with response text as it is generated, "tool_call"
+    and "tool_result" events as tools start and finish, and a final "done"
+    event with the full response, token usage and elapsed time (or an "error"
+    event). Disconnecting cancels the run; its Printavo requests are cancelled
+    unless other callers share them.
+    
+    Args:
+        request: The agent request
+        client: The Printavo client of the request's tenant
+        
+    Returns:
+        The event stream
+    """
+    logger.info(f"Streaming agent request: {request.query}")
+    
+    events = printavo_agent_manager.stream_query(
+        query=request.query,
+        exclude_completed=request.exclude_completed,
+        exclude_quotes=request.exclude_quotes
+    )
+    return StreamingResponse(sse_stream(events, client), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+@router.get("/api/orders/export")
+async def export_orders_stream(request: Request,
+                               format: Literal["ndjson", "csv"] = "ndjson",
+                               query: str = "",
+                               exclude_completed: bool = True,
+                               exclude_quotes: bool = True,
+                               cursor: Optional[str] = None,
+                               limit: Optional[int] = Query(None, ge=1),
+                               client: PrintavoAPIClient = Depends(tenant_client)):
+    """Stream all matching orders as NDJSON or CSV.
+    
+    Rows have the Order model's fields plus a cursor; pass the cursor of the
+    last row received to resume an interrupted export. The response is
+    gzipped on the fly when the client accepts gzip.
+    
+    Args:
+        request: The incoming request
+        format: "ndjson" or "csv"
+        query: Search query to filter orders
+        exclude_completed: Whether to exclude completed orders
+        exclude_quotes: Whether to exclude quotes
+        cursor: Cursor to resume from
+        limit: Maximum number of orders to export
+        client: The Printavo client of the request's tenant
+        
+    Returns:
+        The streaming export
+    """
+    logger.info(f"Exporting orders as {format} with query: {query}")
+    
+    chunks = export_orders(
+        client,
+        export_format=format,
+        query=query,
+        exclude_completed=exclude_completed,
+        exclude_quotes=exclude_quotes,
+        cursor=cursor,
+        limit=limit
+    )
+    headers = {"Content-Disposition": f'attachment; filename="orders.{format}"'}
+    
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        chunks = gzip_stream(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+        
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format], headers=headers)
+
+@router.post("/api/webhooks/printavo", status_code=202)
+async def receive_printavo_webhook(request: Request):
+    """Receive Printavo order and status change events.
+    
+    Deliveries must carry an HMAC-SHA256 signature of the raw body made with
+    PRINTAVO_WEBHOOK_SECRET. The body may be a single event or a list of
+    events; events are applied asynchronously after de-duplication and
+    coalescing, to the client of the tenant named in the tenant header.
+    
+    Args:
+        request: The incoming request
+        
+    Returns:
+        Counts of accepted and duplicate events
+    """
+    if not settings.printavo_webhook_secret:
+        raise HTTPException(status_code=403, detail="Webhook ingestion is not configured")
+        
+    body = await request.body()
+    signature = request.headers.get(settings.printavo_webhook_signature_header)
+    if not verify_signature(settings.printavo_webhook_secret, body, signature):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+        
+    try:
+        payload = json_codec.loads(body)
+        events = [parse_event(item, request.headers) for item in (payload if isinstance(payload, list) else [payload])]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid webhook payload: {str(e)}")
+        
+    try:
+        processor = await client_registry.get_webhook_processor(tenant_id(request))
+    except UnknownTenantError:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant: {tenant_id(request)}")
+        
+    result = processor.submit(events)
+    logger.info(f"Received {len(events)} webhook events ({result['duplicates']} duplicates)")
+    return result
+
 @router.get("/api/health")
 async def health_check():
     """Health check endpoint.
@@ -81,5 +225,11 @@ async def health_check():
         "status": "ok",
         "version": "1.0.0",
         "environment": "development" if settings.debug else "production",
-        "agent": "PrintavoAgent"
+        "agent": "PrintavoAgent",
+        "printavo": printavo_client.get_stats(),
+        "webhooks": webhook_processor.get_stats(),
+        "tenants": client_registry.get_stats(),
+        "answer_cache": printavo_agent_manager.answer_cache.get_stats(),
+        "fast_path": printavo_agent_manager.fast_path.get_stats(),
+        "tool_calls": dict(printavo_agent_manager.tool_call_stats)
     } 
\ No newline at end of file
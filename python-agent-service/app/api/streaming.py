@@ -0,0 +1,81 @@
+"""
+Server-Sent Events framing of streamed agent runs.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Tuple
+
+from app import json_codec
+from app.printavo.api import PrintavoAPIClient
+from app.printavo.tenants import use_client
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPE = "text/event-stream"
+
+# Keep proxies from caching or buffering the event stream
+HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+
+def format_sse(event: str, data: Any) -> bytes:
+    """Encode one Server-Sent Event with a JSON data line.
+    
+    Args:
+        event: The event name
+        data: JSON-serialisable event data
+        
+    Returns:
+        The encoded event
+    """
+    return f"event: {event}\ndata: {json_codec.dumps_str(data)}\n\n".encode("utf-8")
+
+
+async def sse_stream(events: AsyncIterator[Tuple[str, Dict[str, Any]]],
+                     client: PrintavoAPIClient) -> AsyncIterator[bytes]:
+    """Encode agent events as Server-Sent Events.
+    
+    The events are read in a task of their own, started with client as the
+    current Printavo client, so context the event source sets and resets
+    across its yields stays within one task however the response is
+    iterated. When the response is abandoned (Starlette cancels the stream
+    once the client disconnects), the task is cancelled and closes the event
+    source so it can cancel its run.
+    
+    Args:
+        events: Agent events as (name, data) pairs, such as from stream_query()
+        client: The Printavo client of the request's tenant
+        
+    Yields:
+        Encoded events
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def read_events():
+        try:
+            async for event in events:
+                queue.put_nowait(event)
+        finally:
+            await events.aclose()
+            queue.put_nowait(None)
+            
+    with use_client(client):
+        pump = asyncio.create_task(read_events())
+    try:
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            yield format_sse(*event)
+        # Raises the event source's error, if any
+        await pump
+    except BaseException:
+        logger.info("Event stream closed before the run finished")
+        raise
+    finally:
+        pump.cancel()
+        await asyncio.wait([pump])
@@ -16,11 +16,110 @@ class Settings(BaseModel):
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     openai_model: str = os.getenv("OPENAI_MODEL", "gpt-4o")
     
+    # Agent answer cache settings (TTL in seconds; answers are also dropped when their data changes)
+    agent_answer_cache_enabled: bool = os.getenv("AGENT_ANSWER_CACHE_ENABLED", "True").lower() == "true"
+    agent_answer_cache_ttl: float = float(os.getenv("AGENT_ANSWER_CACHE_TTL", "300"))
+    agent_answer_cache_max_entries: int = int(os.getenv("AGENT_ANSWER_CACHE_MAX_ENTRIES", "500"))
+    
+    # Answer simple lookups ("show order 1234", "list statuses") without running the model
+    agent_fast_path_enabled: bool = os.getenv("AGENT_FAST_PATH_ENABLED", "True").lower() == "true"
+    
+    # Tool results are sent to the model as compact tables, truncated to this many tokens
+    agent_compact_tool_results: bool = os.getenv("AGENT_COMPACT_TOOL_RESULTS", "True").lower() == "true"
+    agent_tool_result_max_tokens: int = int(os.getenv("AGENT_TOOL_RESULT_MAX_TOKENS", "2000"))
+    
+    # Tool calls of one agent run allowed at once, and whether likely calls
+    # (statuses, visual IDs in the question) are started before the model asks
+    agent_max_concurrent_tool_calls: int = int(os.getenv("AGENT_MAX_CONCURRENT_TOOL_CALLS", "4"))
+    agent_prefetch_enabled: bool = os.getenv("AGENT_PREFETCH_ENABLED", "True").lower() == "true"
+    
     # Printavo API settings
     printavo_api_url: str = os.getenv("PRINTAVO_API_URL", "https://www.printavo.com/api/v2")
     printavo_email: str = os.getenv("PRINTAVO_EMAIL", "")
     printavo_token: str = os.getenv("PRINTAVO_TOKEN", "")
     
+    # Printavo HTTP connection pool settings
+    printavo_max_connections: int = int(os.getenv("PRINTAVO_MAX_CONNECTIONS", "20"))
+    printavo_max_keepalive_connections: int = int(os.getenv("PRINTAVO_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    printavo_keepalive_expiry: float = float(os.getenv("PRINTAVO_KEEPALIVE_EXPIRY", "30"))
+    printavo_http2: bool = os.getenv("PRINTAVO_HTTP2", "False").lower() == "true"
+    printavo_timeout: float = float(os.getenv("PRINTAVO_TIMEOUT", "30"))
+    
+    # Printavo rate limiting and retry settings (Printavo allows 10 requests every 5 seconds)
+    printavo_rate_limit_requests: int = int(os.getenv("PRINTAVO_RATE_LIMIT_REQUESTS", "10"))
+    printavo_rate_limit_period: float = float(os.getenv("PRINTAVO_RATE_LIMIT_PERIOD", "5"))
+    printavo_max_retries: int = int(os.getenv("PRINTAVO_MAX_RETRIES", "3"))
+    printavo_retry_base_delay: float = float(os.getenv("PRINTAVO_RETRY_BASE_DELAY", "0.5"))
+    printavo_retry_max_delay: float = float(os.getenv("PRINTAVO_RETRY_MAX_DELAY", "10"))
+    printavo_min_concurrency: int = int(os.getenv("PRINTAVO_MIN_CONCURRENCY", "1"))
+    printavo_max_concurrency: int = int(os.getenv("PRINTAVO_MAX_CONCURRENCY", "10"))
+    printavo_latency_target: float = float(os.getenv("PRINTAVO_LATENCY_TARGET", "2"))
+    
+    # Printavo request hedging settings (read-only queries only)
+    printavo_hedging_enabled: bool = os.getenv("PRINTAVO_HEDGING_ENABLED", "False").lower() == "true"
+    printavo_hedge_percentile: float = float(os.getenv("PRINTAVO_HEDGE_PERCENTILE", "0.95"))
+    printavo_hedge_budget: float = float(os.getenv("PRINTAVO_HEDGE_BUDGET", "0.05"))
+    printavo_hedge_min_samples: int = int(os.getenv("PRINTAVO_HEDGE_MIN_SAMPLES", "20"))
+    
+    # Printavo circuit breaker settings (open circuit duration and slow call threshold in seconds)
+    printavo_breaker_enabled: bool = os.getenv("PRINTAVO_BREAKER_ENABLED", "True").lower() == "true"
+    printavo_breaker_failure_rate: float = float(os.getenv("PRINTAVO_BREAKER_FAILURE_RATE", "0.5"))
+    printavo_breaker_slow_call_seconds: float = float(os.getenv("PRINTAVO_BREAKER_SLOW_CALL_SECONDS", "10"))
+    printavo_breaker_window_size: int = int(os.getenv("PRINTAVO_BREAKER_WINDOW_SIZE", "20"))
+    printavo_breaker_min_calls: int = int(os.getenv("PRINTAVO_BREAKER_MIN_CALLS", "5"))
+    printavo_breaker_open_seconds: float = float(os.getenv("PRINTAVO_BREAKER_OPEN_SECONDS", "30"))
+    
+    # Printavo request batching settings
+    printavo_batch_window_ms: float = float(os.getenv("PRINTAVO_BATCH_WINDOW_MS", "5"))
+    printavo_max_batch_size: int = int(os.getenv("PRINTAVO_MAX_BATCH_SIZE", "10"))
+    
+    # Printavo response cache settings (TTLs in seconds per GraphQL operation)
+    printavo_cache_enabled: bool = os.getenv("PRINTAVO_CACHE_ENABLED", "True").lower() == "true"
+    printavo_cache_max_entries: int = int(os.getenv("PRINTAVO_CACHE_MAX_ENTRIES", "1000"))
+    printavo_cache_max_bytes: int = int(os.getenv("PRINTAVO_CACHE_MAX_BYTES", "10485760"))
+    printavo_cache_ttls: str = os.getenv(
+        "PRINTAVO_CACHE_TTLS", "GetStatuses=3600,GetOrderByVisualId=120,SearchOrders=30"
+    )
+    # Seconds cached responses are kept past their TTL, served while revalidating or while Printavo is down
+    printavo_stale_ttl: float = float(os.getenv("PRINTAVO_STALE_TTL", "3600"))
+    printavo_search_cache_max_entries: int = int(os.getenv("PRINTAVO_SEARCH_CACHE_MAX_ENTRIES", "256"))
+    
+    # Maximum number of orders paged through to apply customer and minimum total filters
+    printavo_filter_max_scan: int = int(os.getenv("PRINTAVO_FILTER_MAX_SCAN", "500"))
+    
+    # Visual ID to order ID index, persisted when given a database path (optionally warmed
+    # from the orders connection at startup)
+    printavo_visual_id_index_path: str = os.getenv("PRINTAVO_VISUAL_ID_INDEX_PATH", ":memory:")
+    printavo_visual_id_warmup: bool = os.getenv("PRINTAVO_VISUAL_ID_WARMUP", "False").lower() == "true"
+    printavo_visual_id_warmup_limit: int = int(os.getenv("PRINTAVO_VISUAL_ID_WARMUP_LIMIT", "5000"))
+    
+    # Local SQLite order mirror settings (intervals and staleness in seconds)
+    printavo_mirror_enabled: bool = os.getenv("PRINTAVO_MIRROR_ENABLED", "False").lower() == "true"
+    printavo_mirror_path: str = os.getenv("PRINTAVO_MIRROR_PATH", "printavo_mirror.db")
+    printavo_mirror_sync_interval: float = float(os.getenv("PRINTAVO_MIRROR_SYNC_INTERVAL", "60"))
+    printavo_mirror_full_sync_interval: float = float(os.getenv("PRINTAVO_MIRROR_FULL_SYNC_INTERVAL", "86400"))
+    printavo_mirror_max_staleness: float = float(os.getenv("PRINTAVO_MIRROR_MAX_STALENESS", "300"))
+    printavo_mirror_page_size: int = int(os.getenv("PRINTAVO_MIRROR_PAGE_SIZE", "100"))
+    printavo_mirror_sort_on: str = os.getenv("PRINTAVO_MIRROR_SORT_ON", "UPDATED_AT")
+    
+    # Order analytics settings (snapshot TTL in seconds)
+    printavo_analytics_snapshot_ttl: float = float(os.getenv("PRINTAVO_ANALYTICS_SNAPSHOT_TTL", "300"))
+    printavo_analytics_max_orders: int = int(os.getenv("PRINTAVO_ANALYTICS_MAX_ORDERS", "10000"))
+    printavo_analytics_max_live_orders: int = int(os.getenv("PRINTAVO_ANALYTICS_MAX_LIVE_ORDERS", "500"))
+    
+    # Webhook ingestion settings (deliveries are rejected while no secret is set)
+    printavo_webhook_secret: str = os.getenv("PRINTAVO_WEBHOOK_SECRET", "")
+    printavo_webhook_signature_header: str = os.getenv("PRINTAVO_WEBHOOK_SIGNATURE_HEADER", "X-Printavo-Signature")
+    printavo_webhook_coalesce_ms: float = float(os.getenv("PRINTAVO_WEBHOOK_COALESCE_MS", "250"))
+    printavo_webhook_dedup_size: int = int(os.getenv("PRINTAVO_WEBHOOK_DEDUP_SIZE", "1000"))
+    
+    # Multi-tenant settings (PRINTAVO_TENANTS is a JSON object of tenant ID to
+    # {"email", "token", optional "api_url" and "weight"}, selected per request by header)
+    printavo_tenants: str = os.getenv("PRINTAVO_TENANTS", "")
+    printavo_tenant_header: str = os.getenv("PRINTAVO_TENANT_HEADER", "X-Printavo-Tenant")
+    printavo_max_tenant_clients: int = int(os.getenv("PRINTAVO_MAX_TENANT_CLIENTS", "32"))
+    printavo_tenant_max_concurrency: int = int(os.getenv("PRINTAVO_TENANT_MAX_CONCURRENCY", "20"))
+    
     # Server settings
     port: int = int(os.getenv("PORT", "8000"))
     host: str = os.getenv("HOST", "0.0.0.0")
@@ -0,0 +1,72 @@
+"""
+Fast JSON encoding and decoding for the Python Agent Service.
+
+Uses orjson when it is installed and falls back to the standard library
+json module otherwise. Both backends produce compact UTF-8 JSON.
+"""
+
+import json
+import logging
+from typing import Any, Union
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Name of the JSON backend in use
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def _default(obj: Any) -> Any:
+    """Serialise objects JSON doesn't support natively."""
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return str(obj)
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """Decode JSON.
+    
+    Args:
+        data: JSON document as bytes or str
+        
+    Returns:
+        The decoded value
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode a value as compact UTF-8 JSON.
+    
+    Args:
+        obj: The value to encode
+        
+    Returns:
+        The JSON document as bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_str(obj: Any) -> str:
+    """Encode a value as a compact JSON string."""
+    return dumps(obj).decode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with the fast codec."""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -9,6 +9,10 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import router
 from app.config import settings
+from app.json_codec import BACKEND as JSON_BACKEND, FastJSONResponse
+from app.printavo.api import printavo_client
+from app.printavo.tenants import client_registry
+from app.printavo.webhooks import webhook_processor
 
 # Configure logging
 logging.basicConfig(
@@ -25,6 +29,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs" if settings.debug else None,
     redoc_url="/api/redoc" if settings.debug else None,
+    default_response_class=FastJSONResponse,
 )
 
 # Add CORS middleware
@@ -58,6 +63,7 @@ async def root():
 async def startup_event():
     """Application startup event."""
     logger.info("Starting Python Agent Service")
+    logger.info(f"Using {JSON_BACKEND} for JSON encoding")
     
     # Verify configuration
     try:
@@ -65,9 +71,17 @@ async def startup_event():
         logger.info("Configuration validated successfully")
     except Exception as e:
         logger.error(f"Configuration validation failed: {e}")
+    
+    # Open the shared Printavo connection pool
+    await printavo_client.start()
 
 # Application shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown event."""
-    logger.info("Shutting down Python Agent Service") 
\ No newline at end of file
+    logger.info("Shutting down Python Agent Service")
+    
+    # Stop applying webhook events, then release pooled Printavo connections
+    await webhook_processor.close()
+    await client_registry.close()
+    await printavo_client.close() 
\ No newline at end of file
@@ -0,0 +1,427 @@
+"""
+Columnar order analytics for the Printavo agent.
+
+Orders are loaded into a NumPy snapshot (one array per field) so that
+revenue and status aggregates are computed in a single vectorised pass
+instead of by paging orders through the model.
+
+Snapshots are built from the order mirror when it is fresh. Without it,
+only the most recently created orders (up to a much lower cap) are crawled
+from Printavo, so that an analytics tool call doesn't page through every order
+within the rate limit. A snapshot is rebuilt in the background once it is
+older than its TTL or the orders have changed (by data version); until
+then, the previous snapshot is served as stale.
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.printavo.api import printavo_client
+from app.printavo.freshness import REVALIDATING, record_stale
+from app.printavo.search import tokenize
+from app.printavo.selection import ANALYTICS_ORDER_FIELDS
+from app.printavo.versions import ALL, ORDERS, record_read
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Supported group_by values
+GROUP_BY_OPTIONS = ("none", "status", "customer", "day", "week", "month")
+
+# Named periods accepted in place of explicit start and end dates
+PERIOD_OPTIONS = ("today", "this_week", "last_week", "this_month", "last_month", "last_30_days", "this_year")
+
+# Printavo OrderSortField of the capped live crawl; visual IDs are assigned
+# in creation order, so the crawl covers the most recently created orders
+LIVE_SORT_ON = "VISUAL_ID"
+
+# Statuses excluded by exclude_completed and exclude_quotes
+COMPLETED_STATUS = "completed"
+QUOTE_STATUS = "quote"
+
+
+def resolve_period(period: str, today: date = None) -> Tuple[date, date]:
+    """Resolve a named period to inclusive start and end dates.
+    
+    Args:
+        period: One of PERIOD_OPTIONS
+        today: The current date in UTC (defaults to now)
+        
+    Returns:
+        The first and last day of the period
+    """
+    today = today or datetime.now(timezone.utc).date()
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+    
+    if period == "today":
+        return today, today
+    if period == "this_week":
+        return week_start, today
+    if period == "last_week":
+        return week_start - timedelta(days=7), week_start - timedelta(days=1)
+    if period == "this_month":
+        return month_start, today
+    if period == "last_month":
+        last_month_end = month_start - timedelta(days=1)
+        return last_month_end.replace(day=1), last_month_end
+    if period == "last_30_days":
+        return today - timedelta(days=29), today
+    if period == "this_year":
+        return today.replace(month=1, day=1), today
+    raise ValueError(f"period must be one of: {', '.join(PERIOD_OPTIONS)}")
+
+
+def _parse_timestamp(value: Optional[str]) -> np.datetime64:
+    """Parse an ISO 8601 timestamp to a UTC datetime64, or NaT if missing."""
+    if not value:
+        return np.datetime64("NaT", "s")
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(parsed, "s")
+
+
+def _parse_total(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class OrderSnapshot:
+    """Columnar snapshot of orders.
+    
+    Statuses and customers are dictionary-encoded: each order stores an
+    integer code indexing into status_names / customer_names.
+    """
+    
+    def __init__(self,
+                 totals: np.ndarray,
+                 created_at: np.ndarray,
+                 status_codes: np.ndarray,
+                 status_names: List[str],
+                 customer_codes: np.ndarray,
+                 customer_names: List[str],
+                 built_at: float = None,
+                 version: Tuple[int, ...] = None,
+                 complete: bool = True):
+        """Initialize the snapshot from its columns.
+        
+        Args:
+            totals: Order totals (float64)
+            created_at: Creation times (datetime64[s], UTC)
+            status_codes: Index of each order's status in status_names
+            status_names: Distinct status names
+            customer_codes: Index of each order's customer in customer_names
+            customer_names: Distinct customer names
+            built_at: Wall-clock time the snapshot was built
+            version: Data versions of the orders the snapshot was built from
+            complete: Whether the snapshot holds every order, rather than
+                only the most recently created ones up to a cap
+        """
+        self.totals = totals
+        self.created_at = created_at
+        self.status_codes = status_codes
+        self.status_names = status_names
+        self.customer_codes = customer_codes
+        self.customer_names = customer_names
+        self.built_at = built_at if built_at is not None else time.time()
+        self.version = version
+        self.complete = complete
+    
+    def __len__(self) -> int:
+        return len(self.totals)
+    
+    @classmethod
+    def from_nodes(cls, nodes: Iterable[Dict]) -> "OrderSnapshot":
+        """Build a snapshot from raw order nodes requested with ANALYTICS_ORDER_FIELDS.
+        
+        Args:
+            nodes: Raw order nodes
+            
+        Returns:
+            The columnar snapshot
+        """
+        totals, created_at, status_codes, customer_codes = [], [], [], []
+        statuses: Dict[Tuple[str, str], int] = {}
+        customers: Dict[Tuple[str, str], int] = {}
+        
+        for node in nodes:
+            status = node.get("status") or {}
+            customer = node.get("customer") or {}
+            status_key = (status.get("id") or "", status.get("name") or "Unknown")
+            customer_key = (customer.get("id") or "", customer.get("name") or customer.get("id") or "Unknown")
+            
+            totals.append(_parse_total(node.get("total")))
+            created_at.append(_parse_timestamp(node.get("createdAt")))
+            status_codes.append(statuses.setdefault(status_key, len(statuses)))
+            customer_codes.append(customers.setdefault(customer_key, len(customers)))
+            
+        return cls(
+            totals=np.array(totals, dtype=np.float64),
+            created_at=np.array(created_at, dtype="datetime64[s]"),
+            status_codes=np.array(status_codes, dtype=np.int32),
+            status_names=[name for _, name in statuses],
+            customer_codes=np.array(customer_codes, dtype=np.int32),
+            customer_names=[name for _, name in customers]
+        )
+    
+    def _status_mask(self, excluded: Sequence[str]) -> np.ndarray:
+        """Mask of orders whose status isn't one of the excluded status names."""
+        excluded = {" ".join(tokenize(name)) for name in excluded}
+        allowed = np.array(
+            [" ".join(tokenize(name)) not in excluded for name in self.status_names],
+            dtype=bool
+        )
+        return allowed[self.status_codes] if len(allowed) else np.ones(len(self), dtype=bool)
+    
+    def aggregate(self,
+                  group_by: str = "status",
+                  start_date: str = None,
+                  end_date: str = None,
+                  exclude_statuses: Sequence[str] = (),
+                  top_n: int = 10) -> Dict[str, Any]:
+        """Sum revenue and count orders, optionally grouped.
+        
+        Args:
+            group_by: One of GROUP_BY_OPTIONS
+            start_date: Only include orders created on or after this ISO date
+            end_date: Only include orders created on or before this ISO date
+            exclude_statuses: Status names to leave out
+            top_n: Maximum number of groups returned; status and customer
+                groups are ranked by revenue, date buckets by date
+                
+        Returns:
+            Overall and per-group order counts and revenue
+        """
+        if group_by not in GROUP_BY_OPTIONS:
+            raise ValueError(f"group_by must be one of: {', '.join(GROUP_BY_OPTIONS)}")
+            
+        mask = self._status_mask(exclude_statuses)
+        days = self.created_at.astype("datetime64[D]")
+        if start_date:
+            mask &= days >= np.datetime64(start_date, "D")
+        if end_date:
+            mask &= days <= np.datetime64(end_date, "D")
+            
+        totals = self.totals[mask]
+        result = {
+            "group_by": group_by,
+            "orders": int(mask.sum()),
+            "revenue": round(float(totals.sum()), 2),
+            "groups": []
+        }
+        if group_by == "none":
+            return result
+            
+        if group_by in ("status", "customer"):
+            codes = (self.status_codes if group_by == "status" else self.customer_codes)[mask]
+            names = self.status_names if group_by == "status" else self.customer_names
+            counts = np.bincount(codes, minlength=len(names))
+            revenue = np.bincount(codes, weights=totals, minlength=len(names))
+            present = np.flatnonzero(counts)
+            # Highest revenue first, then most orders
+            order = present[np.lexsort((-counts[present], -revenue[present]))][:top_n]
+            keys = [names[i] for i in order]
+        else:
+            bucket_days = days[mask]
+            dated = ~np.isnat(bucket_days)
+            bucket_days, totals = bucket_days[dated], totals[dated]
+            if group_by == "week":
+                # Weeks start on Monday; 1970-01-01 was a Thursday
+                buckets = bucket_days - (bucket_days.astype(np.int64) + 3) % 7
+            elif group_by == "month":
+                buckets = bucket_days.astype("datetime64[M]")
+            else:
+                buckets = bucket_days
+                
+            unique, codes = np.unique(buckets, return_inverse=True)
+            counts = np.bincount(codes, minlength=len(unique))
+            revenue = np.bincount(codes, weights=totals, minlength=len(unique))
+            # Most recent buckets, in chronological order
+            order = np.arange(len(unique))[-top_n:] if top_n else np.arange(0)
+            keys = [str(unique[i]) for i in order]
+            
+        result["groups"] = [
+            {"key": key, "orders": int(counts[i]), "revenue": round(float(revenue[i]), 2)}
+            for key, i in zip(keys, order)
+        ]
+        return result
+
+
+class OrderAnalytics:
+    """Builds and caches the order snapshot used for analytics, one per client."""
+    
+    def __init__(self,
+                 client,
+                 ttl: float = 300,
+                 max_orders: int = 10000,
+                 max_live_orders: int = 500,
+                 page_size: int = 100):
+        """Initialize the analytics snapshot provider.
+        
+        Args:
+            client: The default PrintavoAPIClient to load orders with
+            ttl: Seconds a snapshot is reused before it is rebuilt
+            max_orders: Maximum number of orders loaded from the order mirror
+            max_live_orders: Maximum number of orders crawled from Printavo
+                when the order mirror isn't fresh
+            page_size: Number of orders requested per page while crawling
+        """
+        self.client = client
+        self.ttl = ttl
+        self.max_orders = max_orders
+        self.max_live_orders = max_live_orders
+        self.page_size = page_size
+        # Snapshots and builds of tenant clients go away with their client
+        self._snapshots: "weakref.WeakKeyDictionary[Any, OrderSnapshot]" = weakref.WeakKeyDictionary()
+        self._builds: "weakref.WeakKeyDictionary[Any, asyncio.Task]" = weakref.WeakKeyDictionary()
+    
+    @staticmethod
+    def _version(client) -> Tuple[int, int]:
+        versions = client.data_versions
+        return versions.get(ALL), versions.get(ORDERS)
+    
+    def _is_current(self, snapshot: OrderSnapshot, client) -> bool:
+        """Whether a snapshot can be served as fresh."""
+        if snapshot.version != self._version(client) or time.time() - snapshot.built_at >= self.ttl:
+            return False
+        # A partial crawl is replaced as soon as the full mirror is available
+        return snapshot.complete or not client.mirror_is_fresh()
+    
+    async def _build(self, client) -> OrderSnapshot:
+        """Build and store a snapshot of the client's orders."""
+        version = self._version(client)
+        if client.mirror_is_fresh():
+            limit = self.max_orders
+            nodes = list(client.mirror.index.search("", limit))
+        else:
+            limit = self.max_live_orders
+            nodes = [
+                node async for node in client.iter_orders(
+                    page_size=min(self.page_size, limit),
+                    exclude_completed=False,
+                    exclude_quotes=False,
+                    limit=limit,
+                    prefetch=True,
+                    fields=ANALYTICS_ORDER_FIELDS,
+                    transform=lambda node: node,
+                    sort_on=LIVE_SORT_ON,
+                    sort_descending=True
+                )
+            ]
+            
+        snapshot = OrderSnapshot.from_nodes(nodes)
+        snapshot.version = version
+        snapshot.complete = len(nodes) < limit
+        self._snapshots[client] = snapshot
+        logger.info(f"Built analytics snapshot of {len(snapshot)} orders")
+        return snapshot
+    
+    def refresh(self, client=None) -> asyncio.Task:
+        """Start rebuilding the snapshot in the background, unless a rebuild is running.
+        
+        Args:
+            client: The PrintavoAPIClient whose orders to use (defaults to the
+                client given at construction)
+                
+        Returns:
+            The task building the snapshot
+        """
+        client = client or self.client
+        task = self._builds.get(client)
+        if task is None or task.done():
+            task = self._builds[client] = asyncio.create_task(self._build(client))
+            # Failures are reported to the callers awaiting the build, if any
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return task
+    
+    async def snapshot(self, client=None) -> OrderSnapshot:
+        """Get the current snapshot.
+        
+        The first snapshot of a client is waited for. After that, a snapshot
+        that is past its TTL or predates a change to the orders is served as
+        stale while a new one is built in the background.
+        
+        Args:
+            client: The PrintavoAPIClient whose orders to use (defaults to the
+                client given at construction)
+                
+        Returns:
+            The order snapshot
+        """
+        client = client or self.client
+        record_read(client.data_versions, ORDERS)
+        snapshot = self._snapshots.get(client)
+        if snapshot is not None and self._is_current(snapshot, client):
+            return snapshot
+            
+        task = self.refresh(client)
+        if snapshot is None:
+            # Shielded: the build is shared with other callers and later ones
+            return await asyncio.shield(task)
+            
+        record_stale(time.time() - snapshot.built_at, REVALIDATING)
+        return snapshot
+    
+    async def aggregate(self,
+                        group_by: str = "status",
+                        period: str = None,
+                        start_date: str = None,
+                        end_date: str = None,
+                        exclude_completed: bool = True,
+                        exclude_quotes: bool = True,
+                        top_n: int = 10,
+                        client=None) -> Dict[str, Any]:
+        """Aggregate the current snapshot (see OrderSnapshot.aggregate).
+        
+        Args:
+            group_by: One of GROUP_BY_OPTIONS
+            period: One of PERIOD_OPTIONS, used instead of start_date and end_date
+            start_date: Only include orders created on or after this ISO date
+            end_date: Only include orders created on or before this ISO date
+            exclude_completed: Whether to exclude completed orders
+            exclude_quotes: Whether to exclude quotes
+            top_n: Maximum number of groups returned
+            client: The PrintavoAPIClient whose orders to use
+            
+        Returns:
+            Overall and per-group order counts and revenue, plus snapshot info
+        """
+        if period:
+            start, end = resolve_period(period)
+            start_date, end_date = start.isoformat(), end.isoformat()
+            
+        snapshot = await self.snapshot(client)
+        excluded = []
+        if exclude_completed:
+            excluded.append(COMPLETED_STATUS)
+        if exclude_quotes:
+            excluded.append(QUOTE_STATUS)
+            
+        result = snapshot.aggregate(group_by, start_date, end_date, excluded, top_n)
+        result["start_date"] = start_date
+        result["end_date"] = end_date
+        result["snapshot"] = {
+            "orders": len(snapshot),
+            "complete": snapshot.complete,
+            "built_at": datetime.fromtimestamp(snapshot.built_at, timezone.utc).isoformat()
+        }
+        return result
+
+
+# Create a singleton instance
+order_analytics = OrderAnalytics(
+    printavo_client,
+    ttl=settings.printavo_analytics_snapshot_ttl,
+    max_orders=settings.printavo_analytics_max_orders,
+    max_live_orders=settings.printavo_analytics_max_live_orders
+)
\ No newline at end of file
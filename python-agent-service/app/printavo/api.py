@@ -2,40 +2,547 @@
 Printavo API client for interacting with the Printavo GraphQL API.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Dict, List, Optional, Any, Union
+import time
+from functools import lru_cache, partial
+from typing import Dict, List, Optional, Any, Union, AsyncIterator, Awaitable, Callable, Iterable, NamedTuple, Sequence, Tuple
 import httpx
 from pydantic import BaseModel
 
+from app import json_codec
 from app.config import settings
+from app.printavo.batching import BatchLoader
+from app.printavo.breaker import CLOSED, CircuitBreaker
+from app.printavo.cache import ResponseCache, parse_ttls
+from app.printavo.errors import CircuitOpenError, PrintavoAPIError, parse_retry_after
+from app.printavo.fairness import WeightedFairQueue
+from app.printavo.filters import ORDER_FILTER_ARGS, ORDER_FILTER_PARAMS, OrderFilters
+from app.printavo.freshness import REVALIDATING, UNAVAILABLE, record_stale, track_freshness
+from app.printavo.hedging import Hedger
+from app.printavo.id_index import VisualIdIndex
+from app.printavo.mirror import OrderMirror, as_invoice_node
+from app.printavo.query_cache import SearchResultCache
+from app.printavo.scheduler import RequestScheduler
+from app.printavo.selection import DEFAULT_ORDER_FIELDS, canonical_fields, field_tree, project, render_selection
+from app.printavo.singleflight import SingleFlight
+from app.printavo.versions import ALL, ORDER_LOOKUPS, ORDERS, STATUSES, DataVersions, order_key, record_read
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Default number of orders requested per page when paginating
+DEFAULT_PAGE_SIZE = 25
+
+
+@lru_cache(maxsize=64)
+def build_orders_query(fields: Tuple[str, ...], paginated: bool = False) -> str:
+    """Build the minimal orders query for a projection.
+    
+    Args:
+        fields: Canonical order field paths (see selection.canonical_fields)
+        paginated: Whether to build the cursor-paginated OrdersPage query
+            instead of SearchOrders
+        
+    Returns:
+        The GraphQL query document
+    """
+    selection = render_selection(field_tree(fields), indent=8)
+    
+    if paginated:
+        return f"""
+query OrdersPage($query: String!, $first: Int!, $after: String, {ORDER_FILTER_PARAMS}) {{
+  orders(first: $first, after: $after, query: $query, {ORDER_FILTER_ARGS}) {{
+    pageInfo {{
+      hasNextPage
+      endCursor
+    }}
+    edges {{
+      node {{
+{selection}
+      }}
+    }}
+  }}
+}}
+"""
+        
+    return f"""
+query SearchOrders($query: String!, $first: Int!, {ORDER_FILTER_PARAMS}) {{
+  orders(first: $first, query: $query, {ORDER_FILTER_ARGS}) {{
+    edges {{
+      node {{
+{selection}
+      }}
+    }}
+  }}
+}}
+"""
+
+
+class OrderPage(NamedTuple):
+    """A page of orders from the orders connection."""
+    orders: List[Any]
+    end_cursor: Optional[str]
+    has_next_page: bool
+
+
+class ScannedOrders(list):
+    """Orders found by checking at most PRINTAVO_FILTER_MAX_SCAN orders against local filters.
+    
+    truncated is True when the scan stopped at that cap before enough orders
+    matched, so more matching orders may exist.
+    """
+    
+    def __init__(self, orders: Iterable[Any] = (), truncated: bool = False):
+        super().__init__(orders)
+        self.truncated = truncated
+
+
+def build_order_query(query: str = "", exclude_completed: bool = True, exclude_quotes: bool = True) -> str:
+    """Build the Printavo search string for an orders query.
+    
+    Args:
+        query: Search terms to filter orders
+        exclude_completed: Whether to exclude completed orders
+        exclude_quotes: Whether to exclude quotes
+        
+    Returns:
+        The search string including status filters
+    """
+    query_string = query
+    
+    # Add filters if needed
+    if exclude_completed:
+        query_string += " -status:completed"
+        
+    if exclude_quotes:
+        query_string += " -status:quote"
+        
+    return query_string.strip()
+
+
+def transform_order(node: Dict, fields: Tuple[str, ...] = DEFAULT_ORDER_FIELDS) -> Dict:
+    """Transform an order node from the orders connection to a consistent format.
+    
+    Args:
+        node: The raw order node
+        fields: The projection the node was requested with
+        
+    Returns:
+        A new dict holding only the projected fields
+    """
+    return project(node, field_tree(fields))
+
+
+# Invoice fields returned by visual ID lookups
+INVOICE_FIELDS_FRAGMENT = """
+fragment InvoiceFields on Invoice {
+  id
+  name
+  visualId
+  createdAt
+  updatedAt
+  total
+  status {
+    id
+    name
+    color
+  }
+  contact {
+    id
+    fullName
+    email
+  }
+}
+"""
+
+# GraphQL query for getting an order by visual ID
+GET_ORDER_BY_VISUAL_ID_QUERY = """
+query GetOrderByVisualId($query: String!) {
+  invoices(query: $query, first: 1) {
+    edges {
+      node {
+        ...InvoiceFields
+      }
+    }
+  }
+}
+""" + INVOICE_FIELDS_FRAGMENT
+
+
+# GraphQL query for getting an invoice by its order ID
+GET_INVOICE_BY_ID_QUERY = """
+query GetInvoiceById($id: ID!) {
+  invoice(id: $id) {
+    ...InvoiceFields
+  }
+}
+""" + INVOICE_FIELDS_FRAGMENT
+
+
+@lru_cache(maxsize=32)
+def build_invoice_id_batch_query(count: int) -> str:
+    """Build a GraphQL document fetching count invoices by order ID through aliased invoice fields.
+    
+    Args:
+        count: Number of order IDs in the batch
+        
+    Returns:
+        Query taking variables $id0..$idN and returning aliases o0..oN
+    """
+    params = ", ".join(f"$id{i}: ID!" for i in range(count))
+    fields = "\n".join(f"  o{i}: invoice(id: $id{i}) {{ ...InvoiceFields }}" for i in range(count))
+    return f"query GetInvoicesByIds({params}) {{\n{fields}\n}}\n" + INVOICE_FIELDS_FRAGMENT
+
+
+@lru_cache(maxsize=32)
+def build_visual_id_batch_query(count: int) -> str:
+    """Build a GraphQL document looking up count visual IDs through aliased invoices fields.
+    
+    Args:
+        count: Number of visual IDs in the batch
+        
+    Returns:
+        Query taking variables $q0..$qN and returning aliases o0..oN
+    """
+    params = ", ".join(f"$q{i}: String!" for i in range(count))
+    fields = "\n".join(
+        f"  o{i}: invoices(query: $q{i}, first: 1) {{ edges {{ node {{ ...InvoiceFields }} }} }}"
+        for i in range(count)
+    )
+    return f"query GetOrdersByVisualIds({params}) {{\n{fields}\n}}\n" + INVOICE_FIELDS_FRAGMENT
+
+
+def _first_node(connection: Optional[Dict]) -> Optional[Dict]:
+    """Get the first node of a connection, if any."""
+    edges = (connection or {}).get("edges") or []
+    return edges[0]["node"] if edges else None
+
+
+def transform_invoice(node: Dict) -> Dict:
+    """Transform an invoice node to the same format as transform_order."""
+    return {
+        "id": node["id"],
+        "name": node["name"],
+        "visualId": node["visualId"],
+        "createdAt": node["createdAt"],
+        "status": {
+            "id": node["status"]["id"],
+            "name": node["status"]["name"],
+            "color": node["status"]["color"]
+        },
+        "customer": {
+            "id": node["contact"]["id"],
+            "name": node["contact"]["fullName"],
+            "email": node["contact"]["email"]
+        },
+        "total": node["total"]
+    }
+
+
+def is_read_only(query: str) -> bool:
+    """Check whether a GraphQL document is a query rather than a mutation or subscription."""
+    operation = query.lstrip().split(None, 1)[0] if query.strip() else ""
+    return operation not in ("mutation", "subscription")
+
+
+def request_key(query: str, variables: Dict = None, operation_name: str = None) -> str:
+    """Build a canonical key identifying a GraphQL request.
+    
+    Keys have the form "<operation>:<variables>:<query hash>", with variables
+    serialised using sorted keys so that equivalent requests map to the same
+    key regardless of dict ordering, and so that all requests for an operation
+    (or an operation with given variables) share a common prefix.
+    
+    Args:
+        query: The GraphQL query
+        variables: Optional variables for the GraphQL query
+        operation_name: Optional operation name for the GraphQL query
+        
+    Returns:
+        Key for the request
+    """
+    return ":".join((
+        request_key_prefix(operation_name, variables),
+        hashlib.sha1(query.encode("utf-8")).hexdigest()[:16]
+    ))
+
+
+def request_key_prefix(operation_name: str = None, variables: Dict = None) -> str:
+    """Build the key prefix shared by requests for an operation, optionally with given variables."""
+    if variables is None:
+        return f"{operation_name or ''}:"
+    return f"{operation_name or ''}:{json.dumps(variables, sort_keys=True, separators=(',', ':'), default=str)}"
+
+
+def _http2_available() -> bool:
+    """Check whether the optional HTTP/2 dependency (h2) is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def namespaced_path(path: str, namespace: Optional[str]) -> str:
+    """Give a SQLite database path a per-tenant suffix, e.g. "mirror.db" -> "mirror.shop.db"."""
+    if not namespace or path == ":memory:":
+        return path
+    stem, dot, extension = path.rpartition(".")
+    return f"{stem}.{namespace}.{extension}" if dot else f"{path}.{namespace}"
+
+
 class PrintavoAPIClient:
     """Client for interacting with the Printavo API."""
     
-    def __init__(self, api_url: str = None, email: str = None, token: str = None):
+    def __init__(self, api_url: str = None, email: str = None, token: str = None,
+                 transport: httpx.AsyncBaseTransport = None, mirror: OrderMirror = None,
+                 tenant_id: str = None, weight: float = 1.0, fair_queue: WeightedFairQueue = None):
         """Initialize the Printavo API client.
         
         Args:
             api_url: The Printavo API URL (defaults to settings.printavo_api_url)
             email: The Printavo API email (defaults to settings.printavo_email)
             token: The Printavo API token (defaults to settings.printavo_token)
+            transport: Optional httpx transport (mainly useful for testing)
+            mirror: Optional local order mirror (defaults to one configured from
+                settings when PRINTAVO_MIRROR_ENABLED is set)
+            tenant_id: Tenant the client serves; also namespaces its local databases
+            weight: The tenant's share of fair_queue
+            fair_queue: Optional queue sharing request slots with other tenants' clients
         """
         self.api_url = api_url or settings.printavo_api_url
         self.email = email or settings.printavo_email
         self.token = token or settings.printavo_token
         self.graphql_endpoint = f"{self.api_url}/graphql"
+        self.tenant_id = tenant_id
+        self.weight = weight
+        self.fair_queue = fair_queue
         
         # Validate that we have the required credentials
         if not self.email or not self.token:
             raise ValueError("Printavo API email and token must be provided")
+        
+        # Long-lived pooled HTTP client, opened by start() and closed by close()
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._stats = {
+            "clients_opened": 0,
+            "requests": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0
+        }
+        
+        # Keeps requests within Printavo's rate limit and retries transient failures
+        self._scheduler = RequestScheduler(
+            rate_limit_requests=settings.printavo_rate_limit_requests,
+            rate_limit_period=settings.printavo_rate_limit_period,
+            max_retries=settings.printavo_max_retries,
+            retry_base_delay=settings.printavo_retry_base_delay,
+            retry_max_delay=settings.printavo_retry_max_delay,
+            min_concurrency=settings.printavo_min_concurrency,
+            max_concurrency=settings.printavo_max_concurrency,
+            latency_target=settings.printavo_latency_target
+        )
+        
+        # Tracks per-operation latency and hedges slow read-only requests
+        self._hedger = Hedger(
+            enabled=settings.printavo_hedging_enabled,
+            percentile=settings.printavo_hedge_percentile,
+            budget=settings.printavo_hedge_budget,
+            min_samples=settings.printavo_hedge_min_samples
+        )
+        
+        # Rejects requests while Printavo is failing or slow, probing until it recovers
+        self.breaker = CircuitBreaker(
+            enabled=settings.printavo_breaker_enabled,
+            failure_rate=settings.printavo_breaker_failure_rate,
+            slow_call_seconds=settings.printavo_breaker_slow_call_seconds,
+            window_size=settings.printavo_breaker_window_size,
+            min_calls=settings.printavo_breaker_min_calls,
+            open_seconds=settings.printavo_breaker_open_seconds
+        )
+        
+        # Bounded TTL + LRU cache of read-only responses, kept past their TTL to serve stale
+        self.cache = ResponseCache(
+            max_entries=settings.printavo_cache_max_entries,
+            max_bytes=settings.printavo_cache_max_bytes
+        )
+        self._cache_ttls = parse_ttls(settings.printavo_cache_ttls)
+        self._revalidating: Dict[str, asyncio.Task] = {}
+        
+        # Bumped as cached data is invalidated, so results derived from it can be too
+        self.data_versions = DataVersions()
+        
+        # Order search results, reused for narrower searches (shares the SearchOrders TTL)
+        self.search_cache = SearchResultCache(max_entries=settings.printavo_search_cache_max_entries)
+        
+        # Shares identical in-flight read-only requests between concurrent callers
+        self._single_flight = SingleFlight()
+        
+        # Order IDs of every order seen, so visual IDs can be fetched by ID instead of searched
+        self.visual_ids = VisualIdIndex(namespaced_path(settings.printavo_visual_id_index_path, tenant_id))
+        self._warmup_task: Optional[asyncio.Task] = None
+        
+        # Batches concurrent visual ID lookups into one aliased GraphQL document
+        self._visual_id_loader = BatchLoader(
+            self._lookup_visual_ids,
+            window=settings.printavo_batch_window_ms / 1000,
+            max_batch_size=settings.printavo_max_batch_size
+        )
+        
+        # Local copy of the orders connection that serves reads while it is fresh
+        if mirror is None and settings.printavo_mirror_enabled:
+            mirror = OrderMirror(
+                path=namespaced_path(settings.printavo_mirror_path, tenant_id),
+                page_size=settings.printavo_mirror_page_size,
+                sort_on=settings.printavo_mirror_sort_on,
+                full_sync_interval=settings.printavo_mirror_full_sync_interval
+            )
+        self.mirror = mirror
+        self._mirror_task: Optional[asyncio.Task] = None
+        # Set by close() so a closed client doesn't silently open a new pool
+        self._closed = False
+    
+    @property
+    def http2_enabled(self) -> bool:
+        """Whether the pooled client negotiates HTTP/2."""
+        return settings.printavo_http2 and self._transport is None and _http2_available()
+    
+    async def start(self):
+        """Open the pooled HTTP client used for all Printavo requests.
+        
+        Also loads the visual ID index and starts syncing the order mirror in
+        the background when enabled. Safe to call more than once; an already
+        open client is kept, and a closed client is reopened.
+        """
+        self._closed = False
+        self._get_client()
+        await self.visual_ids.open()
+        
+        if self.mirror is not None and self._mirror_task is None:
+            self._mirror_task = asyncio.create_task(
+                self.mirror.run(self, settings.printavo_mirror_sync_interval)
+            )
+            
+        if settings.printavo_visual_id_warmup and self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(
+                self.warm_visual_id_index(settings.printavo_visual_id_warmup_limit)
+            )
+    
+    async def close(self):
+        """Close the pooled HTTP client and release its connections.
+        
+        Background tasks are stopped and the visual ID index and pending
+        mirror deletes are persisted first.
+        """
+        for task in (self._mirror_task, self._warmup_task, *self._revalidating.values()):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._closed = True
+        self._mirror_task = None
+        self._warmup_task = None
+        await self.visual_ids.close()
+        if self.mirror is not None:
+            await self.mirror.flush()
+            
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Closed Printavo HTTP connection pool")
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the pooled HTTP client, creating it if needed.
+        
+        Raises:
+            RuntimeError: If the client was closed and not started again
+        """
+        if self._closed:
+            raise RuntimeError("Printavo client is closed")
+        if self._client is None or self._client.is_closed:
+            if settings.printavo_http2 and not _http2_available():
+                logger.warning("PRINTAVO_HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+            
+            limits = httpx.Limits(
+                max_connections=settings.printavo_max_connections,
+                max_keepalive_connections=settings.printavo_max_keepalive_connections,
+                keepalive_expiry=settings.printavo_keepalive_expiry
+            )
+            self._client = httpx.AsyncClient(
+                headers={
+                    "Content-Type": "application/json",
+                    "email": self.email,
+                    "token": self.token
+                },
+                limits=limits,
+                timeout=settings.printavo_timeout,
+                http2=self.http2_enabled,
+                transport=self._transport
+            )
+            self._stats["clients_opened"] += 1
+            logger.info(
+                f"Opened Printavo HTTP connection pool "
+                f"(max_connections={limits.max_connections}, "
+                f"max_keepalive={limits.max_keepalive_connections}, http2={self.http2_enabled})"
+            )
+        return self._client
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get statistics about the pooled HTTP client.
+        
+        Returns:
+            Pool configuration and request counters
+        """
+        return {
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": self.http2_enabled,
+            "max_connections": settings.printavo_max_connections,
+            "max_keepalive_connections": settings.printavo_max_keepalive_connections,
+            "keepalive_expiry": settings.printavo_keepalive_expiry,
+            "timeout": settings.printavo_timeout,
+            **self._stats
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get runtime statistics for the client.
+        
+        Returns:
+            Connection pool, scheduling, hedging, circuit breaker, batching,
+            deduplication, cache and mirror statistics
+        """
+        return {
+            "pool": self.get_pool_stats(),
+            "visual_id_batching": dict(self._visual_id_loader.stats),
+            "visual_id_index": self.visual_ids.get_stats(),
+            "scheduler": self._scheduler.get_stats(),
+            "hedging": self._hedger.get_stats(),
+            "circuit_breaker": self.breaker.get_stats(),
+            "cache": self.cache.get_stats(),
+            "search_cache": self.search_cache.get_stats(),
+            "data_versions": self.data_versions.get_stats(),
+            "mirror": self.mirror.get_stats() if self.mirror is not None else None,
+            "deduplication": {
+                **self._single_flight.stats,
+                "in_flight": self._single_flight.in_flight
+            }
+        }
     
     async def execute_graphql(self, query: str, variables: Dict = None, operation_name: str = None) -> Dict:
         """Execute a GraphQL query against the Printavo API.
         
+        Read-only queries are served from the response cache when the operation
+        has a TTL configured, and identical queries issued concurrently share a
+        single request. Once a cached response expires it is still served
+        while a refresh runs in the background, and in place of the live
+        response while Printavo is unavailable.
+        
         Args:
             query: The GraphQL query to execute
             variables: Optional variables for the GraphQL query
@@ -44,12 +551,183 @@ class PrintavoAPIClient:
         Returns:
             The response data from the Printavo API
         """
-        headers = {
-            "Content-Type": "application/json",
-            "email": self.email,
-            "token": self.token
-        }
+        if not is_read_only(query):
+            return await self._send(query, variables, operation_name)
+            
+        key = request_key(query, variables, operation_name)
+        ttl = self.cache_ttl(operation_name)
+        if ttl <= 0:
+            return await self._fetch(key, ttl, query, variables, operation_name)
+            
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = self._stale_while_revalidate(key, lambda: self._fetch(key, ttl, query, variables, operation_name))
+        if cached is not None:
+            return cached
+            
+        try:
+            return await self._fetch(key, ttl, query, variables, operation_name)
+        except PrintavoAPIError as e:
+            cached = self._stale_fallback(key, e)
+            if cached is None:
+                raise
+            return cached
+    
+    async def _fetch(self, key: str, ttl: float, query: str, variables: Dict = None, operation_name: str = None) -> Dict:
+        """Fetch a read-only query through the single flight group and cache the result."""
+        async def fetch():
+            data = await self._send(query, variables, operation_name)
+            self.cache.set(key, data, ttl, settings.printavo_stale_ttl)
+            return data
+            
+        return await self._single_flight.do(key, fetch)
+    
+    def _stale_while_revalidate(self, key: str, refresh: Callable[[], Awaitable]) -> Optional[Any]:
+        """Return an expired cached response and refresh it in the background.
+        
+        Nothing is returned while the circuit breaker isn't closed, so that
+        callers try Printavo (or fail fast) before falling back to stale data.
+        """
+        if self.breaker.state != CLOSED:
+            return None
+        stale = self.cache.get_stale(key)
+        if stale is None:
+            return None
+            
+        if key not in self._revalidating:
+            self._revalidating[key] = asyncio.ensure_future(self._revalidate(key, refresh))
+        record_stale(stale[1], REVALIDATING)
+        return stale[0]
+    
+    async def _revalidate(self, key: str, refresh: Callable[[], Awaitable]):
+        """Run a background refresh of a cached response."""
+        try:
+            await refresh()
+        except Exception as e:
+            logger.warning(f"Background refresh of {key.split(':', 1)[0] or 'unnamed'} failed: {e}")
+        finally:
+            self._revalidating.pop(key, None)
+    
+    def _stale_fallback(self, key: str, error: PrintavoAPIError) -> Optional[Any]:
+        """Return an expired cached response in place of a request that failed transiently."""
+        stale = self.cache.get_stale(key) if error.transient else None
+        if stale is None:
+            return None
+        logger.warning(f"Serving {key.split(':', 1)[0] or 'unnamed'} response from {stale[1]:.0f}s ago: {error}")
+        record_stale(stale[1], UNAVAILABLE)
+        return stale[0]
+    
+    def cache_ttl(self, operation_name: str = None) -> float:
+        """Get the response cache TTL in seconds for an operation (0 if not cached)."""
+        if not settings.printavo_cache_enabled:
+            return 0
+        return self._cache_ttls.get(operation_name or "", 0)
+    
+    def invalidate_cache(self, operation_name: str = None, variables: Dict = None) -> int:
+        """Invalidate cached responses.
+        
+        Args:
+            operation_name: Only invalidate this operation (all operations if omitted)
+            variables: Only invalidate requests with exactly these variables
+            
+        Returns:
+            Number of entries removed
+        """
+        if operation_name in (None, "SearchOrders"):
+            self.search_cache.clear()
+            
+        if operation_name == "SearchOrders":
+            self.data_versions.bump(ORDERS)
+        elif operation_name == "GetStatuses":
+            self.data_versions.bump(STATUSES)
+        elif operation_name == "GetOrderByVisualId" and variables is None:
+            self.data_versions.bump(ORDER_LOOKUPS)
+            
+        if operation_name is None:
+            self.data_versions.bump(ALL)
+            count = len(self.cache)
+            self.cache.clear()
+            return count
+        return self.cache.invalidate_prefix(request_key_prefix(operation_name, variables))
+    
+    def invalidate_orders(self, orders: Dict[str, Optional[str]], deleted: Sequence[str] = ()) -> int:
+        """Invalidate locally held data for orders that changed in Printavo.
+        
+        Order searches are always invalidated since a changed order may now
+        match (or no longer match) any of them. Visual ID lookups are
+        invalidated for the given visual IDs, or all of them when the visual
+        ID of a changed order isn't known.
+        
+        Args:
+            orders: Changed order IDs mapped to their visual IDs (None if unknown)
+            deleted: Order IDs of deleted orders, dropped from the visual ID
+                index and the order mirror
+                
+        Returns:
+            Number of cached responses removed
+        """
+        removed = self.invalidate_cache("SearchOrders")
+        removed += self.invalidate_cache("GetInvoicesByIds") + self.invalidate_cache("GetOrdersByVisualIds")
+        for order_id in orders:
+            removed += self.invalidate_cache("GetInvoiceById", {"id": order_id})
+            
+        if None in orders.values():
+            removed += self.invalidate_cache("GetOrderByVisualId")
+        else:
+            for visual_id in orders.values():
+                removed += int(self.cache.invalidate(self._visual_id_key(visual_id)))
+                self.data_versions.bump(order_key(visual_id))
+                
+        for order_id in deleted:
+            visual_id = orders.get(order_id)
+            if visual_id is not None:
+                self.visual_ids.invalidate(visual_id)
+        if deleted and self.mirror is not None:
+            self.mirror.delete(deleted)
+            
+        return removed
+    
+    async def _send(self, query: str, variables: Dict = None, operation_name: str = None) -> Dict:
+        """Send a GraphQL request through the rate-limit-aware scheduler.
+        
+        Read-only queries have their latency tracked per operation and, when
+        hedging is enabled, are re-sent if slower than usual. Requests are
+        rejected with CircuitOpenError while the circuit breaker is open.
+        
+        Args:
+            query: The GraphQL query to execute
+            variables: Optional variables for the GraphQL query
+            operation_name: Optional operation name for the GraphQL query
+            
+        Returns:
+            The response data from the Printavo API
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(retry_after=self.breaker.retry_after)
+            
+        if not is_read_only(query):
+            return await self._scheduler.run(lambda: self._post(query, variables, operation_name), idempotent=False)
+            
+        # Slow queries may be hedged, but only with spare rate limit capacity
+        return await self._scheduler.run(
+            lambda: self._hedger.run(
+                operation_name or "unnamed",
+                lambda: self._post(query, variables, operation_name),
+                allow_hedge=self._scheduler.bucket.try_acquire
+            )
+        )
+    
+    async def _post(self, query: str, variables: Dict = None, operation_name: str = None) -> Dict:
+        """Post a GraphQL request over the pooled HTTP client.
         
+        Args:
+            query: The GraphQL query to execute
+            variables: Optional variables for the GraphQL query
+            operation_name: Optional operation name for the GraphQL query
+            
+        Returns:
+            The response data from the Printavo API
+        """
         payload = {
             "query": query
         }
@@ -62,124 +740,357 @@ class PrintavoAPIClient:
             
         logger.debug(f"Executing GraphQL query: {operation_name or 'unnamed'}")
         
+        client = self._get_client()
+        if self.fair_queue is not None:
+            await self.fair_queue.acquire(self.tenant_id or "default", self.weight)
+        started = time.monotonic()
+        # Whether Printavo responded usably, for the circuit breaker (None if cancelled)
+        healthy = None
+        self._stats["requests"] += 1
+        self._stats["in_flight"] += 1
+        self._stats["peak_in_flight"] = max(self._stats["peak_in_flight"], self._stats["in_flight"])
+        
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.graphql_endpoint,
-                    headers=headers,
-                    json=payload
-                )
-                
-                response.raise_for_status()
-                result = response.json()
+            response = await client.post(
+                self.graphql_endpoint,
+                json=payload
+            )
+            healthy = response.status_code < 500
+            
+            response.raise_for_status()
+            result = json_codec.loads(response.content)
+            
+            if "errors" in result:
+                # Counted and logged with the other failures below
+                raise PrintavoAPIError(f"GraphQL errors: {result['errors']}", status_code=response.status_code)
                 
-                if "errors" in result:
-                    logger.error(f"GraphQL errors: {result['errors']}")
-                    raise Exception(f"GraphQL errors: {result['errors']}")
-                    
-                return result.get("data", {})
+            return result.get("data", {})
                 
         except httpx.HTTPStatusError as e:
+            self._stats["errors"] += 1
             logger.error(f"HTTP error: {e}")
-            raise Exception(f"HTTP error: {e}")
+            raise PrintavoAPIError(
+                f"HTTP error: {e}",
+                status_code=e.response.status_code,
+                retry_after=parse_retry_after(e.response.headers.get("Retry-After"))
+            )
+            
+        except httpx.TransportError as e:
+            healthy = False
+            self._stats["errors"] += 1
+            logger.error(f"Transport error: {e}")
+            raise PrintavoAPIError(f"Transport error: {e!r}")
             
         except Exception as e:
+            self._stats["errors"] += 1
             logger.error(f"Error executing GraphQL query: {e}")
             raise
             
+        finally:
+            self._stats["in_flight"] -= 1
+            if self.fair_queue is not None:
+                self.fair_queue.release()
+            if healthy is not None:
+                self.breaker.record(healthy, time.monotonic() - started)
+            
     async def get_orders(self, 
                          query: str = "", 
                          first: int = 10, 
                          exclude_completed: bool = True,
-                         exclude_quotes: bool = True) -> List[Dict]:
+                         exclude_quotes: bool = True,
+                         fields: Sequence[str] = None,
+                         transform: Callable[[Dict], Any] = None,
+                         filters: OrderFilters = None) -> List[Any]:
         """Get orders from Printavo.
         
+        Unfiltered searches are served from the order mirror when it is
+        enabled, fresh and able to evaluate the search, then from cached
+        results of the same or a broader search; otherwise they are fetched
+        live. Filters Printavo supports are sent with the query; customer and
+        minimum total filters are applied while paging through results.
+        
         Args:
             query: Search query to filter orders
             first: Number of orders to retrieve
             exclude_completed: Whether to exclude completed orders
             exclude_quotes: Whether to exclude quotes
+            fields: Order fields to request as dotted paths (defaults to DEFAULT_ORDER_FIELDS)
+            transform: Function building each result from the raw order node
+                (defaults to transform_order with the requested fields)
+            filters: Structured filters and sorting
             
         Returns:
-            List of orders
+            List of orders; a ScannedOrders list when customer or minimum
+            total filters were applied
         """
-        # Construct the query string based on filters
-        query_string = query
+        record_read(self.data_versions, ORDERS)
+        fields = canonical_fields(fields)
+        filters = filters or OrderFilters()
+        transform = transform or partial(transform_order, fields=fields)
+        variables = {
+            "query": build_order_query(query, exclude_completed, exclude_quotes),
+            "first": first
+        }
         
-        # Add filters if needed
-        if exclude_completed:
-            query_string += " -status:completed"
+        if filters.has_local_filters:
+            return await self._get_filtered_orders(query, first, exclude_completed, exclude_quotes,
+                                                   fields, transform, filters)
             
-        if exclude_quotes:
-            query_string += " -status:quote"
+        ttl = self.cache_ttl("SearchOrders") if filters.empty else 0
+        if filters.empty:
+            nodes = self._mirror_search(variables["query"], first)
+            if nodes is not None:
+                return [transform(node) for node in nodes]
+                
+            if ttl > 0:
+                nodes = self.search_cache.get(variables["query"], first, fields)
+                if nodes is not None:
+                    return [transform(node) for node in nodes]
+                    
+        variables.update(filters.variables())
+        
+        try:
+            with track_freshness() as freshness:
+                data = await self.execute_graphql(build_orders_query(fields), variables, "SearchOrders")
+            if freshness.stale:
+                record_stale(freshness.age, freshness.reason)
+                
+            if not data or not data.get("orders") or not data["orders"].get("edges"):
+                nodes = []
+            else:
+                nodes = [edge["node"] for edge in data["orders"]["edges"]]
+                
+            # Stale results would be served from the search cache as if fresh
+            if not freshness.stale:
+                self.visual_ids.record(nodes)
+                self.search_cache.set(variables["query"], first, fields, nodes, ttl)
             
-        # GraphQL query for orders
-        gql_query = """
-        query SearchOrders($query: String!, $first: Int!) {
-          orders(first: $first, query: $query) {
-            edges {
-              node {
-                id
-                name
-                visualId
-                createdAt
-                updatedAt
-                dueDate
-                status {
-                  id
-                  name
-                  color
-                }
-                customer {
-                  id
-                  name
-                  email
-                }
-                total
-              }
-            }
-          }
-        }
-        """
+            # Transform the orders
+            return [transform(node) for node in nodes]
+            
+        except Exception as e:
+            nodes = self._mirror_fallback(variables["query"], first, e) if filters.empty else None
+            if nodes is not None:
+                return [transform(node) for node in nodes]
+            logger.error(f"Error getting orders: {e}")
+            raise
+            
+    async def _get_filtered_orders(self,
+                                   query: str,
+                                   first: int,
+                                   exclude_completed: bool,
+                                   exclude_quotes: bool,
+                                   fields: Tuple[str, ...],
+                                   transform: Callable[[Dict], Any],
+                                   filters: OrderFilters) -> ScannedOrders:
+        """Page through orders until first of them pass the filters Printavo can't apply."""
+        matches = []
+        has_more = False
+        pages = self.iter_order_pages(
+            query=query,
+            page_size=min(max(first * 2, DEFAULT_PAGE_SIZE), 100),
+            exclude_completed=exclude_completed,
+            exclude_quotes=exclude_quotes,
+            limit=settings.printavo_filter_max_scan,
+            fields=canonical_fields(fields + filters.local_fields()),
+            transform=lambda node: node,
+            filters=filters
+        )
+        try:
+            async for page in pages:
+                matches.extend(node for node in page.orders if filters.matches(node))
+                has_more = page.has_next_page
+                if len(matches) >= first:
+                    break
+        finally:
+            await pages.aclose()
+            
+        # The scan stopped at its cap with orders left unchecked
+        truncated = len(matches) < first and has_more
+        if truncated:
+            logger.info(
+                f"Found {len(matches)} of {first} filtered orders within "
+                f"{settings.printavo_filter_max_scan} scanned orders"
+            )
+        return ScannedOrders((transform(node) for node in matches[:first]), truncated)
+        
+    async def fetch_orders_page(self,
+                                query_string: str,
+                                first: int,
+                                after: str = None,
+                                fields: Sequence[str] = None,
+                                transform: Callable[[Dict], Any] = None,
+                                sort_on: str = None,
+                                sort_descending: bool = None,
+                                filters: OrderFilters = None) -> OrderPage:
+        """Fetch a single page of the orders connection.
         
+        Args:
+            query_string: The full Printavo search string (filters included)
+            first: Number of orders in the page
+            after: Cursor to continue from, or None for the first page
+            fields: Order fields to request as dotted paths (defaults to DEFAULT_ORDER_FIELDS)
+            transform: Function building each result from the raw order node
+                (defaults to transform_order with the requested fields)
+            sort_on: Printavo OrderSortField to order by (defaults to Printavo's order)
+            sort_descending: Whether to sort in descending order
+            filters: Structured filters and sorting; only the filters Printavo
+                supports are applied (see OrderFilters.variables)
+            
+        Returns:
+            The page of orders and its pagination info
+        """
+        fields = canonical_fields(fields)
+        transform = transform or partial(transform_order, fields=fields)
         variables = {
-            "query": query_string.strip(),
+            "query": query_string,
             "first": first
         }
         
-        try:
-            data = await self.execute_graphql(gql_query, variables, "SearchOrders")
+        if after:
+            variables["after"] = after
+        if filters is not None:
+            variables.update(filters.variables())
+        if sort_on:
+            variables["sortOn"] = sort_on
+        if sort_descending is not None:
+            variables["sortDescending"] = sort_descending
             
-            if not data or not data.get("orders") or not data["orders"].get("edges"):
-                return []
+        data = await self.execute_graphql(build_orders_query(fields, paginated=True), variables, "OrdersPage")
+        connection = (data or {}).get("orders") or {}
+        page_info = connection.get("pageInfo") or {}
+        nodes = [edge["node"] for edge in connection.get("edges") or []]
+        self.visual_ids.record(nodes)
+        
+        return OrderPage(
+            orders=[transform(node) for node in nodes],
+            end_cursor=page_info.get("endCursor"),
+            has_next_page=bool(page_info.get("hasNextPage"))
+        )
+        
+    async def iter_order_pages(self,
+                               query: str = "",
+                               page_size: int = DEFAULT_PAGE_SIZE,
+                               exclude_completed: bool = True,
+                               exclude_quotes: bool = True,
+                               after: str = None,
+                               limit: int = None,
+                               prefetch: bool = False,
+                               fields: Sequence[str] = None,
+                               transform: Callable[[Dict], Any] = None,
+                               sort_on: str = None,
+                               sort_descending: bool = None,
+                               filters: OrderFilters = None) -> AsyncIterator[OrderPage]:
+        """Walk the orders connection page by page.
+        
+        Args:
+            query: Search query to filter orders
+            page_size: Number of orders requested per page
+            exclude_completed: Whether to exclude completed orders
+            exclude_quotes: Whether to exclude quotes
+            after: Cursor to resume from (an end_cursor from a previous page)
+            limit: Maximum number of orders to fetch in total
+            prefetch: Whether to request the next page while the current one is consumed
+            fields: Order fields to request as dotted paths (defaults to DEFAULT_ORDER_FIELDS)
+            transform: Function building each result from the raw order node
+            sort_on: Printavo OrderSortField to order by (defaults to Printavo's order)
+            sort_descending: Whether to sort in descending order
+            filters: Structured filters and sorting sent with each page request
+            
+        Yields:
+            Pages of orders, each carrying the cursor to resume after it
+        """
+        record_read(self.data_versions, ORDERS)
+        query_string = build_order_query(query, exclude_completed, exclude_quotes)
+        fields = canonical_fields(fields)
+        remaining = limit
+        
+        def fetch(cursor: Optional[str]):
+            first = page_size if remaining is None else min(page_size, remaining)
+            return self.fetch_orders_page(
+                query_string, first, cursor, fields, transform, sort_on, sort_descending, filters
+            )
+        
+        if remaining is not None and remaining <= 0:
+            return
+            
+        next_page: Optional[asyncio.Task] = None
+        try:
+            page = await fetch(after)
+            while True:
+                if remaining is not None:
+                    page = page._replace(orders=page.orders[:remaining])
+                    remaining -= len(page.orders)
+                    
+                more = page.has_next_page and page.end_cursor and (remaining is None or remaining > 0)
+                if more and prefetch:
+                    next_page = asyncio.create_task(fetch(page.end_cursor))
+                    
+                yield page
                 
-            # Extract and transform the orders
-            orders = []
-            for edge in data["orders"]["edges"]:
-                node = edge["node"]
-                orders.append({
-                    "id": node["id"],
-                    "name": node["name"],
-                    "visualId": node["visualId"],
-                    "createdAt": node["createdAt"],
-                    "status": {
-                        "id": node["status"]["id"],
-                        "name": node["status"]["name"],
-                        "color": node["status"]["color"]
-                    },
-                    "customer": {
-                        "id": node["customer"]["id"],
-                        "name": node["customer"]["name"],
-                        "email": node["customer"]["email"]
-                    },
-                    "total": node["total"]
-                })
+                if not more:
+                    return
+                    
+                if next_page is not None:
+                    page = await next_page
+                    next_page = None
+                else:
+                    page = await fetch(page.end_cursor)
+        finally:
+            # Early termination by the caller must not leave a fetch running
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
                 
-            return orders
+    async def iter_orders(self,
+                          query: str = "",
+                          page_size: int = DEFAULT_PAGE_SIZE,
+                          exclude_completed: bool = True,
+                          exclude_quotes: bool = True,
+                          limit: int = None,
+                          prefetch: bool = False,
+                          fields: Sequence[str] = None,
+                          transform: Callable[[Dict], Any] = None,
+                          sort_on: str = None,
+                          sort_descending: bool = None) -> AsyncIterator[Any]:
+        """Stream orders from Printavo using cursor pagination.
+        
+        Orders are yielded as each page arrives, so arbitrarily large result
+        sets can be scanned in constant memory. Breaking out of the loop stops
+        further requests.
+        
+        Args:
+            query: Search query to filter orders
+            page_size: Number of orders requested per page
+            exclude_completed: Whether to exclude completed orders
+            exclude_quotes: Whether to exclude quotes
+            limit: Maximum number of orders to yield
+            prefetch: Whether to request the next page while the current one is consumed
+            fields: Order fields to request as dotted paths (defaults to DEFAULT_ORDER_FIELDS)
+            transform: Function building each result from the raw order node
+            sort_on: Printavo OrderSortField to order by (defaults to Printavo's order)
+            sort_descending: Whether to sort in descending order
             
-        except Exception as e:
-            logger.error(f"Error getting orders: {e}")
-            raise
+        Yields:
+            Orders in the same format as get_orders
+        """
+        pages = self.iter_order_pages(
+            query=query,
+            page_size=page_size,
+            exclude_completed=exclude_completed,
+            exclude_quotes=exclude_quotes,
+            limit=limit,
+            prefetch=prefetch,
+            fields=fields,
+            transform=transform,
+            sort_on=sort_on,
+            sort_descending=sort_descending
+        )
+        try:
+            async for page in pages:
+                for order in page.orders:
+                    yield order
+        finally:
+            await pages.aclose()
             
     async def get_statuses(self) -> List[Dict]:
         """Get all available statuses from Printavo.
@@ -201,6 +1112,7 @@ class PrintavoAPIClient:
         }
         """
         
+        record_read(self.data_versions, STATUSES)
         try:
             data = await self.execute_graphql(gql_query, operation_name="GetStatuses")
             
@@ -223,83 +1135,222 @@ class PrintavoAPIClient:
             logger.error(f"Error getting statuses: {e}")
             raise
             
-    async def get_order_by_visual_id(self, visual_id: str) -> Optional[Dict]:
+    async def get_order_by_visual_id(self,
+                                     visual_id: str,
+                                     transform: Callable[[Dict], Any] = None) -> Optional[Any]:
         """Get an order by its visual ID.
         
+        Lookups are served from the order mirror while it is fresh, then from
+        the cache; concurrent uncached lookups are batched into a single
+        Printavo request.
+        
         Args:
             visual_id: The visual ID of the order
+            transform: Function building the result from the raw invoice node
+                (defaults to transform_invoice)
             
         Returns:
             The order if found, None otherwise
         """
-        # GraphQL query for getting an order by visual ID
-        gql_query = """
-        query GetOrderByVisualId($query: String!) {
-          invoices(query: $query, first: 1) {
-            edges {
-              node {
-                id
-                name
-                visualId
-                createdAt
-                updatedAt
-                total
-                status {
-                  id
-                  name
-                  color
-                }
-                contact {
-                  id
-                  fullName
-                  email
-                }
-              }
-            }
-          }
+        visual_id = visual_id.strip()
+        transform = transform or transform_invoice
+        record_read(self.data_versions, ORDER_LOOKUPS, order_key(visual_id))
+        
+        if self.mirror_is_fresh():
+            node = self.mirror.get_by_visual_id(visual_id)
+            if node is not None:
+                self.mirror.stats["hits"] += 1
+                return transform(as_invoice_node(node))
+            self.mirror.stats["misses"] += 1
+            
+        key = self._visual_id_key(visual_id)
+        try:
+            if self.cache_ttl("GetOrderByVisualId") > 0:
+                cached = self.cache.get(key) or self._stale_while_revalidate(
+                    key, lambda: self._visual_id_loader.load(visual_id)
+                )
+                if cached is not None:
+                    node = _first_node(cached.get("invoices"))
+                    return transform(node) if node else None
+                    
+            try:
+                node = await self._visual_id_loader.load(visual_id)
+            except PrintavoAPIError as e:
+                cached = self._stale_fallback(key, e)
+                if cached is None:
+                    raise
+                node = _first_node(cached.get("invoices"))
+            return transform(node) if node else None
+            
+        except Exception as e:
+            logger.error(f"Error getting order by visual ID: {e}")
+            raise
+            
+    async def get_orders_by_visual_ids(self,
+                                       visual_ids: List[str],
+                                       transform: Callable[[Dict], Any] = None) -> Dict[str, Optional[Any]]:
+        """Get several orders by visual ID in a single GraphQL request.
+        
+        Args:
+            visual_ids: The visual IDs of the orders
+            transform: Function building each result from the raw invoice node
+                (defaults to transform_invoice)
+            
+        Returns:
+            Mapping of visual ID to the order, or None if not found
+        """
+        transform = transform or transform_invoice
+        record_read(self.data_versions, ORDER_LOOKUPS, *(order_key(visual_id) for visual_id in visual_ids))
+        nodes = await self._lookup_visual_ids(list(dict.fromkeys(visual_ids)))
+        return {
+            visual_id: transform(node) if node else None
+            for visual_id, node in nodes.items()
         }
+        
+    async def _lookup_visual_ids(self, visual_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Look up raw invoice nodes for distinct visual IDs.
+        
+        Visual IDs with a known order ID are fetched directly by ID; the rest,
+        and any whose mapping turns out to be stale, are resolved by search.
         """
+        order_ids = {visual_id: self.visual_ids.get(visual_id) for visual_id in visual_ids}
+        known = [visual_id for visual_id in visual_ids if order_ids[visual_id]]
         
-        variables = {
-            "query": visual_id.strip()
-        }
+        results = {}
+        if known:
+            try:
+                results = await self._fetch_visual_ids_by_id(known, order_ids)
+            except PrintavoAPIError as e:
+                # Quotes appear in the orders connection but can't be fetched as invoices
+                if e.transient:
+                    raise
+                logger.warning(f"Falling back to search for visual IDs {known}: {e}")
+                results = dict.fromkeys(known)
+                
+        for visual_id in known:
+            if results[visual_id] is None:
+                self.visual_ids.invalidate(visual_id)
+                
+        unresolved = [visual_id for visual_id in visual_ids if results.get(visual_id) is None]
+        if unresolved:
+            results.update(await self._search_visual_ids(unresolved))
+            
+        return results
         
-        try:
-            data = await self.execute_graphql(gql_query, variables, "GetOrderByVisualId")
+    async def _fetch_visual_ids_by_id(self, visual_ids: List[str], order_ids: Dict[str, str]) -> Dict[str, Optional[Dict]]:
+        """Fetch invoices by order ID in a single GraphQL request, caching each like a visual ID search."""
+        self.visual_ids.stats["by_id_lookups"] += len(visual_ids)
+        
+        if len(visual_ids) == 1:
+            data = await self.execute_graphql(
+                GET_INVOICE_BY_ID_QUERY, {"id": order_ids[visual_ids[0]]}, "GetInvoiceById"
+            )
+            nodes = [(data or {}).get("invoice")]
+        else:
+            variables = {f"id{i}": order_ids[visual_id] for i, visual_id in enumerate(visual_ids)}
+            data = await self.execute_graphql(
+                build_invoice_id_batch_query(len(visual_ids)), variables, "GetInvoicesByIds"
+            )
+            nodes = [(data or {}).get(f"o{i}") for i in range(len(visual_ids))]
             
-            if (not data or 
-                not data.get("invoices") or 
-                not data["invoices"].get("edges") or 
-                len(data["invoices"]["edges"]) == 0):
-                return None
-                
-            # Extract the order
-            node = data["invoices"]["edges"][0]["node"]
-            
-            # Transform to a consistent format
-            order = {
-                "id": node["id"],
-                "name": node["name"],
-                "visualId": node["visualId"],
-                "createdAt": node["createdAt"],
-                "status": {
-                    "id": node["status"]["id"],
-                    "name": node["status"]["name"],
-                    "color": node["status"]["color"]
-                },
-                "customer": {
-                    "id": node["contact"]["id"],
-                    "name": node["contact"]["fullName"],
-                    "email": node["contact"]["email"]
-                },
-                "total": node["total"]
-            }
+        ttl = self.cache_ttl("GetOrderByVisualId")
+        results = {}
+        for visual_id, node in zip(visual_ids, nodes):
+            # A mapping is stale if the order is gone or now has another visual ID
+            if node is None or str(node.get("visualId")) != visual_id:
+                results[visual_id] = None
+                continue
+            self.cache.set(
+                self._visual_id_key(visual_id), {"invoices": {"edges": [{"node": node}]}},
+                ttl, settings.printavo_stale_ttl
+            )
+            results[visual_id] = node
+            
+        return results
+        
+    async def _search_visual_ids(self, visual_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Resolve visual IDs through invoice search in a single GraphQL request."""
+        self.visual_ids.stats["search_lookups"] += len(visual_ids)
+        ttl = self.cache_ttl("GetOrderByVisualId")
+        
+        if len(visual_ids) == 1:
+            variables = {"query": visual_ids[0]}
+            data = await self._fetch(
+                self._visual_id_key(visual_ids[0]), ttl,
+                GET_ORDER_BY_VISUAL_ID_QUERY, variables, "GetOrderByVisualId"
+            )
+            results = {visual_ids[0]: _first_node((data or {}).get("invoices"))}
+        else:
+            variables = {f"q{i}": visual_id for i, visual_id in enumerate(visual_ids)}
+            data = await self.execute_graphql(
+                build_visual_id_batch_query(len(visual_ids)), variables, "GetOrdersByVisualIds"
+            )
+            
+            results = {}
+            for i, visual_id in enumerate(visual_ids):
+                connection = (data or {}).get(f"o{i}")
+                # Cache each lookup as if it had been fetched on its own
+                self.cache.set(self._visual_id_key(visual_id), {"invoices": connection}, ttl, settings.printavo_stale_ttl)
+                results[visual_id] = _first_node(connection)
                 
-            return order
+        self.visual_ids.record(results.values())
+        return results
+        
+    async def warm_visual_id_index(self, limit: int = None) -> int:
+        """Record the visual IDs of orders in bulk by paging through the orders connection.
+        
+        Args:
+            limit: Maximum number of orders to page through
             
+        Returns:
+            Number of orders seen
+        """
+        seen = 0
+        try:
+            async for page in self.iter_order_pages(
+                page_size=100,
+                exclude_completed=False,
+                exclude_quotes=False,
+                limit=limit,
+                fields=("id", "visualId")
+            ):
+                seen += len(page.orders)
         except Exception as e:
-            logger.error(f"Error getting order by visual ID: {e}")
-            raise
-
+            logger.error(f"Error warming the visual ID index: {e}")
+            
+        logger.info(f"Visual ID index warmed from {seen} orders ({len(self.visual_ids)} known)")
+        return seen
+        
+    def mirror_is_fresh(self) -> bool:
+        """Whether the order mirror is enabled and recent enough to serve reads."""
+        return self.mirror is not None and self.mirror.is_fresh(settings.printavo_mirror_max_staleness)
+        
+    def _mirror_search(self, query_string: str, first: int) -> Optional[List[Dict]]:
+        """Search the order mirror, or return None if the search must go to Printavo."""
+        if not self.mirror_is_fresh():
+            return None
+            
+        nodes = self.mirror.search(query_string, first)
+        self.mirror.stats["hits" if nodes is not None else "misses"] += 1
+        return nodes
+        
+    def _mirror_fallback(self, query_string: str, first: int, error: Exception) -> Optional[List[Dict]]:
+        """Search the order mirror, however old, in place of a search that failed transiently."""
+        if not isinstance(error, PrintavoAPIError) or not error.transient:
+            return None
+        if self.mirror is None or self.mirror.last_sync is None:
+            return None
+            
+        nodes = self.mirror.search(query_string, first)
+        if nodes is not None:
+            age = time.time() - self.mirror.last_sync
+            logger.warning(f"Serving orders from the order mirror synced {age:.0f}s ago: {error}")
+            record_stale(age, UNAVAILABLE)
+        return nodes
+        
+    def _visual_id_key(self, visual_id: str) -> str:
+        """Cache key of the single GetOrderByVisualId request for a visual ID."""
+        return request_key(GET_ORDER_BY_VISUAL_ID_QUERY, {"query": visual_id}, "GetOrderByVisualId")
+        
 # Create a singleton instance
 printavo_client = PrintavoAPIClient() 
\ No newline at end of file
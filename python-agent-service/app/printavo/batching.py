@@ -0,0 +1,96 @@
+"""
+DataLoader-style request batching for the Printavo API client.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class BatchLoader:
+    """Collect individual loads issued within a short window and resolve them with one batch call.
+    
+    Every call to load() made while a batch is open is queued; when the window
+    elapses (or the batch is full) the batch function is called once with all
+    distinct keys, and each waiting caller receives the value for its key.
+    """
+    
+    def __init__(self,
+                 batch_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+                 window: float = 0.005,
+                 max_batch_size: int = 10):
+        """Initialize the batch loader.
+        
+        Args:
+            batch_fn: Coroutine function mapping a list of keys to a dict of results
+            window: Seconds to wait for more keys before dispatching a batch
+            max_batch_size: Maximum number of distinct keys per batch
+        """
+        self.batch_fn = batch_fn
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[Hashable, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.stats = {
+            "loads": 0,
+            "batches": 0,
+            "keys": 0
+        }
+    
+    async def load(self, key: Hashable) -> Any:
+        """Load the value for a key, batching it with concurrent loads.
+        
+        Args:
+            key: The key to load
+            
+        Returns:
+            The value returned by the batch function for the key, or None if absent
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+        self.stats["loads"] += 1
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._dispatch)
+            
+        return await future
+    
+    def _dispatch(self):
+        """Hand the currently queued keys to the batch function."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(self, batch: Dict[Hashable, List[asyncio.Future]]):
+        """Run the batch function and fan the results out to the waiting callers."""
+        keys = list(batch)
+        self.stats["batches"] += 1
+        self.stats["keys"] += len(keys)
+        logger.debug(f"Dispatching batch of {len(keys)} keys")
+        
+        try:
+            results = await self.batch_fn(keys)
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+            
+        for key, futures in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(results.get(key))
@@ -0,0 +1,156 @@
+"""
+Circuit breaker for requests to the Printavo API.
+"""
+
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Dict
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops sending requests to Printavo while it is failing or slow.
+    
+    The outcomes of the most recent calls are kept in a sliding window; calls
+    that fail without a usable response or take longer than slow_call_seconds
+    count as failures. Once the failure rate reaches failure_rate the circuit
+    opens and requests are rejected for open_seconds. It then half-opens and
+    lets a probe request through: the circuit closes if the probe succeeds
+    and opens again if it fails.
+    """
+    
+    def __init__(self,
+                 enabled: bool = True,
+                 failure_rate: float = 0.5,
+                 slow_call_seconds: float = 10,
+                 window_size: int = 20,
+                 min_calls: int = 5,
+                 open_seconds: float = 30,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the circuit breaker.
+        
+        Args:
+            enabled: Whether requests are ever rejected
+            failure_rate: Fraction of failed calls in the window that opens the circuit
+            slow_call_seconds: Calls taking at least this long count as failures
+            window_size: Number of recent calls considered
+            min_calls: Minimum number of calls in the window before the circuit can open
+            open_seconds: Seconds the circuit stays open before a probe is let through
+            clock: Time source in seconds (mainly useful for testing)
+        """
+        self.enabled = enabled
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self._outcomes = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started_at = None
+        self.stats = {
+            "opened": 0,
+            "rejected": 0,
+            "failures": 0,
+            "slow_calls": 0
+        }
+    
+    @property
+    def state(self) -> str:
+        """The current state: closed, open or half_open."""
+        if self._state == OPEN and self.clock() - self._opened_at >= self.open_seconds:
+            return HALF_OPEN
+        return self._state
+    
+    @property
+    def retry_after(self) -> float:
+        """Seconds until the circuit half-opens (0 unless open)."""
+        if self._state != OPEN:
+            return 0.0
+        return max(self._opened_at + self.open_seconds - self.clock(), 0.0)
+    
+    def allow(self) -> bool:
+        """Check whether a request may be sent now.
+        
+        While half-open a single probe is allowed; another probe is allowed
+        if the previous one hasn't reported back within open_seconds.
+        
+        Returns:
+            True if the request may be sent
+        """
+        state = self.state
+        if not self.enabled or state == CLOSED:
+            return True
+            
+        now = self.clock()
+        if state == HALF_OPEN and (self._probe_started_at is None or now - self._probe_started_at >= self.open_seconds):
+            self._probe_started_at = now
+            return True
+            
+        self.stats["rejected"] += 1
+        return False
+    
+    def record(self, ok: bool, latency: float):
+        """Record the outcome of a request.
+        
+        Args:
+            ok: Whether Printavo returned a usable response
+            latency: Seconds the request took
+        """
+        slow = latency >= self.slow_call_seconds
+        failed = not ok or slow
+        self.stats["failures"] += int(not ok)
+        self.stats["slow_calls"] += int(slow)
+        if not self.enabled:
+            return
+            
+        state = self.state
+        if state == HALF_OPEN:
+            if failed:
+                self._open()
+            else:
+                self._close()
+            return
+        if state == OPEN:
+            # A request sent before the circuit opened
+            return
+            
+        self._outcomes.append(failed)
+        if len(self._outcomes) >= self.min_calls and sum(self._outcomes) >= self.failure_rate * len(self._outcomes):
+            self._open()
+    
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self.clock()
+        self._probe_started_at = None
+        self.stats["opened"] += 1
+        logger.warning(f"Printavo circuit breaker opened for {self.open_seconds}s")
+    
+    def _close(self):
+        self._state = CLOSED
+        self._probe_started_at = None
+        self._outcomes.clear()
+        logger.info("Printavo circuit breaker closed")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get circuit breaker statistics.
+        
+        Returns:
+            State, recent failure rate and counters
+        """
+        failures = sum(self._outcomes)
+        return {
+            "enabled": self.enabled,
+            "state": self.state,
+            "retry_after": round(self.retry_after, 1),
+            "recent_calls": len(self._outcomes),
+            "recent_failure_rate": round(failures / len(self._outcomes), 3) if self._outcomes else 0.0,
+            **self.stats
+        }
@@ -0,0 +1,208 @@
+"""
+TTL + LRU response cache for the Printavo API client.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from app import json_codec
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry(NamedTuple):
+    """A cached value with its expiry times and estimated size."""
+    value: Any
+    expires_at: float
+    size: int
+    stored_at: float
+    stale_until: float
+
+
+def parse_ttls(value: str) -> Dict[str, float]:
+    """Parse per-operation TTLs from a string such as "GetStatuses=3600,SearchOrders=30".
+    
+    Args:
+        value: Comma separated operation=seconds pairs
+        
+    Returns:
+        Mapping of operation name to TTL in seconds
+    """
+    ttls = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        name, seconds = item.split("=", 1)
+        ttls[name.strip()] = float(seconds)
+    return ttls
+
+
+class ResponseCache:
+    """Bounded cache with per-entry TTL and least-recently-used eviction.
+    
+    The cache is bounded both by number of entries and by the total estimated
+    size of the cached values in bytes. Keys are strings so that related
+    entries can be invalidated together by prefix. Entries set with a
+    stale_ttl are kept that much longer past their TTL and can still be
+    read with get_stale().
+    """
+    
+    def __init__(self,
+                 max_entries: int = 1000,
+                 max_bytes: int = 10 * 1024 * 1024,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the response cache.
+        
+        Args:
+            max_entries: Maximum number of cached entries
+            max_bytes: Maximum total estimated size of cached values
+            clock: Time source in seconds (mainly useful for testing)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "stale_hits": 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.expires_at > self.clock()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value.
+        
+        Args:
+            key: The cache key
+            
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+            
+        now = self.clock()
+        if entry.expires_at <= now:
+            if entry.stale_until <= now:
+                self._remove(key)
+                self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return None
+            
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry.value
+    
+    def get_stale(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Get a cached value even if it is past its TTL, within its stale window.
+        
+        Args:
+            key: The cache key
+            
+        Returns:
+            The cached value and its age in seconds, or None if missing
+        """
+        entry = self._entries.get(key)
+        now = self.clock()
+        if entry is None or entry.stale_until <= now:
+            return None
+        self.stats["stale_hits"] += 1
+        return entry.value, now - entry.stored_at
+    
+    def set(self, key: str, value: Any, ttl: float, stale_ttl: float = 0):
+        """Cache a value.
+        
+        Args:
+            key: The cache key
+            value: The value to cache (must be JSON serialisable)
+            ttl: Time to live in seconds; values with a TTL of 0 or less are not cached
+            stale_ttl: Seconds the value remains available to get_stale() after its TTL
+        """
+        if ttl <= 0:
+            return
+            
+        size = len(json_codec.dumps(value))
+        if size > self.max_bytes:
+            logger.debug(f"Not caching {key}: {size} bytes exceeds the cache size limit")
+            return
+            
+        if key in self._entries:
+            self._remove(key)
+            
+        now = self.clock()
+        self._entries[key] = CacheEntry(value, now + ttl, size, now, now + ttl + max(stale_ttl, 0))
+        self._bytes += size
+        
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats["evictions"] += 1
+    
+    def invalidate(self, key: str) -> bool:
+        """Remove a single entry.
+        
+        Args:
+            key: The cache key
+            
+        Returns:
+            True if an entry was removed
+        """
+        if key not in self._entries:
+            return False
+        self._remove(key)
+        self.stats["invalidations"] += 1
+        return True
+    
+    def invalidate_prefix(self, prefix: str) -> int:
+        """Remove every entry whose key starts with prefix.
+        
+        Args:
+            prefix: Key prefix, e.g. an operation name followed by ":"
+            
+        Returns:
+            Number of entries removed
+        """
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            self._remove(key)
+        self.stats["invalidations"] += len(keys)
+        return len(keys)
+    
+    def clear(self):
+        """Remove all entries."""
+        self.stats["invalidations"] += len(self._entries)
+        self._entries.clear()
+        self._bytes = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics.
+        
+        Returns:
+            Counters plus the current number of entries and bytes
+        """
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes
+        }
+    
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
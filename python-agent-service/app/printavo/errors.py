@@ -0,0 +1,68 @@
+"""
+Errors raised by the Printavo API client.
+"""
+
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class PrintavoAPIError(Exception):
+    """Error returned by (or while reaching) the Printavo API."""
+    
+    def __init__(self, message: str, status_code: int = None, retry_after: float = None):
+        """Initialize the error.
+        
+        Args:
+            message: Error message
+            status_code: HTTP status code, or None if no response was received
+            retry_after: Seconds Printavo asked us to wait before retrying, if given
+        """
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+    
+    @property
+    def rate_limited(self) -> bool:
+        """Whether Printavo rejected the request because of its rate limit."""
+        return self.status_code == 429
+    
+    @property
+    def transient(self) -> bool:
+        """Whether the failure may succeed when retried (no response, 429 or 5xx)."""
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+
+class CircuitOpenError(PrintavoAPIError):
+    """Raised instead of sending a request while the circuit breaker is open."""
+    
+    def __init__(self, retry_after: float = None):
+        """Initialize the error.
+        
+        Args:
+            retry_after: Seconds until the circuit breaker lets a probe request through
+        """
+        super().__init__("Printavo is unavailable (circuit breaker open)", retry_after=retry_after)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date.
+    
+    Args:
+        value: The header value
+        
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+        
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+        
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,112 @@
+"""
+Weighted-fair sharing of outbound Printavo requests between tenants.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class WeightedFairQueue:
+    """Hands out a fixed number of concurrent request slots fairly between tenants.
+    
+    Slots are granted immediately while any are free. Once they are all in
+    use, waiting requests are ordered by a virtual finish tag (start-time
+    fair queuing): each request of a tenant with weight w advances that
+    tenant's tag by 1 / w, and a tenant that was idle starts at the current
+    virtual time rather than with banked credit. A busy tenant therefore gets
+    at most its weighted share of slots while others are waiting.
+    """
+    
+    def __init__(self, max_concurrency: int = 20):
+        """Initialize the fair queue.
+        
+        Args:
+            max_concurrency: Number of requests allowed in flight across all tenants
+        """
+        self.max_concurrency = max_concurrency
+        self._active = 0
+        self._virtual_time = 0.0
+        self._finish_tags: Dict[str, float] = {}
+        self._waiting: List[Tuple[float, int, asyncio.Future, str]] = []
+        self._sequence = itertools.count()
+        self.stats: Dict[str, Dict[str, int]] = {}
+    
+    def _account(self, tenant: str, key: str):
+        counters = self.stats.setdefault(tenant, {"granted": 0, "queued": 0})
+        counters[key] += 1
+    
+    async def acquire(self, tenant: str, weight: float = 1.0):
+        """Wait for a request slot.
+        
+        Args:
+            tenant: The tenant sending the request
+            weight: The tenant's share relative to other tenants
+        """
+        if self._active < self.max_concurrency:
+            # Slots are handed straight to waiters on release, so anyone still queued was cancelled
+            self._waiting.clear()
+            self._active += 1
+            self._account(tenant, "granted")
+            return
+            
+        start = max(self._virtual_time, self._finish_tags.get(tenant, 0.0))
+        finish = start + 1.0 / max(weight, 1e-6)
+        self._finish_tags[tenant] = finish
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (finish, next(self._sequence), future, tenant))
+        self._account(tenant, "queued")
+        
+        try:
+            await future
+        except asyncio.CancelledError:
+            # A slot granted just before cancellation must be handed on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+    
+    def release(self):
+        """Return a slot, granting it to the waiting request with the earliest finish tag."""
+        self._active -= 1
+        while self._waiting:
+            finish, _, future, tenant = heapq.heappop(self._waiting)
+            if future.done():
+                continue
+            self._virtual_time = finish
+            self._active += 1
+            self._account(tenant, "granted")
+            future.set_result(None)
+            break
+    
+    @asynccontextmanager
+    async def slot(self, tenant: str, weight: float = 1.0) -> AsyncIterator[None]:
+        """Hold a request slot for the duration of the block.
+        
+        Args:
+            tenant: The tenant sending the request
+            weight: The tenant's share relative to other tenants
+        """
+        await self.acquire(tenant, weight)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fair queue statistics.
+        
+        Returns:
+            Slot usage and per-tenant grant counters
+        """
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "waiting": sum(1 for _, _, future, _ in self._waiting if not future.done()),
+            "tenants": {tenant: dict(counters) for tenant, counters in self.stats.items()}
+        }
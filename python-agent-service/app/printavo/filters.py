@@ -0,0 +1,117 @@
+"""
+Structured order filters for the Printavo orders connection.
+
+Filters Printavo supports as orders arguments (production date window and
+sorting) are sent as GraphQL variables; the rest (customer and minimum
+total) are applied to the returned nodes.
+"""
+
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+# Sort keys accepted by the get_orders tool, mapped to Printavo's OrderSortField
+SORT_FIELDS = {
+    "visual_id": "VISUAL_ID",
+    "customer_name": "CUSTOMER_NAME",
+    "due_date": "CUSTOMER_DUE_AT",
+    "status": "STATUS",
+    "total": "TOTAL"
+}
+
+# Variable declarations and arguments shared by the orders queries
+ORDER_FILTER_PARAMS = (
+    "$sortOn: OrderSortField, $sortDescending: Boolean, "
+    "$inProductionAfter: ISO8601DateTime, $inProductionBefore: ISO8601DateTime"
+)
+ORDER_FILTER_ARGS = (
+    "sortOn: $sortOn, sortDescending: $sortDescending, "
+    "inProductionAfter: $inProductionAfter, inProductionBefore: $inProductionBefore"
+)
+
+
+def _as_datetime(value: str, end_of_day: bool = False) -> str:
+    """Expand a YYYY-MM-DD date to an ISO 8601 date-time; date-times pass through."""
+    if "T" in value:
+        return value
+    return f"{value}T23:59:59Z" if end_of_day else f"{value}T00:00:00Z"
+
+
+class OrderFilters(NamedTuple):
+    """Structured filters and sorting for an orders query."""
+    in_production_after: Optional[str] = None
+    in_production_before: Optional[str] = None
+    customer_id: Optional[str] = None
+    min_total: Optional[float] = None
+    sort_on: Optional[str] = None
+    sort_descending: Optional[bool] = None
+    
+    @classmethod
+    def from_tool_args(cls,
+                       production_after: str = None,
+                       production_before: str = None,
+                       customer_id: str = None,
+                       min_total: float = None,
+                       sort_by: str = None,
+                       sort_descending: bool = None) -> "OrderFilters":
+        """Build filters from the get_orders tool's arguments.
+        
+        Args:
+            production_after: Only orders in production on or after this date
+            production_before: Only orders in production on or before this date
+            customer_id: Only orders for this customer
+            min_total: Only orders with at least this total
+            sort_by: One of SORT_FIELDS
+            sort_descending: Whether to sort in descending order
+            
+        Returns:
+            The order filters
+        """
+        if sort_by and sort_by not in SORT_FIELDS:
+            raise ValueError(f"sort_by must be one of: {', '.join(SORT_FIELDS)}")
+        return cls(
+            in_production_after=_as_datetime(production_after) if production_after else None,
+            in_production_before=_as_datetime(production_before, end_of_day=True) if production_before else None,
+            customer_id=customer_id or None,
+            min_total=min_total,
+            sort_on=SORT_FIELDS[sort_by] if sort_by else None,
+            sort_descending=sort_descending if sort_by else None
+        )
+    
+    @property
+    def empty(self) -> bool:
+        """Whether no filter or sort is set."""
+        return all(value is None for value in self)
+    
+    def variables(self) -> Dict[str, Any]:
+        """GraphQL variables for the filters Printavo applies."""
+        variables = {
+            "sortOn": self.sort_on,
+            "sortDescending": self.sort_descending,
+            "inProductionAfter": self.in_production_after,
+            "inProductionBefore": self.in_production_before
+        }
+        return {name: value for name, value in variables.items() if value is not None}
+    
+    @property
+    def has_local_filters(self) -> bool:
+        """Whether some filters must be applied to the returned nodes."""
+        return self.customer_id is not None or self.min_total is not None
+    
+    def local_fields(self) -> Tuple[str, ...]:
+        """Order fields needed to apply the local filters."""
+        fields = []
+        if self.customer_id is not None:
+            fields.append("customer.id")
+        if self.min_total is not None:
+            fields.append("total")
+        return tuple(fields)
+    
+    def matches(self, node: Dict) -> bool:
+        """Whether a raw order node passes the local filters."""
+        if self.customer_id is not None and (node.get("customer") or {}).get("id") != self.customer_id:
+            return False
+        if self.min_total is not None:
+            try:
+                return float(node.get("total") or 0) >= self.min_total
+            except (TypeError, ValueError):
+                return False
+        return True
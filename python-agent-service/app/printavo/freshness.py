@@ -0,0 +1,70 @@
+"""
+Freshness tracking for data served by the Printavo API client.
+
+The client records whenever it answers with data that is past its TTL;
+callers that want to report this (such as the agent tools) wrap their
+calls in track_freshness().
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+# Why stale data was served
+REVALIDATING = "revalidating"
+UNAVAILABLE = "printavo_unavailable"
+
+
+class Freshness:
+    """Staleness of the data used to answer one call."""
+    
+    def __init__(self):
+        """Initialize as fresh."""
+        self.stale = False
+        self.age = 0.0
+        self.reason: Optional[str] = None
+    
+    def record_stale(self, age: float, reason: str):
+        """Note that data of the given age was served past its TTL.
+        
+        Args:
+            age: Seconds since the data was fetched from Printavo
+            reason: REVALIDATING or UNAVAILABLE
+        """
+        self.stale = True
+        self.age = max(self.age, age)
+        if self.reason != UNAVAILABLE:
+            self.reason = reason
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Freshness metadata for a tool result."""
+        return {
+            "stale": self.stale,
+            "age_seconds": round(self.age),
+            "reason": self.reason
+        }
+
+
+_current: ContextVar[Optional[Freshness]] = ContextVar("printavo_freshness", default=None)
+
+
+@contextmanager
+def track_freshness() -> Iterator[Freshness]:
+    """Track the freshness of the data served within the block.
+    
+    Yields:
+        The Freshness updated by the client while the block runs
+    """
+    freshness = Freshness()
+    token = _current.set(freshness)
+    try:
+        yield freshness
+    finally:
+        _current.reset(token)
+
+
+def record_stale(age: float, reason: str):
+    """Record stale data being served, if freshness is being tracked."""
+    freshness = _current.get()
+    if freshness is not None:
+        freshness.record_stale(age, reason)
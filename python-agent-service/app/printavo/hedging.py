@@ -0,0 +1,185 @@
+"""
+Hedged requests and latency tracking for the Printavo API client.
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds: 5ms growing by 25% per bucket up to ~2 minutes
+LATENCY_BUCKETS: List[float] = [0.005 * 1.25 ** i for i in range(46)]
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with periodic decay.
+    
+    Once max_samples observations have been recorded all counts are halved, so
+    percentiles follow recent latency rather than the whole process lifetime.
+    """
+    
+    def __init__(self, max_samples: int = 1000):
+        """Initialize the histogram.
+        
+        Args:
+            max_samples: Number of observations after which counts decay by half
+        """
+        self.max_samples = max_samples
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+    
+    def record(self, seconds: float):
+        """Record one observed latency."""
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        
+        if self.count >= self.max_samples:
+            self.counts = [count // 2 for count in self.counts]
+            self.count = sum(self.counts)
+    
+    def percentile(self, p: float) -> Optional[float]:
+        """Estimate a latency percentile.
+        
+        Args:
+            p: Percentile as a fraction, e.g. 0.95
+            
+        Returns:
+            Upper bound of the bucket containing the percentile, or None if empty
+        """
+        if self.count == 0:
+            return None
+            
+        target = p * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return LATENCY_BUCKETS[min(i, len(LATENCY_BUCKETS) - 1)]
+        return LATENCY_BUCKETS[-1]
+
+
+class Hedger:
+    """Send a backup copy of slow requests and use whichever response arrives first.
+    
+    A request is hedged once it has taken longer than the configured latency
+    percentile for its operation. Hedges are limited to a fraction of all
+    requests (the budget) and are only sent when the caller allows it, e.g.
+    when there is spare rate limit capacity.
+    """
+    
+    def __init__(self,
+                 enabled: bool = False,
+                 percentile: float = 0.95,
+                 budget: float = 0.05,
+                 min_samples: int = 20):
+        """Initialize the hedger.
+        
+        Args:
+            enabled: Whether to send hedged requests (latency is tracked either way)
+            percentile: Latency percentile after which a request is hedged
+            budget: Maximum fraction of requests that may be hedged
+            min_samples: Observations needed for an operation before hedging it
+        """
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.stats = {
+            "requests": 0,
+            "hedged": 0,
+            "hedge_wins": 0
+        }
+    
+    def record(self, operation: str, seconds: float):
+        """Record the latency of a request for an operation."""
+        histogram = self.histograms.get(operation)
+        if histogram is None:
+            histogram = self.histograms[operation] = LatencyHistogram()
+        histogram.record(seconds)
+    
+    def threshold(self, operation: str) -> Optional[float]:
+        """Delay in seconds after which a request for the operation is hedged, if known."""
+        histogram = self.histograms.get(operation)
+        if histogram is None or histogram.count < self.min_samples:
+            return None
+        return histogram.percentile(self.percentile)
+    
+    async def run(self,
+                  operation: str,
+                  fn: Callable[[], Awaitable[Any]],
+                  allow_hedge: Callable[[], bool] = None) -> Any:
+        """Run a request, hedging it if it is slower than usual.
+        
+        Args:
+            operation: Operation name used to track latency
+            fn: Coroutine function sending the request; called again for the hedge
+            allow_hedge: Called before hedging; returning False skips the hedge
+            
+        Returns:
+            The first successful result
+        """
+        self.stats["requests"] += 1
+        start = time.monotonic()
+        threshold = self.threshold(operation) if self.enabled else None
+        
+        if threshold is None:
+            result = await fn()
+            self.record(operation, time.monotonic() - start)
+            return result
+            
+        primary = asyncio.ensure_future(fn())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=threshold)
+            
+            if not done and self._within_budget() and (allow_hedge is None or allow_hedge()):
+                self.stats["hedged"] += 1
+                logger.debug(f"Hedging {operation} after {threshold:.3f}s")
+                tasks.add(asyncio.ensure_future(fn()))
+                
+            while True:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats["hedge_wins"] += 1
+                        self.record(operation, time.monotonic() - start)
+                        return task.result()
+                        
+                if not pending:
+                    # Every attempt failed; surface the primary's error
+                    return primary.result()
+                tasks = pending
+        finally:
+            # Cancel the losing request
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    def _within_budget(self) -> bool:
+        return self.stats["hedged"] < self.budget * self.stats["requests"]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hedging statistics.
+        
+        Returns:
+            Hedge counters and per-operation latency percentiles in seconds
+        """
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "latency": {
+                operation: {
+                    "count": histogram.count,
+                    "p50": histogram.percentile(0.5),
+                    "p95": histogram.percentile(0.95),
+                    "p99": histogram.percentile(0.99)
+                }
+                for operation, histogram in self.histograms.items()
+            }
+        }
@@ -0,0 +1,187 @@
+"""
+Persistent visual ID to order ID index for the Printavo API client.
+
+Resolving a visual ID through Printavo's search is slow, so the client
+records the order ID of every order it sees and looks orders up by ID
+whenever the mapping is known.
+
+The index lives in memory. When given a database path, it is loaded from
+SQLite by open() (at client startup) and changes are written back in
+batches on a worker thread, so recording never blocks the event loop.
+"""
+
+import asyncio
+import logging
+import sqlite3
+from typing import Any, Dict, Iterable, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS visual_ids (
+    visual_id TEXT PRIMARY KEY,
+    order_id TEXT NOT NULL
+);
+"""
+
+# In-memory only; nothing is persisted
+MEMORY = ":memory:"
+
+
+class VisualIdIndex:
+    """Visual ID to order ID map kept in memory and optionally persisted to SQLite."""
+    
+    def __init__(self, path: str = MEMORY, flush_delay: float = 1.0):
+        """Initialize an empty index; persisted mappings are loaded by open().
+        
+        Args:
+            path: SQLite database path (":memory:" for a non-persistent index)
+            flush_delay: Seconds changes are collected before being written together
+        """
+        self.path = path
+        self.flush_delay = flush_delay
+        self._db: Optional[sqlite3.Connection] = None
+        self._ids: Dict[str, str] = {}
+        # Changes not yet written: order ID, or None for a removed mapping
+        self._pending: Dict[str, Optional[str]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+        self.stats = {
+            "recorded": 0,
+            "invalidated": 0,
+            "by_id_lookups": 0,
+            "search_lookups": 0,
+            "flushes": 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def __contains__(self, visual_id: str) -> bool:
+        return visual_id in self._ids
+    
+    @property
+    def persistent(self) -> bool:
+        """Whether the index is backed by a database file."""
+        return self.path != MEMORY
+    
+    def _load(self) -> Dict[str, str]:
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        return dict(self._db.execute("SELECT visual_id, order_id FROM visual_ids"))
+    
+    async def open(self):
+        """Open the database and load the persisted mappings.
+        
+        Mappings recorded before opening take precedence and are written
+        with the next flush. Does nothing for an in-memory or already open
+        index.
+        """
+        if not self.persistent or self._db is not None:
+            return
+        loaded = await asyncio.to_thread(self._load)
+        self._ids = {**loaded, **self._ids}
+        for visual_id in list(self._pending):
+            if self._pending[visual_id] is None:
+                self._ids.pop(visual_id, None)
+        logger.info(f"Loaded {len(loaded)} visual IDs from {self.path}")
+        self._schedule_flush()
+    
+    def get(self, visual_id: str) -> Optional[str]:
+        """Get the order ID for a visual ID, or None if unknown."""
+        return self._ids.get(visual_id)
+    
+    def record(self, nodes: Iterable[Optional[Dict]]) -> int:
+        """Record the visual ID of every node that has both an id and a visualId.
+        
+        Args:
+            nodes: Raw order or invoice nodes
+            
+        Returns:
+            Number of new or changed mappings
+        """
+        changed = 0
+        for node in nodes:
+            if not node or not node.get("id") or not node.get("visualId"):
+                continue
+            visual_id = str(node["visualId"])
+            if self._ids.get(visual_id) != node["id"]:
+                self._ids[visual_id] = self._pending[visual_id] = node["id"]
+                changed += 1
+                
+        if changed:
+            self.stats["recorded"] += changed
+            self._schedule_flush()
+        return changed
+    
+    def invalidate(self, visual_id: str):
+        """Forget a mapping that turned out to be stale."""
+        if self._ids.pop(visual_id, None) is not None:
+            self._pending[visual_id] = None
+            self.stats["invalidated"] += 1
+            self._schedule_flush()
+    
+    def _schedule_flush(self):
+        """Write pending changes shortly, if the database is open."""
+        if not self.persistent:
+            self._pending.clear()
+            return
+        if self._db is None or not self._pending:
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+    
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        # Once writing, finish even if cancelled; close() waits for the write
+        await asyncio.shield(self.flush())
+    
+    def _write(self, changes: Dict[str, Optional[str]]):
+        upserts = [(visual_id, order_id) for visual_id, order_id in changes.items() if order_id is not None]
+        deletes = [(visual_id,) for visual_id, order_id in changes.items() if order_id is None]
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO visual_ids (visual_id, order_id) VALUES (?, ?)", upserts)
+            self._db.executemany("DELETE FROM visual_ids WHERE visual_id = ?", deletes)
+    
+    async def flush(self):
+        """Write the pending changes to the database now."""
+        async with self._write_lock:
+            if self._db is None or not self._pending:
+                return
+            changes, self._pending = self._pending, {}
+            try:
+                await asyncio.to_thread(self._write, changes)
+            except Exception as e:
+                logger.error(f"Failed to persist {len(changes)} visual IDs: {e}")
+                # Keep the changes for the next flush unless they were superseded
+                self._pending = {**changes, **self._pending}
+                return
+            self.stats["flushes"] += 1
+    
+    async def close(self):
+        """Write any pending changes and close the database connection."""
+        task, self._flush_task = self._flush_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._db is not None:
+            await self.flush()
+            async with self._write_lock:
+                self._db.close()
+                self._db = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics.
+        
+        Returns:
+            Size, update counters and the number of changes not yet persisted
+        """
+        return {
+            "size": len(self._ids),
+            "pending_writes": len(self._pending),
+            **self.stats
+        }
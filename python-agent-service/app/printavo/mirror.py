@@ -0,0 +1,439 @@
+"""
+Local SQLite mirror of Printavo orders.
+
+The mirror is backfilled by paginating the orders connection and then kept
+up to date incrementally using an updatedAt watermark, so that most order
+reads can be served locally instead of going to Printavo.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from app import json_codec
+from app.printavo.search import OrderSearchIndex
+from app.printavo.selection import ORDER_FIELDS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Fields stored for each mirrored order, enough to serve any projection
+MIRROR_ORDER_FIELDS = ORDER_FIELDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT PRIMARY KEY,
+    visual_id TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    generation INTEGER NOT NULL,
+    node TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_visual_id ON orders (visual_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def as_invoice_node(node: Dict) -> Dict:
+    """Reshape a mirrored order node like an invoice node from a visual ID lookup.
+    
+    Args:
+        node: An order node from the orders connection
+        
+    Returns:
+        The node with the customer exposed as contact.fullName
+    """
+    invoice = {key: value for key, value in node.items() if key != "customer"}
+    customer = node.get("customer")
+    if customer is not None:
+        invoice["contact"] = {
+            "id": customer.get("id"),
+            "fullName": customer.get("name"),
+            "email": customer.get("email")
+        }
+    return invoice
+
+
+def _as_float(value: Optional[str]) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+class OrderMirror:
+    """SQLite-backed copy of the orders connection.
+    
+    Reads are answered from an in-memory search index over the mirrored
+    orders; SQLite keeps the mirror across restarts. A full sync pages
+    through every order and drops orders that no longer exist. Incremental
+    syncs walk orders by most recently updated and stop at the updatedAt
+    watermark of the previous sync.
+    
+    Database work runs on a worker thread and each sync is committed once,
+    so syncing never blocks the event loop. Sync progress (watermark and
+    sync times) is loaded once and then kept in memory.
+    """
+    
+    def __init__(self,
+                 path: str = ":memory:",
+                 page_size: int = 100,
+                 sort_on: str = "UPDATED_AT",
+                 full_sync_interval: float = 86400,
+                 clock: Callable[[], float] = time.time):
+        """Initialize the order mirror.
+        
+        Args:
+            path: SQLite database path (":memory:" for a non-persistent mirror)
+            page_size: Number of orders requested per page while syncing
+            sort_on: Printavo OrderSortField ordering orders by last update
+            full_sync_interval: Seconds between full syncs
+            clock: Wall-clock time source in seconds (mainly useful for testing)
+        """
+        self.path = path
+        self.page_size = page_size
+        self.sort_on = sort_on
+        self.full_sync_interval = full_sync_interval
+        self._clock = clock
+        # Serializes syncs and every other use of the database connection
+        self._lock = asyncio.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self.index = self._read_index()
+        
+        meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        # The latest updatedAt value seen by a sync
+        self.watermark: Optional[str] = meta.get("watermark")
+        # Wall-clock times of the last completed sync and full sync
+        self.last_sync: Optional[float] = _as_float(meta.get("last_sync"))
+        self.last_full_sync: Optional[float] = _as_float(meta.get("last_full_sync"))
+        self.generation = int(meta.get("generation") or 0)
+        # Whether the last sync saw orders in updatedAt order; incremental
+        # syncs rely on it to stop at the watermark
+        self.sorted = True
+        
+        # Orders removed from the index but not yet from the database
+        self._pending_deletes: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.stats = {
+            "syncs": 0,
+            "full_syncs": 0,
+            "sync_errors": 0,
+            "unsorted_syncs": 0,
+            "hits": 0,
+            "misses": 0
+        }
+    
+    async def close(self):
+        """Write pending deletes and close the database connection."""
+        task, self._flush_task = self._flush_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.flush()
+        async with self._lock:
+            self._db.close()
+    
+    def _read_index(self) -> OrderSearchIndex:
+        """Build a search index over the orders in the database."""
+        return OrderSearchIndex(
+            json_codec.loads(row[0]) for row in self._db.execute("SELECT node FROM orders")
+        )
+    
+    async def _run(self, func: Callable, *args) -> Any:
+        """Run a database call on a worker thread.
+        
+        The call is finished even if the caller is cancelled, so the
+        connection is never used by two threads at once.
+        """
+        call = asyncio.ensure_future(asyncio.to_thread(func, *args))
+        try:
+            return await asyncio.shield(call)
+        except asyncio.CancelledError:
+            await asyncio.wait([call])
+            raise
+    
+    def is_fresh(self, max_staleness: float) -> bool:
+        """Whether the mirror was synced within max_staleness seconds."""
+        return self.last_sync is not None and self._clock() - self.last_sync <= max_staleness
+    
+    def needs_full_sync(self) -> bool:
+        """Whether the next sync should be a full sync."""
+        return (
+            not self.sorted
+            or self.last_full_sync is None
+            or self._clock() - self.last_full_sync >= self.full_sync_interval
+        )
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def _write_orders(self, nodes: List[Dict], generation: int):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO orders "
+            "(id, visual_id, created_at, updated_at, generation, node) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    node["id"],
+                    node.get("visualId"),
+                    node.get("createdAt"),
+                    node.get("updatedAt"),
+                    generation,
+                    json_codec.dumps_str(node)
+                )
+                for node in nodes
+            ]
+        )
+    
+    async def upsert(self, nodes: Iterable[Dict], generation: int = 0) -> int:
+        """Insert or replace order nodes.
+        
+        The rows are committed by the sync writing them.
+        
+        Args:
+            nodes: Raw order nodes requested with MIRROR_ORDER_FIELDS
+            generation: Sync generation the nodes were seen in
+            
+        Returns:
+            Number of nodes written
+        """
+        nodes = [node for node in nodes if node["id"] not in self._pending_deletes]
+        for node in nodes:
+            self.index.add(node)
+        await self._run(self._write_orders, nodes, generation)
+        return len(nodes)
+    
+    def delete(self, order_ids: Iterable[str]) -> int:
+        """Remove orders from the mirror.
+        
+        Orders leave the index at once; the database rows are deleted
+        shortly after on a worker thread, or with the sync in progress.
+        
+        Args:
+            order_ids: IDs of the orders to remove
+            
+        Returns:
+            Number of orders removed
+        """
+        order_ids = [order_id for order_id in order_ids if order_id in self.index]
+        for order_id in order_ids:
+            self.index.remove(order_id)
+        if order_ids:
+            self._pending_deletes.update(order_ids)
+            self._schedule_flush()
+        return len(order_ids)
+    
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+    
+    def _write_commit(self, meta: Dict[str, Any], deletes: List[str], generation: Optional[int]) -> List[str]:
+        removed = []
+        if generation is not None:
+            # Orders not seen during a full sync no longer exist
+            removed = [row[0] for row in self._db.execute("SELECT id FROM orders WHERE generation < ?", (generation,))]
+            self._db.execute("DELETE FROM orders WHERE generation < ?", (generation,))
+        self._db.executemany("DELETE FROM orders WHERE id = ?", [(order_id,) for order_id in deletes])
+        self._db.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            [(key, str(value)) for key, value in meta.items()]
+        )
+        self._db.commit()
+        return removed
+    
+    async def _commit(self, meta: Dict[str, Any], generation: Optional[int] = None) -> List[str]:
+        """Commit pending deletes and meta values with any uncommitted rows.
+        
+        Args:
+            meta: Meta values to store
+            generation: Generation of a finished full sync; rows from older
+                generations are deleted
+                
+        Returns:
+            IDs of the orders deleted for being older than generation
+        """
+        deletes, self._pending_deletes = self._pending_deletes, set()
+        try:
+            return await self._run(self._write_commit, meta, sorted(deletes), generation)
+        except BaseException:
+            self._pending_deletes |= deletes
+            raise
+    
+    def _write_rollback(self) -> OrderSearchIndex:
+        self._db.rollback()
+        return self._read_index()
+    
+    async def flush(self):
+        """Write pending deletes to the database now."""
+        async with self._lock:
+            if self._pending_deletes:
+                await self._commit({})
+    
+    def get_by_visual_id(self, visual_id: str) -> Optional[Dict]:
+        """Get a mirrored order node by visual ID.
+        
+        Args:
+            visual_id: The visual ID of the order
+            
+        Returns:
+            The raw order node, or None if it isn't mirrored
+        """
+        return self.index.get_by_visual_id(visual_id)
+    
+    def search(self, query_string: str, first: int) -> Optional[List[Dict]]:
+        """Search mirrored orders with a Printavo search string.
+        
+        Args:
+            query_string: The full Printavo search string
+            first: Maximum number of orders to return
+            
+        Returns:
+            The best matching raw order nodes, or None if the search string
+            uses filters the mirror can't evaluate (see search.parse_query)
+        """
+        return self.index.search(query_string, first)
+    
+    async def sync(self, client, full: Optional[bool] = None) -> int:
+        """Bring the mirror up to date with Printavo.
+        
+        Unless told which, runs a full sync when none has completed within
+        full_sync_interval, otherwise fetches only orders updated since the
+        watermark. An
+        incremental sync that finds orders out of updatedAt order (sort_on
+        isn't sorting by last update) is followed by a full sync, and syncs
+        stay full until orders come back sorted.
+        
+        Args:
+            client: The PrintavoAPIClient to read orders with
+            full: Whether to run a full or an incremental sync (None to decide
+                by full_sync_interval)
+                
+        Returns:
+            Number of orders written
+        """
+        async with self._lock:
+            if full is None:
+                full = self.needs_full_sync()
+            written = await self._sync(client, full)
+            if not full and not self.sorted:
+                written += await self._sync(client, full=True)
+            return written
+    
+    async def _sync(self, client, full: bool) -> int:
+        """Run one full or incremental sync; the caller holds the lock."""
+        watermark = None if full else self.watermark
+        generation = self.generation + (1 if full else 0)
+        latest = self.watermark or ""
+        started = self._clock()
+        written = 0
+        ordered = True
+        previous = None
+        
+        pages = client.iter_order_pages(
+            query="",
+            page_size=self.page_size,
+            exclude_completed=False,
+            exclude_quotes=False,
+            fields=MIRROR_ORDER_FIELDS,
+            transform=lambda node: node,
+            sort_on=self.sort_on,
+            sort_descending=True
+        )
+        try:
+            async for page in pages:
+                updated = [node["updatedAt"] for node in page.orders if node.get("updatedAt")]
+                if previous is not None:
+                    updated.insert(0, previous)
+                if any(later > earlier for earlier, later in zip(updated, updated[1:])):
+                    if ordered:
+                        logger.warning(
+                            f"Orders sorted on {self.sort_on} aren't in descending updatedAt order; "
+                            "the order mirror will run full syncs until they are"
+                        )
+                    ordered = False
+                previous = updated[-1] if updated else previous
+                
+                nodes = page.orders
+                if watermark is not None:
+                    # Orders arrive most recently updated first; stop at the watermark
+                    nodes = [node for node in nodes if (node.get("updatedAt") or "") >= watermark]
+                    
+                written += await self.upsert(nodes, generation)
+                latest = max([latest] + [node.get("updatedAt") or "" for node in nodes])
+                
+                if len(nodes) < len(page.orders) or (watermark is not None and not ordered):
+                    break
+                    
+            meta = {}
+            if full:
+                meta.update(generation=generation, last_full_sync=started)
+            if full or ordered:
+                # An unsorted incremental sync may have missed orders; keep the
+                # rows it wrote but not its progress
+                meta["last_sync"] = started
+                if latest:
+                    meta["watermark"] = latest
+            removed = await self._commit(meta, generation if full else None)
+        except BaseException as e:
+            if not isinstance(e, asyncio.CancelledError):
+                self.stats["sync_errors"] += 1
+            # Drop this sync's uncommitted rows, even when it was cancelled
+            self.index = await self._run(self._write_rollback)
+            for order_id in self._pending_deletes:
+                self.index.remove(order_id)
+            raise
+        finally:
+            await pages.aclose()
+            
+        for order_id in removed:
+            self.index.remove(order_id)
+        if full:
+            self.generation = generation
+            self.last_full_sync = started
+            self.stats["full_syncs"] += 1
+        if "last_sync" in meta:
+            self.last_sync = started
+            self.watermark = meta.get("watermark", self.watermark)
+        if not ordered:
+            self.stats["unsorted_syncs"] += 1
+        self.sorted = ordered
+        self.stats["syncs"] += 1
+        
+        logger.info(f"Synced {written} orders into the order mirror ({'full' if full else 'incremental'})")
+        return written
+    
+    async def run(self, client, interval: float):
+        """Sync the mirror every interval seconds until cancelled.
+        
+        Args:
+            client: The PrintavoAPIClient to read orders with
+            interval: Seconds between syncs
+        """
+        while True:
+            try:
+                await self.sync(client)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error syncing the order mirror: {e}")
+            await asyncio.sleep(interval)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get mirror statistics.
+        
+        Returns:
+            Size, sync progress and hit/miss counters
+        """
+        return {
+            "orders": len(self),
+            "watermark": self.watermark,
+            "last_sync": self.last_sync,
+            "last_full_sync": self.last_full_sync,
+            "sorted": self.sorted,
+            "pending_deletes": len(self._pending_deletes),
+            **self.stats
+        }
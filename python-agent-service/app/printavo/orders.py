@@ -0,0 +1,93 @@
+"""
+Compact order records shared by the agent tools.
+"""
+
+from typing import Any, Dict, Optional
+
+
+def _total(value: Any) -> float:
+    return float(value) if value else 0.0
+
+
+class OrderRecord:
+    """Flat order record built in a single pass from a raw GraphQL node.
+    
+    Records are built directly from the response nodes (no intermediate
+    nested dicts) and use __slots__ to keep per-order overhead small on
+    large pages.
+    """
+    
+    __slots__ = ("id", "name", "visual_id", "date", "status", "customer", "total", "customer_id")
+    
+    def __init__(self,
+                 id: str,
+                 name: Optional[str],
+                 visual_id: Optional[str],
+                 date: Optional[str],
+                 status: Optional[str],
+                 customer: Optional[str],
+                 total: float,
+                 customer_id: Optional[str] = None):
+        self.id = id
+        self.name = name
+        self.visual_id = visual_id
+        self.date = date
+        self.status = status
+        self.customer = customer
+        self.total = total
+        self.customer_id = customer_id
+    
+    @classmethod
+    def from_order_node(cls, node: Dict) -> "OrderRecord":
+        """Build a record from an orders connection node (requested with AGENT_ORDER_FIELDS)."""
+        status = node.get("status") or {}
+        customer = node.get("customer") or {}
+        return cls(
+            node["id"],
+            node.get("name"),
+            node.get("visualId"),
+            node.get("createdAt"),
+            status.get("name"),
+            customer.get("name"),
+            _total(node.get("total")),
+            customer.get("id")
+        )
+    
+    @classmethod
+    def from_invoice_node(cls, node: Dict) -> "OrderRecord":
+        """Build a record from an invoice node returned by a visual ID lookup.
+        
+        Invoices expose a contact rather than a customer, so customer_id is left unset.
+        """
+        status = node.get("status") or {}
+        contact = node.get("contact") or {}
+        return cls(
+            node["id"],
+            node.get("name"),
+            node.get("visualId"),
+            node.get("createdAt"),
+            status.get("name"),
+            contact.get("fullName"),
+            _total(node.get("total"))
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the order format returned by the agent tools (see app.api.models.Order)."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "visualId": self.visual_id,
+            "date": self.date,
+            "status": self.status,
+            "customer": self.customer,
+            "total": self.total,
+            "customerId": self.customer_id
+        }
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, OrderRecord):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+    
+    def __repr__(self) -> str:
+        return f"OrderRecord(id={self.id!r}, visual_id={self.visual_id!r}, status={self.status!r})"
@@ -0,0 +1,189 @@
+"""
+Subsumption-aware cache of order search results.
+
+Search strings are parsed into a canonical form (terms plus status filters)
+so that a cached result for a broader search can answer a narrower one,
+e.g. "acme" answers "acme -status:completed", by filtering locally.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from app.printavo.search import SearchQuery, parse_query, tokenize
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class CanonicalSearch(NamedTuple):
+    """A search string in canonical form."""
+    terms: Tuple[str, ...]
+    statuses: FrozenSet[str]
+    excluded_statuses: FrozenSet[str]
+
+
+class CachedSearch(NamedTuple):
+    """Raw order nodes returned for a search, in Printavo's order."""
+    search: CanonicalSearch
+    fields: FrozenSet[str]
+    first: int
+    nodes: List[Dict]
+    expires_at: float
+    
+    @property
+    def complete(self) -> bool:
+        """Whether the result holds every order matching the search."""
+        return len(self.nodes) < self.first
+
+
+def canonicalize(query_string: str) -> Optional[CanonicalSearch]:
+    """Parse a search string into canonical form.
+    
+    Args:
+        query_string: The full Printavo search string
+        
+    Returns:
+        The canonical search, or None if it uses filters that can't be
+        evaluated locally
+    """
+    query: Optional[SearchQuery] = parse_query(query_string)
+    if query is None:
+        return None
+    return CanonicalSearch(
+        terms=tuple(sorted(set(query.terms))),
+        statuses=frozenset(query.statuses),
+        excluded_statuses=frozenset(query.excluded_statuses)
+    )
+
+
+def subsumes(broad: CanonicalSearch, narrow: CanonicalSearch) -> bool:
+    """Whether every order matching narrow also matches broad."""
+    if broad.terms != narrow.terms:
+        return False
+    if broad.statuses and not (narrow.statuses and narrow.statuses <= broad.statuses):
+        return False
+    return broad.excluded_statuses <= narrow.excluded_statuses
+
+
+def _status_allowed(node: Dict, search: CanonicalSearch) -> bool:
+    status = " ".join(tokenize((node.get("status") or {}).get("name")))
+    if search.statuses and status not in search.statuses:
+        return False
+    return status not in search.excluded_statuses
+
+
+class SearchResultCache:
+    """Caches order search results and answers subsumed searches from them.
+    
+    Results are kept in Printavo's order, so filtering the first N results of
+    a broader search yields a prefix of the narrower search's results. That
+    prefix answers the narrower search when it is long enough or when the
+    broader result was complete.
+    """
+    
+    def __init__(self, max_entries: int = 256, clock: Callable[[], float] = time.monotonic):
+        """Initialize the search result cache.
+        
+        Args:
+            max_entries: Maximum number of cached results
+            clock: Time source in seconds (mainly useful for testing)
+        """
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[Tuple, CachedSearch]" = OrderedDict()
+        self.stats = {
+            "exact_hits": 0,
+            "subsumed_hits": 0,
+            "misses": 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, query_string: str, first: int, fields: Tuple[str, ...]) -> Optional[List[Dict]]:
+        """Answer a search from the cache.
+        
+        Args:
+            query_string: The full Printavo search string
+            first: Number of orders requested
+            fields: Order fields the results must include
+            
+        Returns:
+            Raw order nodes, or None if no cached result can answer the search
+        """
+        search = canonicalize(query_string)
+        if search is None:
+            return None
+            
+        now = self.clock()
+        needed = set(fields)
+        for key, entry in list(self._entries.items()):
+            if entry.expires_at <= now:
+                del self._entries[key]
+                continue
+            if not needed <= entry.fields or not subsumes(entry.search, search):
+                continue
+                
+            exact = entry.search == search
+            if exact:
+                nodes = entry.nodes
+            elif "status.name" in entry.fields:
+                nodes = [node for node in entry.nodes if _status_allowed(node, search)]
+            else:
+                continue
+                
+            if len(nodes) >= first or entry.complete:
+                self._entries.move_to_end(key)
+                self.stats["exact_hits" if exact else "subsumed_hits"] += 1
+                return nodes[:first]
+                
+        self.stats["misses"] += 1
+        return None
+    
+    def set(self, query_string: str, first: int, fields: Tuple[str, ...], nodes: List[Dict], ttl: float):
+        """Cache the raw order nodes returned for a search.
+        
+        Args:
+            query_string: The full Printavo search string
+            first: Number of orders that were requested
+            fields: Order fields the nodes were requested with
+            nodes: The raw order nodes, in Printavo's order
+            ttl: Time to live in seconds; nothing is cached if ttl <= 0
+        """
+        search = canonicalize(query_string)
+        if search is None or ttl <= 0:
+            return
+            
+        key = (search, frozenset(fields))
+        existing = self._entries.get(key)
+        if existing is not None and existing.first > first and existing.expires_at > self.clock():
+            return
+            
+        self._entries[key] = CachedSearch(search, frozenset(fields), first, list(nodes), self.clock() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> int:
+        """Remove every cached result.
+        
+        Returns:
+            Number of results removed
+        """
+        count = len(self._entries)
+        self._entries.clear()
+        return count
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics.
+        
+        Returns:
+            Entry count and hit/miss counters
+        """
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            **self.stats
+        }
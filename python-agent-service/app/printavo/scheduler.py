@@ -0,0 +1,254 @@
+"""
+Rate-limit-aware request scheduling for the Printavo API client.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from app.printavo.errors import PrintavoAPIError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket limiting the rate of requests sent to Printavo."""
+    
+    def __init__(self, capacity: float, refill_rate: float, clock: Callable[[], float] = time.monotonic):
+        """Initialize the token bucket.
+        
+        Args:
+            capacity: Maximum number of tokens (burst size)
+            refill_rate: Tokens added per second
+            clock: Time source in seconds
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.clock = clock
+        self.tokens = capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_rate)
+        self._updated = now
+    
+    async def acquire(self) -> float:
+        """Take one token, waiting until one is available.
+        
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = self.clock()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    wait = (1 - self.tokens) / self.refill_rate
+                await asyncio.sleep(wait)
+                waited += wait
+    
+    def try_acquire(self) -> bool:
+        """Take one token only if one is available right now.
+        
+        Returns:
+            True if a token was taken
+        """
+        now = self.clock()
+        self._refill(now)
+        if self._paused_until > now or self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+    
+    def pause(self, seconds: float):
+        """Stop handing out tokens for the given number of seconds and drain the bucket."""
+        now = self.clock()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self.tokens = 0
+        self._updated = now
+
+
+class AdaptiveConcurrencyLimiter:
+    """Concurrency limit adjusted with additive-increase / multiplicative-decrease (AIMD).
+    
+    Each request completing within the latency target raises the limit by
+    1/limit (roughly +1 per round of requests); a rate-limited, failed or slow
+    request multiplies it by the decrease factor.
+    """
+    
+    def __init__(self,
+                 initial_limit: int,
+                 min_limit: int,
+                 max_limit: int,
+                 latency_target: float,
+                 decrease_factor: float = 0.5):
+        """Initialize the limiter.
+        
+        Args:
+            initial_limit: Starting concurrency limit
+            min_limit: Lowest allowed limit (at least 1)
+            max_limit: Highest allowed limit
+            latency_target: Latency in seconds above which the limit is decreased
+            decrease_factor: Multiplier applied to the limit on overload
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+    
+    async def acquire(self):
+        """Wait for a free concurrency slot."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+    
+    async def release(self, latency: float = None, overloaded: bool = False):
+        """Free a slot and adjust the limit.
+        
+        Args:
+            latency: Duration of the request in seconds, if it completed
+            overloaded: Whether the request signalled upstream overload
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if overloaded or (latency is not None and latency > self.latency_target):
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            elif latency is not None:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class RequestScheduler:
+    """Schedule Printavo requests within its rate limit, retrying transient failures.
+    
+    Requests wait for a concurrency slot and a rate-limit token before being
+    sent. Rate-limited responses pause the token bucket (for Retry-After if
+    given) and are retried; other transient failures (no response or 5xx) are
+    retried only for idempotent requests. Retries use exponential backoff with
+    full jitter.
+    """
+    
+    def __init__(self,
+                 rate_limit_requests: int = 10,
+                 rate_limit_period: float = 5.0,
+                 max_retries: int = 3,
+                 retry_base_delay: float = 0.5,
+                 retry_max_delay: float = 10.0,
+                 min_concurrency: int = 1,
+                 max_concurrency: int = 10,
+                 latency_target: float = 2.0):
+        """Initialize the scheduler.
+        
+        Args:
+            rate_limit_requests: Requests allowed per rate limit period
+            rate_limit_period: Rate limit period in seconds
+            max_retries: Maximum retries per request
+            retry_base_delay: Base delay in seconds for exponential backoff
+            retry_max_delay: Maximum backoff delay in seconds
+            min_concurrency: Lowest adaptive concurrency limit
+            max_concurrency: Highest adaptive concurrency limit
+            latency_target: Latency in seconds above which concurrency is reduced
+        """
+        self.rate_limit_period = rate_limit_period
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.bucket = TokenBucket(rate_limit_requests, rate_limit_requests / rate_limit_period)
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=max_concurrency,
+            min_limit=min_concurrency,
+            max_limit=max_concurrency,
+            latency_target=latency_target
+        )
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "throttle_wait": 0.0
+        }
+    
+    async def run(self, fn: Callable[[], Awaitable[Any]], idempotent: bool = True) -> Any:
+        """Run a request under the rate limit and concurrency limit, retrying as allowed.
+        
+        Args:
+            fn: Coroutine function sending the request
+            idempotent: Whether the request may be retried after a 5xx or lost response
+            
+        Returns:
+            The result of fn
+        """
+        attempt = 0
+        while True:
+            await self.limiter.acquire()
+            try:
+                self.stats["throttle_wait"] += await self.bucket.acquire()
+            except BaseException:
+                # Cancelled while waiting for a token: give the slot back
+                await self.limiter.release()
+                raise
+            self.stats["requests"] += 1
+            start = time.monotonic()
+            
+            try:
+                result = await fn()
+            except PrintavoAPIError as e:
+                await self.limiter.release(overloaded=e.transient)
+                if e.rate_limited:
+                    self.stats["rate_limited"] += 1
+                    self.bucket.pause(e.retry_after if e.retry_after is not None else self.rate_limit_period)
+                    
+                if not self._should_retry(e, idempotent, attempt):
+                    raise
+                    
+                delay = self._backoff(attempt, e.retry_after)
+                attempt += 1
+                self.stats["retries"] += 1
+                logger.warning(f"Retrying Printavo request in {delay:.2f}s (attempt {attempt}): {e}")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                await self.limiter.release()
+                raise
+                
+            await self.limiter.release(latency=time.monotonic() - start)
+            return result
+    
+    def _should_retry(self, error: PrintavoAPIError, idempotent: bool, attempt: int) -> bool:
+        """Whether a failed request should be retried."""
+        if attempt >= self.max_retries:
+            return False
+        # A rate-limited request was not processed, so it is safe to retry even if not idempotent
+        return error.rate_limited or (idempotent and error.transient)
+    
+    def _backoff(self, attempt: int, retry_after: float = None) -> float:
+        """Exponential backoff with full jitter, never shorter than Retry-After."""
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler statistics.
+        
+        Returns:
+            Request counters, the current concurrency limit and available tokens
+        """
+        return {
+            **self.stats,
+            "concurrency_limit": int(self.limiter.limit),
+            "in_flight": self.limiter.in_flight,
+            "tokens": round(self.bucket.tokens, 2)
+        }
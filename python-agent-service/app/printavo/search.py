@@ -0,0 +1,245 @@
+"""
+In-memory full-text search index for Printavo orders.
+
+Orders are tokenised by name, customer, visual ID and status into an
+inverted index that answers get_orders style search strings, including
+status:<name> and -status:<name> filters, without a Printavo round trip.
+"""
+
+import heapq
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# A search string part: whitespace-separated, except within double quotes
+# (as in status:"in production")
+QUERY_PART_PATTERN = re.compile(r'(?:[^\s"]|"[^"]*(?:"|$))+')
+
+# Score contributed by a matching token in each field
+FIELD_WEIGHTS = {
+    "visualId": 8.0,
+    "name": 3.0,
+    "customer": 2.0,
+    "status": 1.0
+}
+
+# Score multiplier for a term that only matches as a prefix of a token
+PREFIX_MATCH_FACTOR = 0.5
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lower-cased alphanumeric tokens."""
+    return TOKEN_PATTERN.findall(str(text).lower()) if text else []
+
+
+def _normalize_status(name: Optional[str]) -> str:
+    return " ".join(tokenize(name))
+
+
+class SearchQuery(NamedTuple):
+    """A parsed order search string."""
+    terms: Tuple[str, ...]
+    statuses: Tuple[str, ...]
+    excluded_statuses: Tuple[str, ...]
+
+
+def parse_query(query_string: str) -> Optional[SearchQuery]:
+    """Parse a Printavo order search string.
+    
+    Args:
+        query_string: Free-text terms with optional status:<name> and
+            -status:<name> filters, as built by build_order_query; names
+            with spaces are double-quoted
+            
+    Returns:
+        The parsed query, or None if it uses filters the index can't evaluate
+    """
+    terms, statuses, excluded = [], [], []
+    for part in QUERY_PART_PATTERN.findall(query_string):
+        lowered = part.lower()
+        if lowered.startswith("status:"):
+            statuses.append(_normalize_status(lowered[len("status:"):]))
+        elif lowered.startswith("-status:"):
+            excluded.append(_normalize_status(lowered[len("-status:"):]))
+        elif ":" in lowered:
+            return None
+        else:
+            terms.extend(tokenize(lowered))
+    return SearchQuery(tuple(terms), tuple(statuses), tuple(excluded))
+
+
+def _field_tokens(node: Dict) -> Dict[str, float]:
+    """Weight of each token in an order node, keeping its best field."""
+    customer = node.get("customer") or {}
+    status = node.get("status") or {}
+    fields = (
+        ("visualId", node.get("visualId")),
+        ("name", node.get("name")),
+        ("customer", customer.get("name")),
+        ("customer", customer.get("email")),
+        ("status", status.get("name"))
+    )
+    
+    weights: Dict[str, float] = {}
+    for field, text in fields:
+        for token in tokenize(text):
+            weights[token] = max(weights.get(token, 0.0), FIELD_WEIGHTS[field])
+    return weights
+
+
+class OrderSearchIndex:
+    """Inverted index over raw order nodes.
+    
+    Every search term must match a token exactly or as a prefix. Results are
+    ranked by field weight, with exact matches scoring above prefix matches,
+    and ties broken by most recently created.
+    """
+    
+    def __init__(self, nodes: Iterable[Dict] = ()):
+        """Initialize the search index.
+        
+        Args:
+            nodes: Raw order nodes to index
+        """
+        self._docs: Dict[str, Dict] = {}
+        self._doc_tokens: Dict[str, Dict[str, float]] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._by_visual_id: Dict[str, str] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        self._status_of: Dict[str, str] = {}
+        self._created_at: Dict[str, str] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_stale = False
+        
+        for node in nodes:
+            self.add(node)
+    
+    def __len__(self) -> int:
+        return len(self._docs)
+    
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._docs
+    
+    def add(self, node: Dict):
+        """Index an order node, replacing any earlier version of the order.
+        
+        Args:
+            node: Raw order node including at least id
+        """
+        order_id = node["id"]
+        self.remove(order_id)
+        
+        tokens = _field_tokens(node)
+        self._docs[order_id] = node
+        self._doc_tokens[order_id] = tokens
+        for token, weight in tokens.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._vocabulary_stale = True
+            postings[order_id] = weight
+            
+        if node.get("visualId"):
+            self._by_visual_id[str(node["visualId"])] = order_id
+            
+        status = _normalize_status((node.get("status") or {}).get("name"))
+        self._status_of[order_id] = status
+        self._by_status.setdefault(status, set()).add(order_id)
+        self._created_at[order_id] = node.get("createdAt") or ""
+    
+    def remove(self, order_id: str):
+        """Remove an order from the index if present."""
+        node = self._docs.pop(order_id, None)
+        if node is None:
+            return
+            
+        for token in self._doc_tokens.pop(order_id):
+            postings = self._postings[token]
+            del postings[order_id]
+            if not postings:
+                del self._postings[token]
+                self._vocabulary_stale = True
+                
+        visual_id = str(node.get("visualId"))
+        if self._by_visual_id.get(visual_id) == order_id:
+            del self._by_visual_id[visual_id]
+            
+        status = self._status_of.pop(order_id)
+        self._by_status[status].discard(order_id)
+        if not self._by_status[status]:
+            del self._by_status[status]
+        del self._created_at[order_id]
+    
+    def get(self, order_id: str) -> Optional[Dict]:
+        """Get an indexed order node by ID."""
+        return self._docs.get(order_id)
+    
+    def get_by_visual_id(self, visual_id: str) -> Optional[Dict]:
+        """Get an indexed order node by visual ID."""
+        order_id = self._by_visual_id.get(visual_id)
+        return self._docs.get(order_id) if order_id is not None else None
+    
+    def _matches(self, term: str) -> Dict[str, float]:
+        """Score of each order matching a term exactly or as a prefix."""
+        if self._vocabulary_stale:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_stale = False
+            
+        scores: Dict[str, float] = {}
+        start = bisect_left(self._vocabulary, term)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(term):
+                break
+            factor = 1.0 if token == term else PREFIX_MATCH_FACTOR
+            for order_id, weight in self._postings[token].items():
+                score = weight * factor
+                if score > scores.get(order_id, 0.0):
+                    scores[order_id] = score
+        return scores
+    
+    def search(self, query_string: str, first: int) -> Optional[List[Dict]]:
+        """Search the index with a Printavo order search string.
+        
+        Args:
+            query_string: The full search string (see parse_query)
+            first: Maximum number of orders to return
+            
+        Returns:
+            The best matching raw order nodes, which must not be modified,
+            or None if the search string can't be evaluated locally
+        """
+        query = parse_query(query_string)
+        if query is None:
+            return None
+            
+        scores: Optional[Dict[str, float]] = None
+        for term in query.terms:
+            matches = self._matches(term)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {order_id: score + matches[order_id] for order_id, score in scores.items() if order_id in matches}
+            if not scores:
+                return []
+                
+        allowed: Optional[Set[str]] = None
+        if query.statuses:
+            allowed = set().union(*(self._by_status.get(status, ()) for status in query.statuses))
+        excluded = set().union(*(self._by_status.get(status, ()) for status in query.excluded_statuses))
+        
+        if scores is None:
+            scores = dict.fromkeys(self._docs if allowed is None else allowed, 0.0)
+        elif allowed is not None:
+            scores = {order_id: score for order_id, score in scores.items() if order_id in allowed}
+        for order_id in excluded:
+            scores.pop(order_id, None)
+            
+        created_at = self._created_at
+        best = heapq.nlargest(
+            first,
+            scores,
+            key=lambda order_id: (scores[order_id], created_at[order_id], order_id)
+        )
+        return [self._docs[order_id] for order_id in best]
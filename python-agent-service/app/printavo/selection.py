@@ -0,0 +1,141 @@
+"""
+Field-projected GraphQL selection sets for Printavo orders.
+
+Callers declare the order fields they need as dotted paths (e.g.
+"status.name") and the client requests only those fields from Printavo.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+# Every order field that can be requested from the orders connection
+ORDER_FIELDS: Tuple[str, ...] = (
+    "id",
+    "name",
+    "visualId",
+    "createdAt",
+    "updatedAt",
+    "dueDate",
+    "total",
+    "status.id",
+    "status.name",
+    "status.color",
+    "customer.id",
+    "customer.name",
+    "customer.email"
+)
+
+# Fields returned by get_orders and iter_orders when no projection is given
+DEFAULT_ORDER_FIELDS: Tuple[str, ...] = (
+    "id",
+    "name",
+    "visualId",
+    "createdAt",
+    "total",
+    "status.id",
+    "status.name",
+    "status.color",
+    "customer.id",
+    "customer.name",
+    "customer.email"
+)
+
+# Fields used by the agent's order tools
+AGENT_ORDER_FIELDS: Tuple[str, ...] = (
+    "id",
+    "name",
+    "visualId",
+    "createdAt",
+    "total",
+    "status.name",
+    "customer.id",
+    "customer.name"
+)
+
+# Fields used for revenue and status analytics
+ANALYTICS_ORDER_FIELDS: Tuple[str, ...] = (
+    "id",
+    "createdAt",
+    "total",
+    "status.id",
+    "status.name",
+    "customer.id",
+    "customer.name"
+)
+
+FieldTree = Dict[str, Optional["FieldTree"]]
+
+
+def canonical_fields(fields: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Validate a projection and put it in canonical (sorted, de-duplicated) form.
+    
+    Args:
+        fields: Dotted field paths, or None for DEFAULT_ORDER_FIELDS
+        
+    Returns:
+        Sorted tuple of field paths
+    """
+    if fields is None:
+        fields = DEFAULT_ORDER_FIELDS
+        
+    fields = tuple(sorted(set(fields)))
+    unknown = [field for field in fields if field not in ORDER_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown order fields: {', '.join(unknown)}")
+    if not fields:
+        raise ValueError("At least one order field must be requested")
+        
+    return fields
+
+
+@lru_cache(maxsize=64)
+def field_tree(fields: Tuple[str, ...]) -> FieldTree:
+    """Turn dotted field paths into a nested tree of fields."""
+    tree: FieldTree = {}
+    for field in fields:
+        node = tree
+        parts = field.split(".")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = None
+    return tree
+
+
+def render_selection(tree: FieldTree, indent: int = 0) -> str:
+    """Render a field tree as a GraphQL selection set body.
+    
+    Args:
+        tree: Nested field tree
+        indent: Number of spaces to indent each line with
+        
+    Returns:
+        The selection set lines, without surrounding braces
+    """
+    pad = " " * indent
+    lines = []
+    for name, children in tree.items():
+        if children is None:
+            lines.append(f"{pad}{name}")
+        else:
+            lines.append(f"{pad}{name} {{")
+            lines.append(render_selection(children, indent + 2))
+            lines.append(f"{pad}}}")
+    return "\n".join(lines)
+
+
+def project(node: Optional[Dict], tree: FieldTree) -> Optional[Dict[str, Any]]:
+    """Copy only the fields in tree out of a response node.
+    
+    Args:
+        node: The response node (may be None for nullable objects)
+        tree: Nested field tree
+        
+    Returns:
+        A new dict containing the projected fields
+    """
+    if node is None:
+        return None
+    return {
+        name: node.get(name) if children is None else project(node.get(name), children)
+        for name, children in tree.items()
+    }
@@ -0,0 +1,81 @@
+"""
+In-flight request deduplication for the Printavo API client.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Share one in-flight call between all concurrent callers using the same key.
+    
+    The first caller for a key starts the call; callers arriving while it is
+    still running await the same result instead of starting their own. Results
+    are shared objects, so callers must not mutate them.
+    
+    A caller being cancelled doesn't cancel the call while others still wait
+    for it; once the last one is cancelled, the call is cancelled too.
+    """
+    
+    def __init__(self):
+        """Initialize the single flight group."""
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        # Callers waiting for each in-flight call
+        self._waiters: Dict[asyncio.Future, int] = {}
+        self.stats = {
+            "calls": 0,
+            "shared": 0,
+            "cancelled": 0
+        }
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn once for all concurrent callers with the same key.
+        
+        Args:
+            key: Key identifying equivalent calls
+            fn: Coroutine function performing the call
+            
+        Returns:
+            The result of the shared call
+        """
+        call = self._calls.get(key)
+        if call is not None:
+            self.stats["shared"] += 1
+            logger.debug(f"Joining in-flight call for {key}")
+        else:
+            self.stats["calls"] += 1
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._forget(key, done))
+            
+        self._waiters[call] = self._waiters.get(call, 0) + 1
+        try:
+            # Shield so one caller being cancelled doesn't cancel the call for the others
+            return await asyncio.shield(call)
+        except asyncio.CancelledError:
+            if self._waiters[call] == 1 and not call.done():
+                logger.debug(f"Cancelling call for {key}: no callers left")
+                self.stats["cancelled"] += 1
+                call.cancel()
+            raise
+        finally:
+            self._waiters[call] -= 1
+            if not self._waiters[call]:
+                del self._waiters[call]
+    
+    def _forget(self, key: Hashable, call: asyncio.Future):
+        """Remove a finished call so later callers start a fresh one."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.cancelled():
+            # Mark the exception as retrieved in case every caller went away
+            call.exception()
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running."""
+        return len(self._calls)
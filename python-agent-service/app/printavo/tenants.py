@@ -0,0 +1,291 @@
+"""
+Tenant-aware registry of Printavo API clients.
+
+Each configured Printavo account gets its own PrintavoAPIClient, and with it
+its own connection pool, rate limit budget, caches and local databases.
+Requests select an account with a tenant header; the client for the current
+request is made available to the agent tools through a context variable.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, NamedTuple, Optional, Tuple
+
+from app.config import settings
+from app.printavo.api import PrintavoAPIClient, printavo_client
+from app.printavo.fairness import WeightedFairQueue
+from app.printavo.webhooks import WebhookProcessor, webhook_processor
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class Tenant(NamedTuple):
+    """Printavo credentials of one account."""
+    tenant_id: str
+    email: str
+    token: str
+    api_url: Optional[str] = None
+    weight: float = 1.0
+    
+    @property
+    def credentials_key(self) -> Tuple[str, str, str]:
+        """Key identifying the account; tenants sharing credentials share a client."""
+        token_hash = hashlib.sha256(self.token.encode("utf-8")).hexdigest()
+        return (self.api_url or settings.printavo_api_url, self.email, token_hash)
+
+
+class UnknownTenantError(KeyError):
+    """Raised for a tenant ID that isn't configured."""
+
+
+def parse_tenants(value: str) -> Dict[str, Tenant]:
+    """Parse tenants from a JSON object such as {"shop": {"email": ..., "token": ..., "weight": 2}}.
+    
+    Args:
+        value: JSON object mapping tenant IDs to credentials
+        
+    Returns:
+        Mapping of tenant ID to tenant
+    """
+    if not value.strip():
+        return {}
+        
+    tenants = {}
+    for tenant_id, config in json.loads(value).items():
+        if not config.get("email") or not config.get("token"):
+            raise ValueError(f"Tenant {tenant_id!r} must have an email and a token")
+        tenants[tenant_id] = Tenant(
+            tenant_id=tenant_id,
+            email=config["email"],
+            token=config["token"],
+            api_url=config.get("api_url"),
+            weight=float(config.get("weight", 1.0))
+        )
+    return tenants
+
+
+class _Entry:
+    """A tenant client and the webhook processor applying events to it."""
+    
+    def __init__(self, client: PrintavoAPIClient, webhooks: WebhookProcessor):
+        self.client = client
+        self.webhooks = webhooks
+        # Requests holding a lease on the client; set while there are none
+        self.in_use = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+
+class ClientRegistry:
+    """LRU of Printavo clients keyed by credentials.
+    
+    Clients are created and started on first use. An evicted client is
+    closed once the requests leasing it have finished. Requests without a tenant use the default client configured from
+    PRINTAVO_EMAIL and PRINTAVO_TOKEN. Every tenant client shares the
+    registry's WeightedFairQueue, so a busy tenant can't take every request
+    slot from the others.
+    """
+    
+    def __init__(self,
+                 tenants: Dict[str, Tenant],
+                 default_client: PrintavoAPIClient,
+                 default_webhooks: WebhookProcessor,
+                 max_clients: int = 32,
+                 max_concurrency: int = 20,
+                 client_factory=PrintavoAPIClient):
+        """Initialize the client registry.
+        
+        Args:
+            tenants: Configured tenants by tenant ID
+            default_client: Client used for requests without a tenant
+            default_webhooks: Webhook processor of the default client
+            max_clients: Maximum number of tenant clients kept open
+            max_concurrency: Requests allowed in flight across all tenant clients
+            client_factory: Callable creating a client (mainly useful for testing)
+        """
+        self.tenants = tenants
+        self.default_client = default_client
+        self.default_webhooks = default_webhooks
+        self.max_clients = max_clients
+        self.fair_queue = WeightedFairQueue(max_concurrency)
+        if tenants:
+            # The default client competes for the same request slots as the tenants
+            default_client.fair_queue = self.fair_queue
+        self._client_factory = client_factory
+        self._entries: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        # Evicted entries waiting for their leases to end before closing
+        self._draining: Dict[asyncio.Task, _Entry] = {}
+        self.stats = {
+            "created": 0,
+            "evicted": 0
+        }
+    
+    async def _get_entry(self, tenant_id: Optional[str]) -> Optional[_Entry]:
+        """Get or create the entry of a tenant, or None for the default client."""
+        if not tenant_id:
+            return None
+        tenant = self.tenants.get(tenant_id)
+        if tenant is None:
+            raise UnknownTenantError(tenant_id)
+            
+        key = tenant.credentials_key
+        async with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+                
+            client = self._client_factory(
+                api_url=tenant.api_url,
+                email=tenant.email,
+                token=tenant.token,
+                tenant_id=tenant.tenant_id,
+                weight=tenant.weight,
+                fair_queue=self.fair_queue
+            )
+            await client.start()
+            entry = self._entries[key] = _Entry(client, WebhookProcessor(
+                client,
+                window=settings.printavo_webhook_coalesce_ms / 1000,
+                dedup_size=settings.printavo_webhook_dedup_size
+            ))
+            self.stats["created"] += 1
+            logger.info(f"Opened Printavo client for tenant {tenant.tenant_id}")
+            
+            while len(self._entries) > self.max_clients:
+                _, evicted = self._entries.popitem(last=False)
+                self.stats["evicted"] += 1
+                task = asyncio.ensure_future(self._close_entry(evicted))
+                self._draining[task] = evicted
+                task.add_done_callback(lambda task: self._draining.pop(task, None))
+            return entry
+    
+    async def get(self, tenant_id: Optional[str] = None) -> PrintavoAPIClient:
+        """Get the client for a tenant.
+        
+        Args:
+            tenant_id: The tenant ID, or None for the default client
+            
+        Returns:
+            The tenant's client
+        """
+        entry = await self._get_entry(tenant_id)
+        return entry.client if entry is not None else self.default_client
+    
+    @asynccontextmanager
+    async def lease(self, tenant_id: Optional[str] = None) -> AsyncIterator[PrintavoAPIClient]:
+        """Use the client of a tenant for the duration of a request.
+        
+        If the client is evicted meanwhile, it stays open until every lease
+        on it has ended.
+        
+        Args:
+            tenant_id: The tenant ID, or None for the default client
+            
+        Yields:
+            The tenant's client
+        """
+        entry = await self._get_entry(tenant_id)
+        if entry is None:
+            yield self.default_client
+            return
+            
+        entry.in_use += 1
+        entry.idle.clear()
+        try:
+            yield entry.client
+        finally:
+            entry.in_use -= 1
+            if not entry.in_use:
+                entry.idle.set()
+    
+    async def get_webhook_processor(self, tenant_id: Optional[str] = None) -> WebhookProcessor:
+        """Get the webhook processor for a tenant.
+        
+        Args:
+            tenant_id: The tenant ID, or None for the default client
+            
+        Returns:
+            The processor applying webhook events to the tenant's client
+        """
+        entry = await self._get_entry(tenant_id)
+        return entry.webhooks if entry is not None else self.default_webhooks
+    
+    async def _close_entry(self, entry: _Entry):
+        await entry.idle.wait()
+        await entry.webhooks.close()
+        await entry.client.close()
+    
+    async def close(self):
+        """Close every tenant client, without waiting for leases to end."""
+        entries = list(self._entries.values()) + list(self._draining.values())
+        self._entries.clear()
+        for entry in entries:
+            entry.idle.set()
+            await self._close_entry(entry)
+        if self._draining:
+            await asyncio.gather(*self._draining, return_exceptions=True)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get registry statistics.
+        
+        Returns:
+            Configured and open tenants, leases, circuit breaker and scheduler
+            state of each open client, eviction counters and fair queue usage
+        """
+        clients = {}
+        for entry in self._entries.values():
+            stats = entry.client.get_stats()
+            clients[entry.client.tenant_id] = {
+                "in_use": entry.in_use,
+                "circuit_breaker": stats["circuit_breaker"],
+                "scheduler": stats["scheduler"]
+            }
+        return {
+            "tenants": len(self.tenants),
+            "open_clients": list(clients),
+            "clients": clients,
+            "draining": [entry.client.tenant_id for entry in self._draining.values()],
+            "max_clients": self.max_clients,
+            "fair_queue": self.fair_queue.get_stats(),
+            **self.stats
+        }
+
+
+_current_client: ContextVar[Optional[PrintavoAPIClient]] = ContextVar("printavo_client", default=None)
+
+
+@contextmanager
+def use_client(client: PrintavoAPIClient) -> Iterator[PrintavoAPIClient]:
+    """Make client the current client within the block (and tasks started in it).
+    
+    Args:
+        client: The client serving the current request
+    """
+    token = _current_client.set(client)
+    try:
+        yield client
+    finally:
+        _current_client.reset(token)
+
+
+def current_client() -> PrintavoAPIClient:
+    """Get the client of the current request, or the default client."""
+    return _current_client.get() or printavo_client
+
+
+# Create a singleton instance
+client_registry = ClientRegistry(
+    parse_tenants(settings.printavo_tenants),
+    default_client=printavo_client,
+    default_webhooks=webhook_processor,
+    max_clients=settings.printavo_max_tenant_clients,
+    max_concurrency=settings.printavo_tenant_max_concurrency
+)
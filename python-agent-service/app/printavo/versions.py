@@ -0,0 +1,102 @@
+"""
+Data versions for results derived from Printavo data.
+
+The client keeps a version counter per kind of data and bumps it whenever
+its local copies of that data are invalidated (by webhooks or explicitly).
+Callers that derive longer-lived results from the client's data (such as
+cached agent answers) wrap the work in track_reads() to learn which
+versions it depended on, and can later check whether any has moved on.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Every result depends on this, so bumping it invalidates everything
+ALL = "*"
+# Order searches, listings and analytics
+ORDERS = "orders"
+# Order statuses
+STATUSES = "statuses"
+# Lookups of any single order by visual ID
+ORDER_LOOKUPS = "order:*"
+
+
+def order_key(visual_id: str) -> str:
+    """Version key of a single order looked up by visual ID."""
+    return f"order:{visual_id}"
+
+
+class DataVersions:
+    """Version counters of the data held by one client."""
+    
+    def __init__(self):
+        """Initialize every version at 0."""
+        self._versions: Dict[str, int] = {}
+    
+    def get(self, key: str) -> int:
+        """Get the current version of a kind of data."""
+        return self._versions.get(key, 0)
+    
+    def bump(self, *keys: str):
+        """Note that the given data changed.
+        
+        Args:
+            keys: Version keys such as ORDERS or order_key(visual_id)
+        """
+        for key in keys:
+            self._versions[key] = self._versions.get(key, 0) + 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the versions of the collection-wide keys."""
+        return {key: self.get(key) for key in (ALL, ORDERS, STATUSES, ORDER_LOOKUPS)}
+
+
+class DataDependencies:
+    """Data versions a result was derived from."""
+    
+    def __init__(self):
+        """Initialize with no dependencies."""
+        self.reads: Dict[Tuple[DataVersions, str], int] = {}
+        self.cacheable = True
+    
+    def record(self, versions: DataVersions, keys: Tuple[str, ...]):
+        """Record reading data at its current versions (the first read of a key wins)."""
+        for key in (ALL,) + keys:
+            self.reads.setdefault((versions, key), versions.get(key))
+    
+    def is_current(self) -> bool:
+        """Whether none of the data read has changed since."""
+        return all(versions.get(key) == version for (versions, key), version in self.reads.items())
+
+
+_current: ContextVar[Optional[DataDependencies]] = ContextVar("printavo_data_dependencies", default=None)
+
+
+@contextmanager
+def track_reads() -> Iterator[DataDependencies]:
+    """Track the data read within the block (and tasks started in it).
+    
+    Yields:
+        The DataDependencies updated as data is read
+    """
+    dependencies = DataDependencies()
+    token = _current.set(dependencies)
+    try:
+        yield dependencies
+    finally:
+        _current.reset(token)
+
+
+def record_read(versions: DataVersions, *keys: str):
+    """Record data being read, if reads are being tracked."""
+    dependencies = _current.get()
+    if dependencies is not None:
+        dependencies.record(versions, keys)
+
+
+def mark_uncacheable():
+    """Note that the result being derived shouldn't be reused, e.g. because it used stale data."""
+    dependencies = _current.get()
+    if dependencies is not None:
+        dependencies.cacheable = False
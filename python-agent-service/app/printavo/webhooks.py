@@ -0,0 +1,249 @@
+"""
+Printavo webhook ingestion.
+
+Webhook deliveries are verified, de-duplicated and coalesced per order over
+a short window, then applied in one pass: cached responses for the changed
+orders are invalidated and the order mirror is brought up to date, so reads
+stay fresh without short cache TTLs or frequent polling.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional
+
+from app.config import settings
+from app.printavo.api import printavo_client
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Payload keys that may hold the changed order
+ORDER_KEYS = ("data", "order", "invoice", "quote")
+
+
+class WebhookEvent(NamedTuple):
+    """A change notification for an order or the status list."""
+    event_id: str
+    kind: str
+    order_id: Optional[str] = None
+    visual_id: Optional[str] = None
+    deleted: bool = False
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check a delivery's HMAC-SHA256 signature.
+    
+    Args:
+        secret: The shared webhook secret
+        body: The raw request body
+        signature: Hex digest from the signature header, optionally prefixed with "sha256="
+        
+    Returns:
+        Whether the signature matches the body
+    """
+    if not secret or not signature:
+        return False
+    if signature.startswith("sha256="):
+        signature = signature[len("sha256="):]
+    expected = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature.strip().lower())
+
+
+def parse_event(payload: Dict[str, Any], headers: Mapping[str, str] = None) -> WebhookEvent:
+    """Parse a webhook payload into an event.
+    
+    The changed order is read from a "data", "order", "invoice" or "quote"
+    key, or from the payload itself. The event type comes from an "event" or
+    "type" key, or the X-Printavo-Event header.
+    
+    Args:
+        payload: A decoded webhook event
+        headers: The delivery's request headers
+        
+    Returns:
+        The parsed event
+    """
+    headers = headers or {}
+    if not isinstance(payload, dict):
+        raise ValueError("Webhook event must be a JSON object")
+        
+    kind = payload.get("event") or payload.get("type") or headers.get("x-printavo-event") or "order.updated"
+    kind = str(kind).lower()
+    data = next((payload[key] for key in ORDER_KEYS if isinstance(payload.get(key), dict)), payload)
+    
+    event_id = payload.get("eventId") or payload.get("event_id")
+    if not event_id:
+        # Redeliveries of the same event have identical payloads
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        event_id = hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+        
+    visual_id = data.get("visualId") or data.get("visual_id")
+    return WebhookEvent(
+        event_id=str(event_id),
+        kind=kind,
+        order_id=str(data["id"]) if data.get("id") else None,
+        visual_id=str(visual_id) if visual_id else None,
+        deleted="delete" in kind
+    )
+
+
+class WebhookProcessor:
+    """De-duplicates webhook events and applies them to the client in coalesced bursts.
+    
+    Events for the same order that arrive within the coalescing window are
+    merged, and each burst results in one round of cache invalidation and at
+    most one incremental mirror sync.
+    """
+    
+    def __init__(self, client, window: float = 0.25, dedup_size: int = 1000):
+        """Initialize the webhook processor.
+        
+        Args:
+            client: The PrintavoAPIClient whose local data is kept up to date
+            window: Seconds to collect events before applying them
+            dedup_size: Number of recent event IDs remembered for de-duplication
+        """
+        self.client = client
+        self.window = window
+        self.dedup_size = dedup_size
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._pending: Dict[str, WebhookEvent] = {}
+        self._statuses_changed = False
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.stats = {
+            "received": 0,
+            "duplicates": 0,
+            "ignored": 0,
+            "coalesced": 0,
+            "flushes": 0,
+            "orders_invalidated": 0,
+            "errors": 0
+        }
+    
+    def submit(self, events: List[WebhookEvent]) -> Dict[str, int]:
+        """Queue events to be applied once the coalescing window elapses.
+        
+        Args:
+            events: The parsed webhook events
+            
+        Returns:
+            Counts of accepted and duplicate events
+        """
+        accepted = duplicates = 0
+        for event in events:
+            self.stats["received"] += 1
+            if event.event_id in self._seen:
+                self._seen.move_to_end(event.event_id)
+                self.stats["duplicates"] += 1
+                duplicates += 1
+                continue
+                
+            self._seen[event.event_id] = None
+            while len(self._seen) > self.dedup_size:
+                self._seen.popitem(last=False)
+            accepted += 1
+            
+            if event.order_id is None:
+                if "status" in event.kind:
+                    self._statuses_changed = True
+                else:
+                    self.stats["ignored"] += 1
+                    continue
+            else:
+                previous = self._pending.get(event.order_id)
+                if previous is not None:
+                    self.stats["coalesced"] += 1
+                    event = event._replace(
+                        visual_id=event.visual_id or previous.visual_id,
+                        deleted=event.deleted or previous.deleted
+                    )
+                self._pending[event.order_id] = event
+                
+            if self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+                
+        return {"accepted": accepted, "duplicates": duplicates}
+    
+    def _flush(self):
+        """Hand the pending events to a background task."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            
+        batch, self._pending = self._pending, {}
+        statuses_changed, self._statuses_changed = self._statuses_changed, False
+        if batch or statuses_changed:
+            task = asyncio.ensure_future(self._apply(batch, statuses_changed))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _apply(self, batch: Dict[str, WebhookEvent], statuses_changed: bool):
+        """Invalidate data for the changed orders and sync them into the mirror."""
+        self.stats["flushes"] += 1
+        mirror = self.client.mirror
+        try:
+            if statuses_changed:
+                self.client.invalidate_cache("GetStatuses")
+                
+            orders = {}
+            for order_id, event in batch.items():
+                visual_id = event.visual_id
+                if visual_id is None and mirror is not None:
+                    node = mirror.index.get(order_id)
+                    visual_id = str(node["visualId"]) if node and node.get("visualId") else None
+                orders[order_id] = visual_id
+                
+            deleted = [order_id for order_id, event in batch.items() if event.deleted]
+            self.client.invalidate_orders(orders, deleted)
+            self.stats["orders_invalidated"] += len(orders)
+            
+            if mirror is not None and mirror.last_sync is not None and len(deleted) < len(batch):
+                # Deleted orders are already out of the mirror; only changed ones
+                # need syncing, and full syncs are left to the background loop
+                await mirror.sync(self.client, full=False)
+            elif mirror is not None and deleted:
+                await mirror.flush()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error applying webhook events for {len(batch)} orders: {e}")
+    
+    async def drain(self):
+        """Apply pending events now and wait for every burst to finish."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+    
+    async def close(self):
+        """Cancel pending and in-progress bursts."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._pending.clear()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get webhook processing statistics.
+        
+        Returns:
+            Event counters and the number of pending orders
+        """
+        return {
+            "pending": len(self._pending),
+            **self.stats
+        }
+
+
+# Create a singleton instance
+webhook_processor = WebhookProcessor(
+    printavo_client,
+    window=settings.printavo_webhook_coalesce_ms / 1000,
+    dedup_size=settings.printavo_webhook_dedup_size
+)
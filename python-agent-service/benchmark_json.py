@@ -0,0 +1,101 @@
+"""
+Benchmark for the JSON codec used by the Python Agent Service.
+
+Times decoding and encoding of realistic Printavo order payloads with the
+standard library json module and with the service's codec.
+"""
+
+import argparse
+import json
+import random
+import sys
+import timeit
+
+from app import json_codec
+
+STATUSES = ["Quote", "Awaiting Approval", "In Production", "Ready for Pickup", "Completed"]
+
+
+def make_order(i: int) -> dict:
+    """Build an order node shaped like a Printavo SearchOrders result."""
+    return {
+        "id": str(100000 + i),
+        "visualId": str(1000 + i),
+        "name": f"Order {i} - Team Shirts",
+        "orderNumber": str(1000 + i),
+        "status": {"id": str(i % len(STATUSES)), "name": STATUSES[i % len(STATUSES)]},
+        "customer": {
+            "id": str(5000 + i % 200),
+            "name": f"Customer {i % 200}",
+            "email": f"customer{i % 200}@example.com",
+            "phone": "555-0100",
+        },
+        "createdAt": "2025-03-01T12:00:00Z",
+        "updatedAt": "2025-03-02T08:30:00Z",
+        "total": round(random.uniform(50, 5000), 2),
+        "subtotal": round(random.uniform(50, 5000), 2),
+        "tax": round(random.uniform(0, 400), 2),
+        "shipping": round(random.uniform(0, 50), 2),
+        "discount": 0.0,
+        "notes": "Front: 2 colour print. Back: 1 colour print. Rush order.",
+        "dueDate": "2025-03-15",
+        "customerDueDate": "2025-03-16",
+        "paymentStatus": "PENDING",
+        "paymentDueDate": "2025-03-30",
+        "lineItems": [
+            {
+                "id": f"{i}-{j}",
+                "name": f"Gildan 5000 Tee #{j}",
+                "description": "Heavy cotton t-shirt",
+                "quantity": 24,
+                "price": 12.5,
+                "total": 300.0,
+            }
+            for j in range(3)
+        ],
+    }
+
+
+def make_payload(count: int) -> bytes:
+    """Build a GraphQL response body with the given number of orders."""
+    data = {"data": {"orders": {"edges": [{"node": make_order(i)} for i in range(count)]}}}
+    return json.dumps(data).encode("utf-8")
+
+
+def bench(label: str, fn, number: int) -> float:
+    """Time a function and print the average per call in milliseconds."""
+    elapsed = min(timeit.repeat(fn, number=number, repeat=5)) / number * 1000
+    print(f"  {label:<28} {elapsed:8.3f} ms")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the JSON codec")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000], help="Order counts to benchmark")
+    parser.add_argument("--number", type=int, default=20, help="Iterations per measurement")
+    args = parser.parse_args()
+    
+    random.seed(0)
+    print(f"JSON backend: {json_codec.BACKEND}")
+    
+    for size in args.sizes:
+        payload = make_payload(size)
+        decoded = json.loads(payload)
+        print(f"\n{size} orders ({len(payload) / 1024:.0f} KiB)")
+        
+        stdlib_decode = bench("decode (json)", lambda: json.loads(payload), args.number)
+        codec_decode = bench(f"decode ({json_codec.BACKEND})", lambda: json_codec.loads(payload), args.number)
+        stdlib_encode = bench(
+            "encode (json)",
+            lambda: json.dumps(decoded, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            args.number,
+        )
+        codec_encode = bench(f"encode ({json_codec.BACKEND})", lambda: json_codec.dumps(decoded), args.number)
+        
+        print(f"  decode speedup: {stdlib_decode / codec_decode:.1f}x, encode speedup: {stdlib_encode / codec_encode:.1f}x")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+"""
+Shared test configuration.
+"""
+
+import os
+
+# The module-level Printavo client requires credentials at import time
+os.environ.setdefault("PRINTAVO_EMAIL", "test@example.com")
+os.environ.setdefault("PRINTAVO_TOKEN", "test-token")
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+# Keep the visual ID index out of the working directory
+os.environ.setdefault("PRINTAVO_VISUAL_ID_INDEX_PATH", ":memory:")
@@ -110,4 +110,171 @@ async def test_process_query_error_handling():
         # Assertions
         assert "error" in result
         assert "Test error" in result["error"]
-        assert "elapsed_time" in result 
\ No newline at end of file
+        assert "elapsed_time" in result 
+
+@pytest.mark.asyncio
+@patch('app.agents.printavo_agent.Agent')
+@patch('app.agents.printavo_agent.Runner')
+async def test_stream_query(mock_runner, mock_agent, mock_printavo_client):
+    """Test streaming a query."""
+    from types import SimpleNamespace
+    
+    call = SimpleNamespace(type="function_call", call_id="call1", name="get_orders", arguments="{}")
+    stream = [
+        SimpleNamespace(type="raw_response_event", data=SimpleNamespace(type="response.output_item.done", item=call)),
+        SimpleNamespace(type="run_item_stream_event", name="tool_output",
+                        item=SimpleNamespace(raw_item={"call_id": "call1", "output": "[]"})),
+        SimpleNamespace(type="raw_response_event", data=SimpleNamespace(type="response.output_text.delta", delta="No orders"))
+    ]
+    
+    async def stream_events():
+        for event in stream:
+            yield event
+            
+    usage = SimpleNamespace(input_tokens=100, output_tokens=50, total_tokens=150)
+    mock_result = SimpleNamespace(
+        stream_events=stream_events,
+        raw_responses=[SimpleNamespace(usage=usage), SimpleNamespace(usage=usage)],
+        final_output="No orders",
+        is_complete=True
+    )
+    mock_runner.run_streamed.return_value = mock_result
+    
+    # Create agent manager
+    agent_manager = PrintavoAgentManager()
+    
+    # Stream a query
+    events = [event async for event in agent_manager.stream_query("Show me recent orders")]
+    
+    # Assertions
+    assert [name for name, _ in events] == ["tool_call", "tool_result", "delta", "done"]
+    assert events[0][1] == {"call_id": "call1", "name": "get_orders", "arguments": "{}"}
+    assert events[1][1]["name"] == "get_orders"
+    assert events[2][1] == {"text": "No orders"}
+    assert events[3][1]["response"] == "No orders"
+    assert events[3][1]["usage"] == {
+        "prompt_tokens": 200,
+        "completion_tokens": 100,
+        "total_tokens": 300,
+        "tool_result_tokens": 0,
+        "tool_result_tokens_saved": 0
+    }
+    assert "elapsed_time" in events[3][1]
+
+
+@pytest.mark.asyncio
+@patch('app.agents.printavo_agent.Agent')
+@patch('app.agents.printavo_agent.Runner')
+async def test_stream_query_closed_early_cancels_run(mock_runner, mock_agent, mock_printavo_client):
+    """Test that closing the stream before the run finishes cancels it."""
+    import asyncio
+    from types import SimpleNamespace
+    
+    stopped = []
+    
+    async def stream_events():
+        yield SimpleNamespace(type="raw_response_event", data=SimpleNamespace(type="response.output_text.delta", delta="No"))
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            # As the SDK does, stop the run once the task reading events is cancelled
+            stopped.append(True)
+            
+    mock_runner.run_streamed.return_value = SimpleNamespace(stream_events=stream_events)
+    
+    agent_manager = PrintavoAgentManager()
+    events = agent_manager.stream_query("Show me recent orders")
+    assert await events.__anext__() == ("delta", {"text": "No"})
+    await events.aclose()
+    
+    assert stopped == [True]
+
+
+@pytest.mark.asyncio
+@patch('app.agents.printavo_agent.Agent')
+@patch('app.agents.printavo_agent.Runner')
+async def test_process_query_reuses_cached_answer(mock_runner, mock_agent, mock_printavo_client):
+    """Test that a repeated question is answered from the answer cache."""
+    mock_result = AsyncMock()
+    mock_result.final_output = "Orders 1234 and 1235 are due this week"
+    mock_result.usage = None
+    mock_runner.run = AsyncMock(return_value=mock_result)
+    
+    agent_manager = PrintavoAgentManager()
+    
+    first = await agent_manager.process_query("What's due this week?")
+    second = await agent_manager.process_query("whats due this week")
+    other_filters = await agent_manager.process_query("whats due this week", exclude_completed=False)
+    
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["response"] == "Orders 1234 and 1235 are due this week"
+    assert other_filters["cached"] is False
+    assert mock_runner.run.call_count == 2
+
+
+@pytest.mark.asyncio
+@patch('app.agents.printavo_agent.current_client')
+@patch('app.agents.printavo_agent.Agent')
+@patch('app.agents.printavo_agent.Runner')
+async def test_answers_from_failed_tool_calls_are_not_cached(mock_runner, mock_agent, mock_current_client):
+    """Test that an answer built on a tool error isn't reused."""
+    from app.agents.printavo_agent import get_orders, json_tool
+    
+    mock_current_client.return_value.tenant_id = None
+    mock_current_client.return_value.get_orders = AsyncMock(side_effect=Exception("Printavo is unavailable"))
+    
+    async def run(agent, query):
+        output = await json_tool(get_orders)(query="due this week")
+        assert "Failed to retrieve orders" in output
+        mock_result = AsyncMock()
+        mock_result.final_output = "I couldn't fetch orders right now, please try again"
+        mock_result.usage = None
+        return mock_result
+        
+    mock_runner.run = AsyncMock(side_effect=run)
+    
+    agent_manager = PrintavoAgentManager()
+    first = await agent_manager.process_query("What's due this week?")
+    second = await agent_manager.process_query("What's due this week?")
+    
+    assert first["cached"] is False
+    assert second["cached"] is False
+    assert mock_runner.run.call_count == 2
+
+@pytest.mark.asyncio
+@patch('app.agents.printavo_agent.current_client')
+async def test_get_orders_reports_a_truncated_filter_scan(mock_current_client):
+    """Test that the tool says when local filtering gave up before finding enough orders."""
+    from app.agents.printavo_agent import get_orders
+    from app.printavo.api import ScannedOrders
+    from app.printavo.orders import OrderRecord
+    
+    node = {"id": "order1", "visualId": "1234", "total": 150.0, "customer": {"id": "c1", "name": "Acme"}}
+    mock_current_client.return_value.get_orders = AsyncMock(
+        return_value=ScannedOrders([OrderRecord.from_order_node(node)], truncated=True)
+    )
+    
+    result = await get_orders(min_total=100, limit=5)
+    
+    assert result["truncated"] is True
+    assert [order["visualId"] for order in result["results"]] == ["1234"]
+
+@pytest.mark.asyncio
+@patch('app.agents.printavo_agent.Agent')
+@patch('app.agents.printavo_agent.Runner')
+async def test_process_query_fast_path(mock_runner, mock_agent, mock_printavo_client):
+    """Test that a simple lookup is answered without running the model."""
+    mock_runner.run = AsyncMock()
+    
+    agent_manager = PrintavoAgentManager()
+    agent_manager.fast_path.tools["get_statuses"] = AsyncMock(return_value=[
+        {"id": "status1", "name": "In Progress", "color": "blue"},
+        {"id": "status2", "name": "New", "color": "green"}
+    ])
+    
+    result = await agent_manager.process_query("List statuses")
+    
+    assert result["fast_path"] is True
+    assert result["response"] == "The available order statuses are In Progress and New."
+    mock_runner.run.assert_not_called()
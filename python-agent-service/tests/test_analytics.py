@@ -0,0 +1,156 @@
+"""
+Tests for columnar order analytics.
+"""
+
+import json
+from datetime import date
+
+import httpx
+import pytest
+
+from app.printavo.analytics import OrderAnalytics, OrderSnapshot, resolve_period
+from app.printavo.api import PrintavoAPIClient
+from app.printavo.freshness import REVALIDATING, track_freshness
+from app.printavo.versions import ORDERS
+
+
+def make_node(n: int, created_at: str, total, status: str, customer: str) -> dict:
+    return {
+        "id": f"order{n}",
+        "createdAt": created_at,
+        "total": total,
+        "status": {"id": status.lower(), "name": status},
+        "customer": {"id": customer.lower(), "name": customer}
+    }
+
+
+NODES = [
+    make_node(1, "2024-03-01T10:00:00Z", 100.0, "In Production", "Acme"),
+    make_node(2, "2024-03-05T10:00:00Z", "250.50", "In Production", "Globex"),
+    make_node(3, "2024-03-11T23:30:00-05:00", 40.0, "Completed", "Acme"),
+    make_node(4, "2024-02-20T10:00:00Z", 75.0, "Quote", "Initech"),
+    make_node(5, "2024-02-21T10:00:00Z", None, "Awaiting Approval", "Acme"),
+]
+
+
+def test_group_by_status_ranks_by_revenue():
+    result = OrderSnapshot.from_nodes(NODES).aggregate("status", exclude_statuses=["completed", "quote"])
+    
+    assert result["orders"] == 3
+    assert result["revenue"] == 350.5
+    assert result["groups"] == [
+        {"key": "In Production", "orders": 2, "revenue": 350.5},
+        {"key": "Awaiting Approval", "orders": 1, "revenue": 0.0},
+    ]
+
+
+def test_group_by_customer_with_date_range_and_top_n():
+    result = OrderSnapshot.from_nodes(NODES).aggregate(
+        "customer", start_date="2024-03-01", end_date="2024-03-31", top_n=1
+    )
+    
+    assert result["orders"] == 3
+    assert result["groups"] == [{"key": "Globex", "orders": 1, "revenue": 250.5}]
+
+
+def test_date_buckets_use_utc_and_monday_weeks():
+    snapshot = OrderSnapshot.from_nodes(NODES)
+    
+    months = snapshot.aggregate("month")["groups"]
+    weeks = snapshot.aggregate("week", start_date="2024-03-01")["groups"]
+    
+    assert [(g["key"], g["orders"], g["revenue"]) for g in months] == [
+        ("2024-02", 2, 75.0),
+        ("2024-03", 3, 390.5),
+    ]
+    # Order 3 was created late on March 11th in UTC-5, i.e. March 12th UTC
+    assert [g["key"] for g in weeks] == ["2024-02-26", "2024-03-04", "2024-03-11"]
+
+
+def test_invalid_group_by_is_rejected():
+    with pytest.raises(ValueError, match="group_by"):
+        OrderSnapshot.from_nodes(NODES).aggregate("colour")
+
+
+def test_resolve_period():
+    today = date(2024, 3, 13)
+    
+    assert resolve_period("this_month", today) == (date(2024, 3, 1), today)
+    assert resolve_period("last_month", today) == (date(2024, 2, 1), date(2024, 2, 29))
+    assert resolve_period("last_week", today) == (date(2024, 3, 4), date(2024, 3, 10))
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_crawled_once_and_reused():
+    requests = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"data": {"orders": {
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "edges": [{"node": node} for node in NODES]
+        }}})
+        
+    client = PrintavoAPIClient(
+        api_url="https://printavo.test/api/v2",
+        email="test@example.com",
+        token="test-token",
+        transport=httpx.MockTransport(handler)
+    )
+    analytics = OrderAnalytics(client, ttl=300)
+    
+    first = await analytics.aggregate("none", exclude_completed=False, exclude_quotes=False)
+    second = await analytics.aggregate("status")
+    
+    assert first["orders"] == 5
+    assert first["revenue"] == 465.5
+    assert second["orders"] == 3
+    assert len(requests) == 1
+    assert requests[0]["variables"]["query"] == ""
+    assert "customer {\n" in requests[0]["query"]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_live_crawl_is_capped_and_rebuilt_in_background_on_change():
+    requests = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        first = body["variables"]["first"]
+        return httpx.Response(200, json={"data": {"orders": {
+            "pageInfo": {"hasNextPage": True, "endCursor": f"c{len(requests)}"},
+            "edges": [{"node": node} for node in NODES[:first]]
+        }}})
+        
+    client = PrintavoAPIClient(
+        api_url="https://printavo.test/api/v2",
+        email="test@example.com",
+        token="test-token",
+        transport=httpx.MockTransport(handler)
+    )
+    analytics = OrderAnalytics(client, ttl=300, max_live_orders=3)
+    
+    first = await analytics.aggregate("none", exclude_completed=False, exclude_quotes=False)
+    assert first["orders"] == 3
+    assert first["snapshot"]["complete"] is False
+    assert len(requests) == 1
+    # The capped crawl covers the most recently created orders
+    assert requests[0]["variables"]["sortOn"] == "VISUAL_ID"
+    assert requests[0]["variables"]["sortDescending"] is True
+    
+    # A change to the orders serves the old snapshot as stale while it is rebuilt
+    previous = await analytics.snapshot()
+    client.data_versions.bump(ORDERS)
+    with track_freshness() as freshness:
+        assert await analytics.snapshot() is previous
+    assert freshness.reason == REVALIDATING
+    
+    rebuilt = await analytics.refresh()
+    with track_freshness() as freshness:
+        assert await analytics.snapshot() is rebuilt
+    assert not freshness.stale
+    assert len(requests) == 2
+    await client.close()
+
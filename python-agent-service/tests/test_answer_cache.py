@@ -0,0 +1,113 @@
+"""
+Tests for the agent answer cache and the data versions it is invalidated by.
+"""
+
+import httpx
+import pytest
+
+from app.agents.answer_cache import AnswerCache, normalize_query
+from app.printavo.api import PrintavoAPIClient
+from app.printavo.versions import track_reads
+
+
+class FakeClock:
+    """Manually advanced time source."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_client() -> PrintavoAPIClient:
+    """Create a client whose lookups of 1234 find an order."""
+    def handler(request):
+        node = {"id": "o1", "visualId": "1234", "status": {"name": "In Production"}}
+        return httpx.Response(200, json={"data": {
+            "invoices": {"edges": [{"node": node}]},
+            "v0": {"edges": [{"node": node}]},
+            "statuses": {"edges": []}
+        }})
+    return PrintavoAPIClient(email="test@example.com", token="t", transport=httpx.MockTransport(handler))
+
+
+def test_normalize_query():
+    """Test that trivially different phrasings normalise alike."""
+    assert normalize_query("What's due  this week?") == normalize_query("whats due this week")
+    assert normalize_query("Status of #1234.") == "status of 1234"
+    assert normalize_query("Orders over $1,000.50 since 2024-03-01") == "orders over $1 000.50 since 2024-03-01"
+
+
+def test_key_separates_filters_and_tenants():
+    """Test that answers aren't shared between filters or tenants."""
+    cache = AnswerCache()
+    key = cache.key("Status of 1234?", True, True)
+    assert key == cache.key("status of 1234", True, True)
+    assert key != cache.key("status of 1234", False, True)
+    assert key != cache.key("status of 1234", True, True, tenant_id="a")
+
+
+@pytest.mark.asyncio
+async def test_answer_is_dropped_when_its_order_changes():
+    """Test that an answer depends only on the data its tools read."""
+    client = make_client()
+    cache = AnswerCache()
+    
+    with track_reads() as reads:
+        await client.get_order_by_visual_id("1234", transform=lambda node: node)
+    cache.set("status", {"response": "In Production"}, reads)
+    with track_reads() as reads:
+        await client.get_statuses()
+    cache.set("statuses", {"response": "In Production, Done"}, reads)
+    
+    # Another order changing doesn't affect either answer
+    client.invalidate_orders({"o2": "5678"})
+    assert cache.get("status") == {"response": "In Production"}
+    assert cache.get("statuses") is not None
+    
+    client.invalidate_orders({"o1": "1234"})
+    assert cache.get("status") is None
+    assert cache.get("statuses") is not None
+    
+    client.invalidate_cache("GetStatuses")
+    assert cache.get("statuses") is None
+    assert cache.get_stats()["invalidations"] == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_order_search_answers_are_dropped_on_any_order_change():
+    """Test that answers from order searches follow every order change."""
+    client = make_client()
+    cache = AnswerCache()
+    
+    with track_reads() as reads:
+        await client.get_orders(query="acme")
+    cache.set("acme", {"response": "none"}, reads)
+    client.invalidate_orders({"o2": None})
+    assert cache.get("acme") is None
+    await client.close()
+
+
+def test_ttl_lru_and_uncacheable_answers():
+    """Test expiry, eviction and answers that mustn't be cached."""
+    clock = FakeClock()
+    cache = AnswerCache(ttl=60, max_entries=2, clock=clock)
+    
+    with track_reads() as reads:
+        pass
+    cache.set("a", {"response": "a"}, reads)
+    cache.set("b", {"response": "b"}, reads)
+    assert cache.get("a") is not None
+    cache.set("c", {"response": "c"}, reads)
+    assert cache.get("b") is None
+    assert cache.get_stats()["evictions"] == 1
+    
+    clock.now = 60
+    assert cache.get("a") is None
+    assert cache.get_stats()["expirations"] == 1
+    
+    reads.cacheable = False
+    cache.set("d", {"response": "d"}, reads)
+    assert len(cache) == 1
@@ -0,0 +1,188 @@
+"""
+Tests for the Printavo circuit breaker and stale-while-revalidate serving.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.printavo.api import PrintavoAPIClient
+from app.printavo.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.printavo.errors import CircuitOpenError, PrintavoAPIError
+from app.printavo.freshness import REVALIDATING, UNAVAILABLE, track_freshness
+
+
+class FakeClock:
+    """Manually advanced time source."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+STATUSES_QUERY = "query GetStatuses { statuses { edges { node { id name color } } } }"
+
+
+def make_client(handler) -> PrintavoAPIClient:
+    """Create a client that doesn't retry, with a manually advanced cache clock."""
+    client = PrintavoAPIClient(
+        api_url="https://printavo.test/api/v2",
+        email="test@example.com",
+        token="test-token",
+        transport=httpx.MockTransport(handler)
+    )
+    client._scheduler.max_retries = 0
+    client.cache.clock = FakeClock()
+    return client
+
+
+def test_breaker_opens_on_failure_rate_and_recovers_after_probe():
+    """Test the closed -> open -> half-open -> closed cycle."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_rate=0.5, window_size=4, min_calls=4, open_seconds=30, clock=clock)
+    
+    for ok in (True, False, True):
+        breaker.record(ok, 0.1)
+    assert breaker.state == CLOSED
+    
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after == 30
+    
+    clock.now = 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    # Only one probe at a time
+    assert not breaker.allow()
+    
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.get_stats()["opened"] == 1
+    assert breaker.get_stats()["rejected"] == 2
+
+
+def test_slow_calls_count_as_failures_and_failed_probes_reopen():
+    """Test that slow successes open the circuit and a failed probe reopens it."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(slow_call_seconds=5, window_size=2, min_calls=2, open_seconds=10, clock=clock)
+    
+    breaker.record(True, 6)
+    breaker.record(True, 7)
+    assert breaker.state == OPEN
+    
+    clock.now = 10
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    assert breaker.retry_after == 10
+
+
+def test_disabled_breaker_never_rejects():
+    """Test that a disabled breaker lets every request through."""
+    breaker = CircuitBreaker(enabled=False, window_size=1, min_calls=1)
+    breaker.record(False, 0.1)
+    assert breaker.allow()
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast_without_sending():
+    """Test that requests are rejected without reaching Printavo while the circuit is open."""
+    calls = []
+    
+    def handler(request):
+        calls.append(request)
+        raise httpx.ConnectError("down")
+        
+    client = make_client(handler)
+    client.breaker = CircuitBreaker(window_size=2, min_calls=2)
+    
+    for _ in range(2):
+        with pytest.raises(PrintavoAPIError):
+            await client.execute_graphql("query Ping { ok }", operation_name="Ping")
+    with pytest.raises(CircuitOpenError):
+        await client.execute_graphql("query Ping { ok }", operation_name="Ping")
+        
+    assert len(calls) == 2
+    assert client.get_stats()["circuit_breaker"]["state"] == OPEN
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_expired_response_is_served_while_revalidating():
+    """Test that an expired response is returned at once and refreshed in the background."""
+    names = iter(["Old", "New"])
+    client = make_client(lambda request: httpx.Response(200, json={"data": {"name": next(names)}}))
+    client._cache_ttls = {"GetStatuses": 10}
+    
+    assert await client.execute_graphql(STATUSES_QUERY, operation_name="GetStatuses") == {"name": "Old"}
+    client.cache.clock.now = 25
+    
+    with track_freshness() as freshness:
+        assert await client.execute_graphql(STATUSES_QUERY, operation_name="GetStatuses") == {"name": "Old"}
+    assert freshness.to_dict() == {"stale": True, "age_seconds": 25, "reason": REVALIDATING}
+    
+    await asyncio.gather(*client._revalidating.values())
+    with track_freshness() as freshness:
+        assert await client.execute_graphql(STATUSES_QUERY, operation_name="GetStatuses") == {"name": "New"}
+    assert not freshness.stale
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_expired_response_is_served_while_printavo_is_down():
+    """Test that the last good response replaces a failed request once the circuit has opened."""
+    healthy = True
+    
+    def handler(request):
+        if not healthy:
+            raise httpx.ConnectError("down")
+        return httpx.Response(200, json={"data": {"name": "Old"}})
+        
+    client = make_client(handler)
+    client._cache_ttls = {"GetStatuses": 10}
+    client.breaker = CircuitBreaker(window_size=1, min_calls=1)
+    
+    await client.execute_graphql(STATUSES_QUERY, operation_name="GetStatuses")
+    healthy = False
+    with pytest.raises(PrintavoAPIError):
+        await client.execute_graphql("query Ping { ok }", operation_name="Ping")
+    client.cache.clock.now = 60
+    
+    with track_freshness() as freshness:
+        assert await client.execute_graphql(STATUSES_QUERY, operation_name="GetStatuses") == {"name": "Old"}
+    assert freshness.to_dict() == {"stale": True, "age_seconds": 60, "reason": UNAVAILABLE}
+    assert client._revalidating == {}
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_order_search_is_not_cached_as_fresh():
+    """Test that repeating a search answered with stale data still reports it as stale."""
+    healthy = True
+    
+    def handler(request):
+        if not healthy:
+            raise httpx.ConnectError("down")
+        return httpx.Response(200, json={"data": {"orders": {"edges": [{"node": {"id": "o1", "visualId": "1001"}}]}}})
+        
+    client = make_client(handler)
+    client._cache_ttls = {"SearchOrders": 10}
+    client.search_cache.clock = client.cache.clock
+    client.breaker = CircuitBreaker(window_size=1, min_calls=1)
+    
+    await client.get_orders("shirts", transform=lambda node: node)
+    healthy = False
+    with pytest.raises(PrintavoAPIError):
+        await client.execute_graphql("query Ping { ok }", operation_name="Ping")
+    client.cache.clock.now = 60
+    
+    for _ in range(2):
+        with track_freshness() as freshness:
+            assert await client.get_orders("shirts", transform=lambda node: node) == [{"id": "o1", "visualId": "1001"}]
+        assert freshness.to_dict() == {"stale": True, "age_seconds": 60, "reason": UNAVAILABLE}
+    await client.close()
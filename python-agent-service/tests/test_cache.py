@@ -0,0 +1,98 @@
+"""
+Tests for the Printavo response cache.
+"""
+
+from app.printavo.cache import ResponseCache, parse_ttls
+
+
+class FakeClock:
+    """Manually advanced time source."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    """Test that entries are served until their TTL elapses."""
+    clock = FakeClock()
+    cache = ResponseCache(clock=clock)
+    cache.set("GetStatuses::abc", {"statuses": []}, ttl=10)
+    
+    clock.now = 9
+    assert cache.get("GetStatuses::abc") == {"statuses": []}
+    
+    clock.now = 10
+    assert cache.get("GetStatuses::abc") is None
+    assert cache.stats["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    """Test LRU eviction on the entry limit."""
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+    
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.stats["evictions"] == 1
+
+
+def test_size_limit_in_bytes_is_enforced():
+    """Test eviction on the byte limit and rejection of oversized values."""
+    cache = ResponseCache(max_bytes=30)
+    cache.set("a", "x" * 10, ttl=60)
+    cache.set("b", "y" * 10, ttl=60)
+    cache.set("c", "z" * 10, ttl=60)
+    cache.set("huge", "w" * 100, ttl=60)
+    
+    assert "a" not in cache
+    assert "b" in cache and "c" in cache
+    assert "huge" not in cache
+    assert cache.get_stats()["bytes"] <= 30
+
+
+def test_prefix_invalidation():
+    """Test invalidating every entry for an operation."""
+    cache = ResponseCache()
+    cache.set('GetOrderByVisualId:{"query":"1"}:abc', 1, ttl=60)
+    cache.set('GetOrderByVisualId:{"query":"2"}:abc', 2, ttl=60)
+    cache.set("GetStatuses::abc", 3, ttl=60)
+    
+    assert cache.invalidate_prefix("GetOrderByVisualId:") == 2
+    assert cache.invalidate("GetStatuses::abc") is True
+    assert len(cache) == 0
+
+
+def test_zero_ttl_is_not_cached():
+    """Test that operations without a TTL are never stored."""
+    cache = ResponseCache()
+    cache.set("a", 1, ttl=0)
+    assert len(cache) == 0
+
+
+def test_parse_ttls():
+    """Test parsing per-operation TTL settings."""
+    assert parse_ttls("GetStatuses=3600, SearchOrders=30,bogus") == {"GetStatuses": 3600.0, "SearchOrders": 30.0}
+
+
+def test_expired_entries_are_kept_for_their_stale_window():
+    """Test that get_stale() serves an expired entry until its stale window ends."""
+    clock = FakeClock()
+    cache = ResponseCache(clock=clock)
+    cache.set("GetStatuses::abc", {"statuses": []}, ttl=10, stale_ttl=20)
+    
+    clock.now = 15
+    assert cache.get("GetStatuses::abc") is None
+    assert cache.get_stale("GetStatuses::abc") == ({"statuses": []}, 15)
+    
+    clock.now = 30
+    assert cache.get_stale("GetStatuses::abc") is None
+    assert cache.get("GetStatuses::abc") is None
+    assert len(cache) == 0
@@ -0,0 +1,124 @@
+"""
+Tests for the streaming order export.
+"""
+
+import csv
+import gzip
+import io
+import json
+
+import httpx
+import pytest
+
+from app.api.export import EXPORT_COLUMNS, export_orders, gzip_stream
+from app.printavo.api import PrintavoAPIClient
+from app.printavo.errors import PrintavoAPIError
+
+
+def make_order_node(n: int) -> dict:
+    return {
+        "id": f"order{n}",
+        "name": f"Order {n}",
+        "visualId": str(1000 + n),
+        "createdAt": "2024-01-01T00:00:00Z",
+        "total": n,
+        "status": {"name": "In Production"},
+        "customer": {"id": "c1", "name": "Acme, Inc."}
+    }
+
+
+def make_client(total: int, requests: list, fail_after: int = None) -> PrintavoAPIClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        variables = json.loads(request.content)["variables"]
+        requests.append(variables)
+        start = int(variables.get("after") or 0)
+        if fail_after is not None and start >= fail_after:
+            return httpx.Response(400, json={"errors": [{"message": "bad cursor"}]})
+        end = min(start + variables["first"], total)
+        return httpx.Response(200, json={"data": {"orders": {
+            "pageInfo": {"hasNextPage": end < total, "endCursor": str(end)},
+            "edges": [{"node": make_order_node(n)} for n in range(start, end)]
+        }}})
+        
+    return PrintavoAPIClient(
+        api_url="https://printavo.test/api/v2",
+        email="test@example.com",
+        token="test-token",
+        transport=httpx.MockTransport(handler)
+    )
+
+
+async def collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export_streams_every_page_with_resume_cursors():
+    requests = []
+    client = make_client(250, requests)
+    
+    chunks = [chunk async for chunk in export_orders(client, "ndjson")]
+    rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    
+    assert len(chunks) == 3
+    assert len(rows) == 250
+    assert list(rows[0]) == EXPORT_COLUMNS
+    assert rows[0]["customer"] == "Acme, Inc."
+    assert {row["cursor"] for row in rows} == {"", "100", "200"}
+    
+    # Resuming from the last row's cursor re-sends only that page
+    resumed = await collect(export_orders(client, "ndjson", cursor=rows[-1]["cursor"]))
+    assert [json.loads(line)["id"] for line in resumed.splitlines()] == [f"order{n}" for n in range(200, 250)]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_csv_export_has_one_header_and_respects_limit():
+    client = make_client(250, [])
+    
+    body = await collect(export_orders(client, "csv", limit=120))
+    rows = list(csv.DictReader(io.StringIO(body.decode("utf-8"))))
+    
+    assert len(rows) == 120
+    assert list(rows[0]) == EXPORT_COLUMNS
+    assert rows[119]["id"] == "order119"
+    assert rows[0]["customer"] == "Acme, Inc."
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_interrupted_ndjson_export_reports_resume_cursor():
+    client = make_client(250, [], fail_after=100)
+    
+    lines = (await collect(export_orders(client, "ndjson"))).splitlines()
+    
+    assert len(lines) == 101
+    assert json.loads(lines[-1])["cursor"] == "100"
+    assert "error" in json.loads(lines[-1])
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_interrupted_csv_export_aborts():
+    client = make_client(250, [], fail_after=100)
+    chunks = []
+    
+    with pytest.raises(PrintavoAPIError):
+        async for chunk in export_orders(client, "csv"):
+            chunks.append(chunk)
+            
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert len(rows) == 100
+    assert rows[-1]["cursor"] == ""
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_gzip_stream_flushes_each_chunk():
+    async def chunks():
+        for n in range(3):
+            yield f"line {n}\n".encode("utf-8") * 100
+            
+    compressed = [chunk async for chunk in gzip_stream(chunks())]
+    
+    assert len(compressed) == 4
+    assert gzip.decompress(b"".join(compressed)).count(b"\n") == 300
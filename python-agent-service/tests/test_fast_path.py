@@ -0,0 +1,123 @@
+"""
+Tests for the deterministic fast path in front of the agent.
+"""
+
+import pytest
+
+from app.agents.fast_path import FastPathRouter
+from app.printavo.freshness import UNAVAILABLE, record_stale
+
+ORDER = {
+    "id": "o1",
+    "name": "Team Shirts",
+    "visualId": "1234",
+    "date": "2023-03-15T10:00:00Z",
+    "status": "In Production",
+    "customer": "Acme",
+    "total": 1234.5,
+    "customerId": None
+}
+
+
+def make_router(order=ORDER, statuses=None) -> FastPathRouter:
+    """Create a router whose tools return fixed results and record their calls."""
+    calls = []
+    
+    async def get_order_by_visual_id(visual_id):
+        calls.append(("get_order_by_visual_id", visual_id))
+        return order
+    
+    async def get_statuses():
+        calls.append(("get_statuses",))
+        return statuses if statuses is not None else [{"name": "New"}, {"name": "In Production"}, {"name": "Done"}]
+        
+    router = FastPathRouter({"get_order_by_visual_id": get_order_by_visual_id, "get_statuses": get_statuses})
+    router.calls = calls
+    return router
+
+
+@pytest.mark.parametrize("query, intent, args", [
+    ("Show me order #1234", "order_lookup", {"visual_id": "1234"}),
+    ("order 1234", "order_lookup", {"visual_id": "1234"}),
+    ("pull up invoice no. 1234", "order_lookup", {"visual_id": "1234"}),
+    ("What's the status of 1234?", "order_status", {"visual_id": "1234"}),
+    ("status for order 1234", "order_status", {"visual_id": "1234"}),
+    ("List statuses", "statuses", {}),
+    ("what are the available order statuses?", "statuses", {}),
+    ("What statuses are there", "statuses", {})
+])
+def test_simple_questions_match(query, intent, args):
+    """Test the phrasings each intent recognises."""
+    matched = make_router().match(query)
+    assert matched is not None
+    assert (matched[0].name, matched[1]) == (intent, args)
+
+
+@pytest.mark.parametrize("query", [
+    "Show me order 1234 and 5678",
+    "Which orders are overdue?",
+    "What's the status of Acme's order?",
+    "Compare order 1234 to last year",
+    "statuses of orders due this week"
+])
+def test_other_questions_are_left_to_the_agent(query):
+    """Test that anything beyond a whole-question match escalates."""
+    assert make_router().match(query) is None
+
+
+@pytest.mark.asyncio
+async def test_route_renders_templates():
+    """Test the templated answers."""
+    router = make_router()
+    
+    assert await router.route("show order 1234") == (
+        "Order 1234 (Team Shirts) for Acme is In Production. "
+        "It was created on March 15, 2023. The total is $1,234.50."
+    )
+    assert await router.route("status of 1234") == "Order 1234 is currently In Production."
+    assert await router.route("list statuses") == "The available order statuses are New, In Production and Done."
+    assert router.calls == [("get_order_by_visual_id", "1234"), ("get_order_by_visual_id", "1234"), ("get_statuses",)]
+
+
+@pytest.mark.asyncio
+async def test_not_found_is_answered_and_failures_escalate():
+    """Test that a missing order is a confident answer but a failed lookup isn't."""
+    router = make_router(order={"error": "No order found with visual ID: 99"})
+    assert await router.route("order 99") == "I couldn't find an order with visual ID 99."
+    
+    router = make_router(order={"error": "Failed to retrieve order: timed out"})
+    assert await router.route("order 99") is None
+    assert router.get_stats()["fallbacks"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_data_is_noted():
+    """Test that answers from stale data say how old it is."""
+    async def get_statuses():
+        record_stale(600, UNAVAILABLE)
+        return [{"name": "New"}]
+        
+    router = FastPathRouter({"get_statuses": get_statuses})
+    assert await router.route("list statuses") == (
+        "The only order status is New. "
+        "This is based on data from about 10 minutes ago, as Printavo is currently unavailable."
+    )
+
+
+@pytest.mark.asyncio
+async def test_hit_rate_metrics():
+    """Test the share of questions answered without the model."""
+    router = make_router()
+    for query in ("order 1234", "list statuses", "what's overdue?", "order 1234"):
+        await router.route(query)
+        
+    stats = router.get_stats()
+    assert stats["queries"] == 4
+    assert stats["hits"] == 3
+    assert stats["unmatched"] == 1
+    assert stats["hit_rate"] == 0.75
+    assert stats["intents"] == {"order_status": 0, "order_lookup": 2, "statuses": 1}
+    
+    router.enabled = False
+    assert await router.route("order 1234") is None
+    assert router.get_stats()["queries"] == 4
@@ -0,0 +1,126 @@
+"""
+Tests for structured order filters.
+"""
+
+import json
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.printavo.api import PrintavoAPIClient
+from app.printavo.filters import OrderFilters
+
+
+def make_client(handler) -> PrintavoAPIClient:
+    return PrintavoAPIClient(
+        api_url="https://printavo.test/api/v2",
+        email="test@example.com",
+        token="test-token",
+        transport=httpx.MockTransport(handler)
+    )
+
+
+def test_tool_args_compile_to_graphql_variables():
+    filters = OrderFilters.from_tool_args(
+        production_after="2024-03-01",
+        production_before="2024-03-31",
+        sort_by="due_date",
+        sort_descending=True
+    )
+    
+    assert filters.variables() == {
+        "sortOn": "CUSTOMER_DUE_AT",
+        "sortDescending": True,
+        "inProductionAfter": "2024-03-01T00:00:00Z",
+        "inProductionBefore": "2024-03-31T23:59:59Z"
+    }
+    assert not filters.has_local_filters
+    assert OrderFilters.from_tool_args().empty
+    
+    with pytest.raises(ValueError, match="sort_by"):
+        OrderFilters.from_tool_args(sort_by="colour")
+
+
+@pytest.mark.asyncio
+async def test_supported_filters_are_sent_with_the_search():
+    bodies = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"data": {"orders": {"edges": []}}})
+        
+    client = make_client(handler)
+    filters = OrderFilters.from_tool_args(production_after="2024-03-01", sort_by="total", sort_descending=True)
+    
+    await client.get_orders("acme", first=5, filters=filters)
+    await client.get_orders("acme", first=5, filters=filters)
+    
+    assert bodies[0]["operationName"] == "SearchOrders"
+    assert bodies[0]["variables"] == {
+        "query": "acme -status:completed -status:quote",
+        "first": 5,
+        "sortOn": "TOTAL",
+        "sortDescending": True,
+        "inProductionAfter": "2024-03-01T00:00:00Z"
+    }
+    assert "sortOn: $sortOn" in bodies[0]["query"]
+    # Filtered searches aren't answered from the unfiltered search cache
+    assert client.search_cache.get_stats()["entries"] == 0
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_local_filters_page_until_enough_orders_match():
+    bodies = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        bodies.append(body)
+        start = int(body["variables"].get("after") or 0)
+        nodes = [
+            {"id": f"order{n}", "total": n * 10, "customer": {"id": "acme" if n % 3 == 0 else "globex"}}
+            for n in range(start, start + body["variables"]["first"])
+        ]
+        return httpx.Response(200, json={"data": {"orders": {
+            "pageInfo": {"hasNextPage": True, "endCursor": str(start + len(nodes))},
+            "edges": [{"node": node} for node in nodes]
+        }}})
+        
+    client = make_client(handler)
+    filters = OrderFilters(customer_id="acme", min_total=100)
+    
+    orders = await client.get_orders(first=12, fields=("id",), filters=filters)
+    
+    assert [order["id"] for order in orders] == [f"order{n}" for n in range(12, 48, 3)]
+    assert orders[0] == {"id": "order12"}
+    assert all(body["operationName"] == "OrdersPage" for body in bodies)
+    assert len(bodies) == 2
+    assert "customer {" in bodies[0]["query"] and "total" in bodies[0]["query"]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_local_filter_scan_reports_truncation(monkeypatch):
+    monkeypatch.setattr(settings, "printavo_filter_max_scan", 20)
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        start = int(body["variables"].get("after") or 0)
+        nodes = [{"id": f"order{n}", "total": n} for n in range(start, start + body["variables"]["first"])]
+        return httpx.Response(200, json={"data": {"orders": {
+            "pageInfo": {"hasNextPage": True, "endCursor": str(start + len(nodes))},
+            "edges": [{"node": node} for node in nodes]
+        }}})
+        
+    client = make_client(handler)
+    
+    orders = await client.get_orders(first=5, fields=("id",), filters=OrderFilters(min_total=15))
+    assert len(orders) == 5
+    assert orders.truncated is False
+    
+    # Only orders 15-19 match within the first 20 scanned
+    orders = await client.get_orders(first=10, fields=("id",), filters=OrderFilters(min_total=15))
+    assert [order["id"] for order in orders] == [f"order{n}" for n in range(15, 20)]
+    assert orders.truncated is True
+    await client.close()
@@ -0,0 +1,101 @@
+"""
+Tests for hedged Printavo requests.
+"""
+
+import asyncio
+import pytest
+from app.printavo.hedging import Hedger, LatencyHistogram
+
+
+def make_hedger(**kwargs) -> Hedger:
+    """Create an enabled hedger that has seen ten fast GetStatuses requests."""
+    options = {"enabled": True, "percentile": 0.9, "budget": 1.0, "min_samples": 10}
+    options.update(kwargs)
+    hedger = Hedger(**options)
+    for _ in range(10):
+        hedger.record("GetStatuses", 0.01)
+    return hedger
+
+
+def test_histogram_percentiles():
+    """Test percentile estimates from recorded latencies."""
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.record(0.01)
+    for _ in range(10):
+        histogram.record(1.0)
+    
+    assert 0.01 <= histogram.percentile(0.5) < 0.0125
+    assert 1.0 <= histogram.percentile(0.99) < 1.25
+    assert LatencyHistogram().percentile(0.5) is None
+
+
+def test_histogram_decays():
+    """Test that old observations are halved once the sample limit is reached."""
+    histogram = LatencyHistogram(max_samples=10)
+    for _ in range(10):
+        histogram.record(0.01)
+    assert histogram.count == 5
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged_and_loser_cancelled():
+    """Test that the hedge wins when the primary is slow."""
+    hedger = make_hedger()
+    calls = []
+    cancelled = []
+    
+    async def fn():
+        calls.append(1)
+        try:
+            await asyncio.sleep(1.0 if len(calls) == 1 else 0.0)
+        except asyncio.CancelledError:
+            cancelled.append(len(calls))
+            raise
+        return len(calls)
+    
+    assert await hedger.run("GetStatuses", fn) == 2
+    await asyncio.sleep(0)
+    
+    assert len(calls) == 2
+    assert cancelled
+    assert hedger.stats["hedged"] == 1
+    assert hedger.stats["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_hedge_without_history_budget_or_permission():
+    """Test the conditions that prevent hedging."""
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "ok"
+    
+    hedger = make_hedger()
+    assert await hedger.run("Unknown", slow) == "ok"
+    assert await hedger.run("GetStatuses", slow, allow_hedge=lambda: False) == "ok"
+    assert hedger.stats["hedged"] == 0
+    
+    hedger = make_hedger(budget=0.0)
+    assert await hedger.run("GetStatuses", slow) == "ok"
+    assert hedger.stats["hedged"] == 0
+    
+    hedger = make_hedger(enabled=False)
+    assert await hedger.run("GetStatuses", slow) == "ok"
+    assert hedger.stats["hedged"] == 0
+    assert hedger.histograms["GetStatuses"].count == 11
+
+
+@pytest.mark.asyncio
+async def test_failed_hedge_falls_back_to_primary():
+    """Test that a failing hedge doesn't hide a successful primary."""
+    hedger = make_hedger()
+    calls = []
+    
+    async def fn():
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("hedge failed")
+        await asyncio.sleep(0.05)
+        return "primary"
+    
+    assert await hedger.run("GetStatuses", fn) == "primary"
@@ -0,0 +1,150 @@
+"""
+Tests for the visual ID to order ID index.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.printavo.api import PrintavoAPIClient
+from app.printavo.id_index import VisualIdIndex
+
+
+def make_invoice_node(visual_id: str, order_id: str = None) -> dict:
+    return {
+        "id": order_id or f"invoice{visual_id}",
+        "name": f"Invoice {visual_id}",
+        "visualId": visual_id,
+        "createdAt": "2023-01-01",
+        "updatedAt": "2023-01-02",
+        "total": 50.0,
+        "status": {"id": "status1", "name": "In Progress", "color": "blue"},
+        "contact": {"id": "contact1", "fullName": "Jane Doe", "email": "jane@example.com"}
+    }
+
+
+def make_client(handler) -> PrintavoAPIClient:
+    return PrintavoAPIClient(
+        api_url="https://printavo.test/api/v2",
+        email="test@example.com",
+        token="test-token",
+        transport=httpx.MockTransport(handler)
+    )
+
+
+@pytest.mark.asyncio
+async def test_index_is_persisted_in_batches(tmp_path):
+    path = str(tmp_path / "visual_ids.db")
+    index = VisualIdIndex(path, flush_delay=0.01)
+    
+    # Recorded before the database is opened, written once it is
+    assert index.record([{"id": "a", "visualId": "1001"}, {"id": "b"}, None]) == 1
+    await index.open()
+    assert index.record([{"id": "a", "visualId": "1001"}]) == 0
+    assert index.record([{"id": "c", "visualId": "1003"}]) == 1
+    await asyncio.sleep(0.05)
+    assert index.get_stats()["flushes"] == 1
+    assert index.get_stats()["pending_writes"] == 0
+    index.invalidate("1003")
+    await index.close()
+    
+    reopened = VisualIdIndex(path)
+    assert "1001" not in reopened
+    await reopened.open()
+    assert reopened.get("1001") == "a"
+    assert "1003" not in reopened
+    await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_in_memory_index_creates_no_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    index = VisualIdIndex()
+    await index.open()
+    index.record([{"id": "a", "visualId": "1001"}])
+    await index.close()
+    
+    assert index.get("1001") == "a"
+    assert index.get_stats()["pending_writes"] == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_orders_seen_are_then_fetched_by_id():
+    """Test that a visual ID seen in an order listing is fetched by ID."""
+    bodies = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        bodies.append(body)
+        if body["operationName"] == "SearchOrders":
+            nodes = [{"id": "order7", "visualId": "1007", "name": "Shirts"}]
+            return httpx.Response(200, json={"data": {"orders": {"edges": [{"node": n} for n in nodes]}}})
+        return httpx.Response(200, json={"data": {"invoice": make_invoice_node("1007", "order7")}})
+        
+    client = make_client(handler)
+    await client.get_orders("shirts", fields=("id", "visualId", "name"))
+    order = await client.get_order_by_visual_id("1007")
+    
+    assert order["id"] == "order7"
+    assert bodies[1]["operationName"] == "GetInvoiceById"
+    assert bodies[1]["variables"] == {"id": "order7"}
+    
+    # The by-ID result is cached like a search result
+    await client.get_order_by_visual_id("1007")
+    assert len(bodies) == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_known_lookups_are_batched_by_id():
+    bodies = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        bodies.append(body)
+        data = {
+            f"o{name[2:]}": make_invoice_node(order_id[len("order"):], order_id)
+            for name, order_id in body["variables"].items()
+        }
+        return httpx.Response(200, json={"data": data})
+        
+    client = make_client(handler)
+    client.visual_ids.record([{"id": "order1001", "visualId": "1001"}, {"id": "order1002", "visualId": "1002"}])
+    
+    orders = await asyncio.gather(client.get_order_by_visual_id("1001"), client.get_order_by_visual_id("1002"))
+    
+    assert [order["visualId"] for order in orders] == ["1001", "1002"]
+    assert len(bodies) == 1
+    assert bodies[0]["operationName"] == "GetInvoicesByIds"
+    await client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("by_id_response", [
+    {"data": {"invoice": None}},
+    {"data": {"invoice": make_invoice_node("9999", "old")}},
+    {"errors": [{"message": "Invoice not found"}]},
+])
+async def test_stale_mapping_falls_back_to_search(by_id_response):
+    """Test that a missing, renumbered or unfetchable order is resolved by search."""
+    operations = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        operations.append(body["operationName"])
+        if body["operationName"] == "GetInvoiceById":
+            return httpx.Response(200, json=by_id_response)
+        return httpx.Response(200, json={"data": {"invoices": {"edges": [{"node": make_invoice_node("1001", "new")}]}}})
+        
+    client = make_client(handler)
+    client.visual_ids.record([{"id": "old", "visualId": "1001"}])
+    
+    order = await client.get_order_by_visual_id("1001")
+    
+    assert order["id"] == "new"
+    assert operations == ["GetInvoiceById", "GetOrderByVisualId"]
+    assert client.visual_ids.get("1001") == "new"
+    await client.close()
@@ -0,0 +1,49 @@
+"""
+Tests for the JSON codec.
+"""
+
+import json
+
+import pytest
+
+from app import json_codec
+from app.json_codec import FastJSONResponse
+from app.printavo.orders import OrderRecord
+
+
+@pytest.fixture(params=["accelerated", "stdlib"])
+def codec(request, monkeypatch):
+    """Run each test with and without the accelerated backend."""
+    if request.param == "stdlib":
+        monkeypatch.setattr(json_codec, "orjson", None)
+    elif json_codec.orjson is None:
+        pytest.skip("orjson is not installed")
+    return json_codec
+
+
+def test_round_trip(codec):
+    value = {"orders": [{"id": "1", "name": "Café shirts", "total": 12.5, "tags": None}]}
+    
+    encoded = codec.dumps(value)
+    
+    assert isinstance(encoded, bytes)
+    assert b" " not in encoded.replace(b"Caf\xc3\xa9 shirts", b"")
+    assert codec.loads(encoded) == value
+    assert codec.loads(encoded.decode("utf-8")) == value
+    assert json.loads(codec.dumps_str(value)) == value
+
+
+def test_encodes_records_and_unknown_types(codec):
+    record = OrderRecord(id="1", name="Shirts", visual_id="1001", date="2025-01-01",
+                         status="Quote", customer="Acme", total=10.0)
+    
+    decoded = codec.loads(codec.dumps({"order": record}))
+    
+    assert decoded["order"] == record.to_dict()
+
+
+def test_response_renders_compact_json(codec):
+    response = FastJSONResponse({"status": "ok", "count": 2})
+    
+    assert response.body == b'{"status":"ok","count":2}'
+    assert response.media_type == "application/json"
@@ -0,0 +1,254 @@
+"""
+Tests for the local SQLite order mirror.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.printavo.api import PrintavoAPIClient
+from app.printavo.mirror import OrderMirror
+from app.printavo.orders import OrderRecord
+
+
+def make_node(n: int, updated_at: str, status: str = "In Production", customer: str = "Acme") -> dict:
+    """Build a raw order node with every mirrored field."""
+    return {
+        "id": f"order{n}",
+        "name": f"Order {n}",
+        "visualId": str(1000 + n),
+        "createdAt": f"2024-01-{n:02d}T00:00:00Z",
+        "updatedAt": updated_at,
+        "dueDate": None,
+        "total": 10.0 * n,
+        "status": {"id": status.lower(), "name": status, "color": "blue"},
+        "customer": {"id": "c1", "name": customer, "email": f"team@{customer.lower()}.test"}
+    }
+
+
+class FakePrintavo:
+    """Serves OrdersPage requests from a list of order nodes."""
+    
+    def __init__(self, nodes):
+        self.nodes = {node["id"]: node for node in nodes}
+        self.requests = []
+        self.sort_key = "updatedAt"
+    
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(body)
+        variables = body["variables"]
+        
+        if body["operationName"] != "OrdersPage":
+            return httpx.Response(200, json={"data": {"orders": {"edges": []}, "invoices": {"edges": []}}})
+            
+        nodes = sorted(self.nodes.values(), key=lambda node: node[self.sort_key], reverse=True)
+        start = int(variables.get("after") or 0)
+        page = nodes[start:start + variables["first"]]
+        end = start + len(page)
+        return httpx.Response(200, json={"data": {"orders": {
+            "pageInfo": {"hasNextPage": end < len(nodes), "endCursor": str(end)},
+            "edges": [{"node": node} for node in page]
+        }}})
+
+
+def make_client(fake: FakePrintavo, mirror: OrderMirror) -> PrintavoAPIClient:
+    return PrintavoAPIClient(
+        api_url="https://printavo.test/api/v2",
+        email="test@example.com",
+        token="test-token",
+        transport=httpx.MockTransport(fake),
+        mirror=mirror
+    )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_backfill_then_incremental_sync():
+    """Test that the first sync backfills and later syncs stop at the watermark."""
+    fake = FakePrintavo([make_node(n, f"2024-02-{n:02d}T00:00:00Z") for n in range(1, 8)])
+    clock = FakeClock()
+    mirror = OrderMirror(page_size=3, clock=clock)
+    client = make_client(fake, mirror)
+    
+    assert await mirror.sync(client) == 7
+    assert len(fake.requests) == 3
+    assert fake.requests[0]["variables"]["sortOn"] == "UPDATED_AT"
+    assert fake.requests[0]["variables"]["sortDescending"] is True
+    assert mirror.watermark == "2024-02-07T00:00:00Z"
+    
+    fake.nodes["order2"] = make_node(2, "2024-03-01T00:00:00Z", status="Completed")
+    fake.requests.clear()
+    clock.now += 60
+    
+    await mirror.sync(client)
+    
+    # Only the first page is needed to reach the watermark
+    assert len(fake.requests) == 1
+    assert mirror.watermark == "2024-03-01T00:00:00Z"
+    assert mirror.get_by_visual_id("1002")["status"]["name"] == "Completed"
+    assert mirror.get_stats()["full_syncs"] == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_full_sync_drops_deleted_orders():
+    """Test that a full sync removes orders that no longer exist."""
+    fake = FakePrintavo([make_node(n, f"2024-02-{n:02d}T00:00:00Z") for n in range(1, 4)])
+    clock = FakeClock()
+    mirror = OrderMirror(full_sync_interval=3600, clock=clock)
+    client = make_client(fake, mirror)
+    
+    await mirror.sync(client)
+    del fake.nodes["order1"]
+    clock.now += 3600
+    await mirror.sync(client)
+    
+    assert len(mirror) == 2
+    assert mirror.get_by_visual_id("1001") is None
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_reads_are_served_from_a_fresh_mirror():
+    """Test that get_orders and visual ID lookups use the mirror while it is fresh."""
+    fake = FakePrintavo([
+        make_node(1, "2024-02-01T00:00:00Z", status="Completed"),
+        make_node(2, "2024-02-02T00:00:00Z", customer="Globex"),
+        make_node(3, "2024-02-03T00:00:00Z"),
+    ])
+    mirror = OrderMirror()
+    client = make_client(fake, mirror)
+    await mirror.sync(client)
+    fake.requests.clear()
+    
+    orders = await client.get_orders("acme", first=10)
+    order = await client.get_order_by_visual_id("1003", transform=OrderRecord.from_invoice_node)
+    
+    assert [o["visualId"] for o in orders] == ["1003"]
+    assert set(orders[0]) == {"id", "name", "visualId", "createdAt", "total", "status", "customer"}
+    assert order.customer == "Acme"
+    assert fake.requests == []
+    
+    # Filters the mirror can't evaluate fall back to Printavo
+    await client.get_orders("tag:rush", first=10)
+    assert [r["operationName"] for r in fake.requests] == ["SearchOrders"]
+    assert mirror.get_stats()["hits"] == 2
+    assert mirror.get_stats()["misses"] == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_mirror_falls_back_to_printavo():
+    """Test that reads go live once the mirror is older than the staleness bound."""
+    fake = FakePrintavo([make_node(1, "2024-02-01T00:00:00Z")])
+    clock = FakeClock()
+    mirror = OrderMirror(clock=clock)
+    client = make_client(fake, mirror)
+    await mirror.sync(client)
+    fake.requests.clear()
+    clock.now += 10 ** 6
+    
+    await client.get_orders(first=10)
+    
+    assert [r["operationName"] for r in fake.requests] == ["SearchOrders"]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_unsorted_orders_fall_back_to_a_full_sync():
+    """Test that an incremental sync seeing orders out of updatedAt order runs a full sync."""
+    fake = FakePrintavo([make_node(n, f"2024-02-{n:02d}T00:00:00Z") for n in range(1, 6)])
+    clock = FakeClock()
+    mirror = OrderMirror(page_size=2, clock=clock)
+    client = make_client(fake, mirror)
+    await mirror.sync(client)
+    
+    # Sorted by createdAt, order4's update comes after an older one
+    fake.sort_key = "createdAt"
+    fake.nodes["order4"] = make_node(4, "2024-03-01T00:00:00Z", status="Completed")
+    del fake.nodes["order3"]
+    clock.now += 60
+    await mirror.sync(client)
+    
+    assert mirror.get_by_visual_id("1004")["status"]["name"] == "Completed"
+    assert mirror.get_by_visual_id("1003") is None
+    assert mirror.sorted is False
+    stats = mirror.get_stats()
+    assert stats["full_syncs"] == 2
+    assert stats["unsorted_syncs"] == 2
+    
+    # Syncs stay full until orders come back sorted
+    fake.sort_key = "updatedAt"
+    clock.now += 60
+    await mirror.sync(client)
+    assert mirror.sorted is True
+    assert mirror.get_stats()["full_syncs"] == 3
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_sync_rolls_back(tmp_path):
+    """Test that cancelling a sync mid-walk discards the rows it wrote."""
+    fake = FakePrintavo([make_node(n, f"2024-02-{n:02d}T00:00:00Z") for n in range(1, 5)])
+    second_page = asyncio.Event()
+    
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if json.loads(request.content)["variables"].get("after"):
+            second_page.set()
+            await asyncio.sleep(60)
+        return fake(request)
+        
+    path = str(tmp_path / "mirror.db")
+    mirror = OrderMirror(path=path, page_size=2)
+    client = PrintavoAPIClient(
+        api_url="https://printavo.test/api/v2",
+        email="test@example.com",
+        token="test-token",
+        transport=httpx.MockTransport(handler),
+        mirror=mirror
+    )
+    
+    task = asyncio.create_task(mirror.sync(client))
+    await second_page.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+        
+    assert len(mirror) == 0
+    assert mirror.last_sync is None
+    assert mirror.get_stats()["sync_errors"] == 0
+    
+    await client.close()
+    await mirror.close()
+    assert len(OrderMirror(path=path)) == 0
+
+
+@pytest.mark.asyncio
+async def test_sync_progress_and_deletes_persist(tmp_path):
+    """Test that a reopened mirror loads its orders, deletes and sync progress."""
+    path = str(tmp_path / "mirror.db")
+    fake = FakePrintavo([make_node(n, f"2024-02-{n:02d}T00:00:00Z") for n in range(1, 4)])
+    mirror = OrderMirror(path=path)
+    client = make_client(fake, mirror)
+    await mirror.sync(client)
+    
+    assert mirror.delete(["order1", "missing"]) == 1
+    assert mirror.get_by_visual_id("1001") is None
+    await mirror.close()
+    
+    reopened = OrderMirror(path=path)
+    assert len(reopened) == 2
+    assert reopened.watermark == "2024-02-03T00:00:00Z"
+    assert reopened.last_sync == mirror.last_sync
+    assert reopened.needs_full_sync() is False
+    await client.close()
@@ -0,0 +1,400 @@
+"""
+Tests for the Printavo API client.
+"""
+
+import asyncio
+import json
+import pytest
+import httpx
+from app.printavo.api import PrintavoAPIClient, build_orders_query
+from app.printavo.orders import OrderRecord
+from app.printavo.selection import AGENT_ORDER_FIELDS, canonical_fields
+
+
+def make_client(handler) -> PrintavoAPIClient:
+    """Create a client whose requests are answered by handler."""
+    return PrintavoAPIClient(
+        api_url="https://printavo.test/api/v2",
+        email="test@example.com",
+        token="test-token",
+        transport=httpx.MockTransport(handler)
+    )
+
+
+@pytest.mark.asyncio
+async def test_execute_graphql_reuses_pooled_client():
+    """Test that every call goes through the same pooled client."""
+    seen = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json={"data": {"ok": True}})
+    
+    client = make_client(handler)
+    await client.start()
+    pooled = client._client
+    
+    for _ in range(3):
+        assert await client.execute_graphql("query Ping { ok }", operation_name="Ping") == {"ok": True}
+    
+    assert client._client is pooled
+    assert len(seen) == 3
+    assert seen[0].headers["email"] == "test@example.com"
+    assert seen[0].headers["token"] == "test-token"
+    assert json.loads(seen[0].content)["operationName"] == "Ping"
+    
+    stats = client.get_pool_stats()
+    assert stats["open"] is True
+    assert stats["clients_opened"] == 1
+    assert stats["requests"] == 3
+    assert stats["in_flight"] == 0
+    
+    await client.close()
+    assert client.get_pool_stats()["open"] is False
+
+
+@pytest.mark.asyncio
+async def test_execute_graphql_raises_on_graphql_errors(caplog):
+    """Test that GraphQL errors are surfaced, counted and logged once."""
+    client = make_client(lambda request: httpx.Response(200, json={"errors": [{"message": "boom"}]}))
+    
+    with pytest.raises(Exception, match="boom"):
+        await client.execute_graphql("query Ping { ok }")
+    
+    assert client.get_pool_stats()["errors"] == 1
+    assert len([record for record in caplog.records if "boom" in record.getMessage()]) == 1
+    await client.close()
+
+
+def make_order_node(n: int) -> dict:
+    """Build a raw order node as returned by the orders connection."""
+    return {
+        "id": f"order{n}",
+        "name": f"Order {n}",
+        "visualId": str(1000 + n),
+        "createdAt": "2023-01-01T00:00:00Z",
+        "updatedAt": "2023-01-02T00:00:00Z",
+        "status": {"id": "status1", "name": "In Progress", "color": "blue"},
+        "customer": {"id": "customer1", "name": "Test Customer", "email": "test@example.com"},
+        "total": "10.00"
+    }
+
+
+def paginated_handler(total: int, requests: list):
+    """Serve total orders through the orders connection using integer cursors."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        variables = json.loads(request.content)["variables"]
+        requests.append(variables)
+        start = int(variables.get("after") or 0)
+        end = min(start + variables["first"], total)
+        return httpx.Response(200, json={"data": {"orders": {
+            "pageInfo": {"hasNextPage": end < total, "endCursor": str(end)},
+            "edges": [{"node": make_order_node(n)} for n in range(start, end)]
+        }}})
+    return handler
+
+
+@pytest.mark.asyncio
+async def test_iter_orders_walks_all_pages():
+    """Test that iter_orders follows endCursor until the last page."""
+    requests = []
+    client = make_client(paginated_handler(7, requests))
+    
+    orders = [order async for order in client.iter_orders(query="acme", page_size=3)]
+    
+    assert [order["id"] for order in orders] == [f"order{n}" for n in range(7)]
+    assert [r.get("after") for r in requests] == [None, "3", "6"]
+    assert requests[0]["query"] == "acme -status:completed -status:quote"
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_iter_orders_stops_early():
+    """Test that limit and breaking out of the loop stop further requests."""
+    requests = []
+    client = make_client(paginated_handler(100, requests))
+    
+    orders = [order async for order in client.iter_orders(page_size=10, limit=15)]
+    assert len(orders) == 15
+    assert [r["first"] for r in requests] == [10, 5]
+    
+    requests.clear()
+    async for order in client.iter_orders(page_size=10):
+        break
+    assert len(requests) == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_iter_order_pages_prefetches_next_page():
+    """Test that the next page is requested before the current one is consumed."""
+    requests = []
+    client = make_client(paginated_handler(6, requests))
+    
+    pages = client.iter_order_pages(page_size=2, exclude_completed=False, exclude_quotes=False, prefetch=True)
+    first = await pages.__anext__()
+    await asyncio.sleep(0.01)
+    
+    assert first.end_cursor == "2"
+    assert len(requests) == 2
+    
+    rest = [page async for page in pages]
+    assert [page.end_cursor for page in rest] == ["4", "6"]
+    assert rest[-1].has_next_page is False
+    await client.close()
+
+
+def make_invoice_node(visual_id: str) -> dict:
+    """Build a raw invoice node as returned by the invoices connection."""
+    return {
+        "id": f"invoice{visual_id}",
+        "name": f"Invoice {visual_id}",
+        "visualId": visual_id,
+        "createdAt": "2023-01-01",
+        "updatedAt": "2023-01-02",
+        "total": 50.0,
+        "status": {"id": "status1", "name": "In Progress", "color": "blue"},
+        "contact": {"id": "contact1", "fullName": "Jane Doe", "email": "jane@example.com"}
+    }
+
+
+@pytest.mark.asyncio
+async def test_concurrent_visual_id_lookups_are_batched():
+    """Test that concurrent lookups share a single aliased GraphQL request."""
+    bodies = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        bodies.append(body)
+        data = {
+            alias: {"edges": [{"node": make_invoice_node(visual_id)}] if visual_id != "404" else []}
+            for alias, visual_id in ((f"o{k[1:]}", v) for k, v in body["variables"].items())
+        }
+        return httpx.Response(200, json={"data": data})
+    
+    client = make_client(handler)
+    orders = await asyncio.gather(
+        client.get_order_by_visual_id("1234"),
+        client.get_order_by_visual_id(" 5678 "),
+        client.get_order_by_visual_id("1234"),
+        client.get_order_by_visual_id("404")
+    )
+    
+    assert len(bodies) == 1
+    assert bodies[0]["operationName"] == "GetOrdersByVisualIds"
+    assert sorted(bodies[0]["variables"].values()) == ["1234", "404", "5678"]
+    assert orders[0]["visualId"] == "1234"
+    assert orders[0]["customer"]["name"] == "Jane Doe"
+    assert orders[1]["visualId"] == "5678"
+    assert orders[2] == orders[0]
+    assert orders[3] is None
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_single_visual_id_lookup_uses_plain_query():
+    """Test that a lone lookup is sent as the plain GetOrderByVisualId query."""
+    bodies = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"data": {"invoices": {"edges": [{"node": make_invoice_node("1234")}]}}})
+    
+    client = make_client(handler)
+    order = await client.get_order_by_visual_id("1234")
+    
+    assert order["id"] == "invoice1234"
+    assert bodies[0]["operationName"] == "GetOrderByVisualId"
+    assert bodies[0]["variables"] == {"query": "1234"}
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_queries_share_one_request():
+    """Test that identical in-flight queries are deduplicated."""
+    calls = []
+    
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"data": {"statuses": {"edges": []}}})
+    
+    client = make_client(handler)
+    query = "query SearchOrders($query: String!, $first: Int!) { orders { edges { node { id } } } }"
+    
+    results = await asyncio.gather(
+        client.execute_graphql(query, {"query": "acme", "first": 10}, "SearchOrders"),
+        client.execute_graphql(query, {"first": 10, "query": "acme"}, "SearchOrders"),
+        client.execute_graphql(query, {"query": "other", "first": 10}, "SearchOrders")
+    )
+    
+    assert len(calls) == 2
+    assert results[0] is results[1]
+    assert client.get_stats()["deduplication"]["shared"] == 1
+    
+    # Once finished (and not cached), the same query goes upstream again
+    client.invalidate_cache("SearchOrders")
+    await client.execute_graphql(query, {"query": "acme", "first": 10}, "SearchOrders")
+    assert len(calls) == 3
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_query_is_cancelled_with_its_last_caller():
+    """Test that a deduplicated request keeps running for remaining callers and stops with the last."""
+    started = []
+    cancelled = []
+    
+    async def handler(request: httpx.Request) -> httpx.Response:
+        started.append(request)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(request)
+            raise
+        return httpx.Response(200, json={"data": {}})
+    
+    client = make_client(handler)
+    query = "query SearchOrders($query: String!, $first: Int!) { orders { edges { node { id } } } }"
+    callers = [
+        asyncio.ensure_future(client.execute_graphql(query, {"query": "acme", "first": 10}, "SearchOrders"))
+        for _ in range(2)
+    ]
+    await asyncio.sleep(0.01)
+    
+    callers[0].cancel()
+    await asyncio.sleep(0.01)
+    assert cancelled == []
+    
+    callers[1].cancel()
+    await asyncio.sleep(0.01)
+    assert len(started) == len(cancelled) == 1
+    assert client.get_stats()["deduplication"]["cancelled"] == 1
+    assert client.get_stats()["deduplication"]["in_flight"] == 0
+    assert client.get_stats()["scheduler"]["in_flight"] == 0
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_mutations_are_not_deduplicated():
+    """Test that mutations always reach Printavo."""
+    calls = []
+    
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"data": {}})
+    
+    client = make_client(handler)
+    mutation = "mutation StatusUpdate($id: ID!) { statusUpdate(parentId: $id) { id } }"
+    
+    await asyncio.gather(*[client.execute_graphql(mutation, {"id": "1"}, "StatusUpdate") for _ in range(2)])
+    
+    assert len(calls) == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_statuses_are_served_from_cache_until_invalidated():
+    """Test that cached operations skip Printavo until invalidated."""
+    calls = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={"data": {"statuses": {"edges": [
+            {"node": {"id": "status1", "name": "New", "color": "green"}}
+        ]}}})
+    
+    client = make_client(handler)
+    
+    assert await client.get_statuses() == await client.get_statuses()
+    assert len(calls) == 1
+    assert client.get_stats()["cache"]["hits"] == 1
+    
+    assert client.invalidate_cache("GetStatuses") == 1
+    await client.get_statuses()
+    assert len(calls) == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_batched_visual_id_results_are_cached_individually():
+    """Test that each lookup in a batch is cached under its own key."""
+    calls = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        calls.append(body)
+        data = {f"o{k[1:]}": {"edges": [{"node": make_invoice_node(v)}]} for k, v in body["variables"].items()}
+        return httpx.Response(200, json={"data": data})
+    
+    client = make_client(handler)
+    await asyncio.gather(client.get_order_by_visual_id("1"), client.get_order_by_visual_id("2"))
+    
+    order = await client.get_order_by_visual_id("2")
+    
+    assert order["visualId"] == "2"
+    assert len(calls) == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_orders_requests_only_projected_fields():
+    """Test that a projection produces a minimal query and matching output."""
+    bodies = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        node = {"id": "order1", "visualId": "1001", "status": {"name": "New"}}
+        return httpx.Response(200, json={"data": {"orders": {"edges": [{"node": node}]}}})
+    
+    client = make_client(handler)
+    orders = await client.get_orders(fields=["visualId", "status.name", "id"])
+    
+    query = bodies[0]["query"]
+    assert "visualId" in query and "status {" in query
+    assert "customer" not in query and "email" not in query and "color" not in query
+    assert orders == [{"id": "order1", "status": {"name": "New"}, "visualId": "1001"}]
+    
+    with pytest.raises(ValueError, match="Unknown order fields"):
+        await client.get_orders(fields=["status.nope"])
+    await client.close()
+
+
+def test_orders_query_is_built_once_per_projection():
+    """Test that equivalent projections share one cached query document."""
+    first = build_orders_query(canonical_fields(["total", "id", "id"]))
+    second = build_orders_query(canonical_fields(("id", "total")))
+    assert first is second
+
+
+@pytest.mark.asyncio
+async def test_orders_build_records_in_a_single_pass():
+    """Test that raw nodes are turned straight into tool-format order records."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if body["operationName"] == "GetOrderByVisualId":
+            return httpx.Response(200, json={"data": {"invoices": {"edges": [{"node": make_invoice_node("1234")}]}}})
+        return httpx.Response(200, json={"data": {"orders": {"edges": [{"node": make_order_node(1)}]}}})
+    
+    client = make_client(handler)
+    
+    orders = await client.get_orders(fields=AGENT_ORDER_FIELDS, transform=OrderRecord.from_order_node)
+    assert orders[0].to_dict() == {
+        "id": "order1",
+        "name": "Order 1",
+        "visualId": "1001",
+        "date": "2023-01-01T00:00:00Z",
+        "status": "In Progress",
+        "customer": "Test Customer",
+        "total": 10.0,
+        "customerId": "customer1"
+    }
+    
+    order = await client.get_order_by_visual_id("1234", transform=OrderRecord.from_invoice_node)
+    assert order.customer == "Jane Doe"
+    assert order.total == 50.0
+    assert not hasattr(order, "__dict__")
+    
+    # Cached lookups go through the same transform
+    assert await client.get_order_by_visual_id("1234", transform=OrderRecord.from_invoice_node) == order
+    await client.close()
@@ -0,0 +1,116 @@
+"""
+Tests for the subsumption-aware search result cache.
+"""
+
+import json
+
+import httpx
+import pytest
+
+from app.printavo.api import PrintavoAPIClient
+from app.printavo.query_cache import SearchResultCache, canonicalize, subsumes
+from app.printavo.selection import DEFAULT_ORDER_FIELDS, canonical_fields
+
+FIELDS = canonical_fields(DEFAULT_ORDER_FIELDS)
+
+
+def make_node(n: int, status: str) -> dict:
+    return {"id": f"order{n}", "visualId": str(1000 + n), "status": {"id": status, "name": status}}
+
+
+NODES = [
+    make_node(1, "Completed"),
+    make_node(2, "In Production"),
+    make_node(3, "Quote"),
+    make_node(4, "In Production"),
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_canonical_form_ignores_order_and_case():
+    assert canonicalize("Acme shirts -status:completed") == canonicalize("-STATUS:Completed shirts acme")
+    assert canonicalize("acme tag:rush") is None
+
+
+def test_subsumption():
+    broad = canonicalize("acme")
+    
+    assert subsumes(broad, canonicalize("acme -status:completed -status:quote"))
+    assert subsumes(canonicalize("acme -status:quote"), canonicalize("acme -status:quote -status:completed"))
+    assert subsumes(canonicalize("acme status:quote status:completed"), canonicalize("acme status:quote"))
+    assert not subsumes(canonicalize("acme -status:quote"), broad)
+    assert not subsumes(broad, canonicalize("acme shirts"))
+    assert not subsumes(canonicalize("acme status:quote"), broad)
+
+
+def test_complete_broad_result_answers_narrower_search():
+    cache = SearchResultCache()
+    cache.set("acme", 10, FIELDS, NODES, ttl=30)
+    
+    nodes = cache.get("acme -status:completed -status:quote", 10, FIELDS)
+    
+    assert [node["id"] for node in nodes] == ["order2", "order4"]
+    assert cache.get("acme status:quote", 10, FIELDS) == [NODES[2]]
+    assert cache.get_stats()["subsumed_hits"] == 2
+
+
+def test_truncated_broad_result_only_answers_when_long_enough():
+    cache = SearchResultCache()
+    cache.set("acme", 4, FIELDS, NODES, ttl=30)
+    
+    assert [node["id"] for node in cache.get("acme -status:completed", 2, FIELDS)] == ["order2", "order3"]
+    # Only two open orders are among the first four; a fifth might be open too
+    assert cache.get("acme -status:completed -status:quote", 3, FIELDS) is None
+    assert cache.get("acme", 5, FIELDS) is None
+
+
+def test_entries_expire_and_must_cover_requested_fields():
+    clock = FakeClock()
+    cache = SearchResultCache(clock=clock)
+    cache.set("acme", 10, ("id", "status.name"), NODES, ttl=30)
+    
+    assert cache.get("acme", 10, FIELDS) is None
+    assert cache.get("acme", 10, ("id",)) == NODES
+    
+    clock.now = 31
+    assert cache.get("acme", 10, ("id",)) is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_orders_reuses_broader_search():
+    requests = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content)["variables"])
+        nodes = [
+            {**node, "name": "Acme order", "createdAt": None, "total": 1, "customer": None}
+            for node in NODES
+        ]
+        return httpx.Response(200, json={"data": {"orders": {"edges": [{"node": node} for node in nodes]}}})
+        
+    client = PrintavoAPIClient(
+        api_url="https://printavo.test/api/v2",
+        email="test@example.com",
+        token="test-token",
+        transport=httpx.MockTransport(handler)
+    )
+    
+    everything = await client.get_orders("acme", first=10, exclude_completed=False, exclude_quotes=False)
+    open_orders = await client.get_orders("acme", first=10)
+    
+    assert len(everything) == 4
+    assert [order["id"] for order in open_orders] == ["order2", "order4"]
+    assert requests == [{"query": "acme", "first": 10}]
+    
+    client.invalidate_cache("SearchOrders")
+    await client.get_orders("acme", first=10)
+    assert len(requests) == 2
+    await client.close()
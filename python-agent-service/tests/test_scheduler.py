@@ -0,0 +1,155 @@
+"""
+Tests for the Printavo request scheduler.
+"""
+
+import asyncio
+import time
+import pytest
+from app.printavo.errors import PrintavoAPIError, parse_retry_after
+from app.printavo.scheduler import AdaptiveConcurrencyLimiter, RequestScheduler, TokenBucket
+
+
+def make_scheduler(**kwargs) -> RequestScheduler:
+    """Create a scheduler with fast retries and a generous rate limit."""
+    options = {
+        "rate_limit_requests": 100,
+        "rate_limit_period": 1.0,
+        "max_retries": 3,
+        "retry_base_delay": 0.001,
+        "retry_max_delay": 0.01
+    }
+    options.update(kwargs)
+    return RequestScheduler(**options)
+
+
+def failing_then(result, *errors):
+    """Build a request function raising each error in turn before returning result."""
+    calls = []
+    
+    async def fn():
+        calls.append(time.monotonic())
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    
+    return fn, calls
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_for_idempotent_requests():
+    """Test that 5xx and lost responses are retried for queries."""
+    scheduler = make_scheduler()
+    fn, calls = failing_then("ok", PrintavoAPIError("bad gateway", status_code=502), PrintavoAPIError("reset"))
+    
+    assert await scheduler.run(fn) == "ok"
+    assert len(calls) == 3
+    assert scheduler.stats["retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_non_idempotent_requests_only_retry_rate_limits():
+    """Test that mutations are retried on 429 but not on 5xx."""
+    scheduler = make_scheduler()
+    
+    fn, calls = failing_then("ok", PrintavoAPIError("unavailable", status_code=503))
+    with pytest.raises(PrintavoAPIError):
+        await scheduler.run(fn, idempotent=False)
+    assert len(calls) == 1
+    
+    fn, calls = failing_then("ok", PrintavoAPIError("slow down", status_code=429, retry_after=0.05))
+    assert await scheduler.run(fn, idempotent=False) == "ok"
+    assert calls[1] - calls[0] >= 0.05
+    assert scheduler.stats["rate_limited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_permanent_errors_and_exhausted_retries_raise():
+    """Test that client errors are not retried and retries are bounded."""
+    scheduler = make_scheduler(max_retries=2)
+    
+    fn, calls = failing_then("ok", PrintavoAPIError("bad request", status_code=400))
+    with pytest.raises(PrintavoAPIError):
+        await scheduler.run(fn)
+    assert len(calls) == 1
+    
+    fn, calls = failing_then("ok", *[PrintavoAPIError("down", status_code=500)] * 5)
+    with pytest.raises(PrintavoAPIError):
+        await scheduler.run(fn)
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_request_rate():
+    """Test that requests beyond the burst wait for tokens to refill."""
+    bucket = TokenBucket(capacity=2, refill_rate=50)
+    start = time.monotonic()
+    
+    for _ in range(4):
+        await bucket.acquire()
+    
+    assert time.monotonic() - start >= 0.03
+
+
+@pytest.mark.asyncio
+async def test_limiter_backs_off_on_overload_and_recovers():
+    """Test AIMD adjustment of the concurrency limit."""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, min_limit=1, max_limit=8, latency_target=1.0)
+    
+    await limiter.acquire()
+    await limiter.release(overloaded=True)
+    assert limiter.limit == 4
+    
+    await limiter.acquire()
+    await limiter.release(latency=5.0)
+    assert limiter.limit == 2
+    
+    for _ in range(4):
+        await limiter.acquire()
+        await limiter.release(latency=0.1)
+    assert 3 <= limiter.limit < 4
+
+
+@pytest.mark.asyncio
+async def test_limiter_caps_concurrent_requests():
+    """Test that no more than the limit of requests run at once."""
+    scheduler = make_scheduler(min_concurrency=2, max_concurrency=2)
+    running = []
+    peak = []
+    
+    async def fn():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+    
+    await asyncio.gather(*[scheduler.run(fn) for _ in range(6)])
+    assert max(peak) == 2
+
+
+
+@pytest.mark.asyncio
+async def test_cancelled_wait_for_token_frees_the_slot():
+    """Test that a request cancelled while throttled gives back its concurrency slot."""
+    scheduler = make_scheduler(min_concurrency=1, max_concurrency=1)
+    scheduler.bucket.pause(60)
+    
+    async def fn():
+        return "ok"
+    
+    task = asyncio.ensure_future(scheduler.run(fn))
+    await asyncio.sleep(0.01)
+    assert scheduler.limiter.in_flight == 1
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+        
+    assert scheduler.limiter.in_flight == 0
+    scheduler.bucket._paused_until = 0
+    assert await asyncio.wait_for(scheduler.run(fn), 1) == "ok"
+
+def test_parse_retry_after():
+    """Test parsing Retry-After in seconds and as an HTTP date."""
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("garbage") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
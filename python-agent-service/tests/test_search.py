@@ -0,0 +1,87 @@
+"""
+Tests for the in-memory order search index.
+"""
+
+from app.printavo.search import OrderSearchIndex, parse_query
+
+
+def make_node(n: int, name: str, customer: str, status: str = "In Production") -> dict:
+    return {
+        "id": f"order{n}",
+        "name": name,
+        "visualId": str(1000 + n),
+        "createdAt": f"2024-01-{n:02d}T00:00:00Z",
+        "status": {"id": f"s{n}", "name": status},
+        "customer": {"id": f"c{n}", "name": customer, "email": None}
+    }
+
+
+def visual_ids(nodes) -> list:
+    return [node["visualId"] for node in nodes]
+
+
+def make_index() -> OrderSearchIndex:
+    return OrderSearchIndex([
+        make_node(1, "Soccer Jerseys", "Riverside Soccer Club", status="Completed"),
+        make_node(2, "Staff Polos", "Riverside Dental"),
+        make_node(3, "Riverside 5K Shirts", "Acme Events", status="Quote"),
+        make_node(4, "Hoodies", "Acme Events"),
+    ])
+
+
+def test_parse_query_handles_status_filters():
+    query = parse_query("Riverside status:in_production -status:completed")
+    
+    assert query.terms == ("riverside",)
+    assert query.statuses == ("in production",)
+    assert query.excluded_statuses == ("completed",)
+    assert parse_query("tag:rush") is None
+
+
+
+def test_parse_query_handles_quoted_status_names():
+    query = parse_query('Riverside status:"In Production" -status:"on hold" "staff polos"')
+    
+    assert query.terms == ("riverside", "staff", "polos")
+    assert query.statuses == ("in production",)
+    assert query.excluded_statuses == ("on hold",)
+    assert visual_ids(make_index().search('status:"in production" riverside', 10)) == ["1002"]
+
+def test_terms_must_all_match_and_are_ranked_by_field():
+    index = make_index()
+    
+    # An order named after the term ranks above customers with that name
+    assert visual_ids(index.search("riverside", 10)) == ["1003", "1002", "1001"]
+    assert visual_ids(index.search("riverside soccer", 10)) == ["1001"]
+    assert index.search("riverside hoodies", 10) == []
+
+
+def test_prefix_matching_scores_below_exact_matches():
+    index = OrderSearchIndex([
+        make_node(1, "Polo Shirts", "Acme"),
+        make_node(2, "Polos", "Acme"),
+    ])
+    
+    assert visual_ids(index.search("pol", 10)) == ["1002", "1001"]
+    assert visual_ids(index.search("polo", 10)) == ["1001", "1002"]
+
+
+def test_status_filters_and_limit():
+    index = make_index()
+    
+    assert visual_ids(index.search("-status:completed -status:quote", 10)) == ["1004", "1002"]
+    assert visual_ids(index.search("acme status:quote", 10)) == ["1003"]
+    assert visual_ids(index.search("", 2)) == ["1004", "1003"]
+
+
+def test_updates_and_removals_are_reflected():
+    index = make_index()
+    
+    index.add(make_node(4, "Beanies", "Acme Events"))
+    index.remove("order3")
+    
+    assert index.search("hoodies", 10) == []
+    assert visual_ids(index.search("acme", 10)) == ["1004"]
+    assert index.get_by_visual_id("1003") is None
+    assert index.get_by_visual_id("1004")["name"] == "Beanies"
+    assert len(index) == 3
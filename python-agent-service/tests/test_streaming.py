@@ -0,0 +1,99 @@
+"""
+Tests for Server-Sent Events streaming of agent runs.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.api.streaming import format_sse, sse_stream
+from app.printavo.api import PrintavoAPIClient, printavo_client
+from app.printavo.tenants import current_client, use_client
+
+
+def parse_sse(chunk: bytes):
+    """Decode one encoded event into its name and data."""
+    event_line, data_line = chunk.decode("utf-8").strip().split("\n")
+    return event_line[len("event: "):], json.loads(data_line[len("data: "):])
+
+
+def test_format_sse():
+    """Test event framing."""
+    chunk = format_sse("delta", {"text": "Hello\nworld"})
+    assert chunk.endswith(b"\n\n")
+    assert parse_sse(chunk) == ("delta", {"text": "Hello\nworld"})
+
+
+@pytest.mark.asyncio
+async def test_events_see_the_tenant_client():
+    """Test that events are produced with the request's client as the current client."""
+    client = PrintavoAPIClient(email="tenant@example.com", token="t", tenant_id="a")
+    
+    async def events():
+        yield "tool_result", {"tenant": current_client().tenant_id}
+        yield "done", {"response": "ok"}
+        
+    chunks = [chunk async for chunk in sse_stream(events(), client)]
+    assert [parse_sse(chunk) for chunk in chunks] == [
+        ("tool_result", {"tenant": "a"}),
+        ("done", {"response": "ok"})
+    ]
+    assert current_client() is printavo_client
+
+
+@pytest.mark.asyncio
+async def test_events_keep_their_context_when_iterated_from_other_tasks():
+    """Test that context set across the event source's yields stays in one task."""
+    client = PrintavoAPIClient(email="tenant@example.com", token="t", tenant_id="a")
+    
+    async def events():
+        with use_client(client):
+            yield "tool_call", {"name": "get_orders"}
+            yield "done", {"tenant": current_client().tenant_id}
+            
+    # Each step runs in a task of its own, with its own copy of the context
+    stream = sse_stream(events(), printavo_client)
+    chunks = []
+    while True:
+        try:
+            chunks.append(await asyncio.ensure_future(stream.__anext__()))
+        except StopAsyncIteration:
+            break
+            
+    assert parse_sse(chunks[-1]) == ("done", {"tenant": "a"})
+    assert current_client() is printavo_client
+
+
+@pytest.mark.asyncio
+async def test_disconnect_closes_the_event_source():
+    """Test that cancelling the stream cancels work still running in the event source."""
+    started = asyncio.Event()
+    closed = []
+    
+    async def printavo_call():
+        started.set()
+        await asyncio.sleep(60)
+    
+    async def events():
+        task = asyncio.ensure_future(printavo_call())
+        try:
+            yield "tool_call", {"name": "get_orders"}
+            await task
+            yield "done", {}
+        finally:
+            task.cancel()
+            closed.append(task)
+    
+    async def consume():
+        async for _ in sse_stream(events(), printavo_client):
+            pass
+            
+    consumer = asyncio.ensure_future(consume())
+    await started.wait()
+    consumer.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await consumer
+        
+    await asyncio.sleep(0)
+    assert closed and closed[0].cancelled()
@@ -0,0 +1,147 @@
+"""
+Tests for the multi-tenant client registry and weighted-fair request sharing.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.printavo.api import PrintavoAPIClient, namespaced_path, printavo_client
+from app.printavo.fairness import WeightedFairQueue
+from app.printavo.tenants import ClientRegistry, UnknownTenantError, current_client, parse_tenants, use_client
+from app.printavo.webhooks import webhook_processor
+
+TENANTS = parse_tenants(
+    '{"a": {"email": "a@example.com", "token": "ta", "weight": 2},'
+    ' "b": {"email": "b@example.com", "token": "tb"},'
+    ' "b-alias": {"email": "b@example.com", "token": "tb"},'
+    ' "c": {"email": "c@example.com", "token": "tc"}}'
+)
+
+
+def make_registry(max_clients: int = 2) -> ClientRegistry:
+    """Create a registry whose clients answer every request with an empty result."""
+    def factory(**kwargs):
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"data": {}}))
+        return PrintavoAPIClient(transport=transport, **kwargs)
+    default = PrintavoAPIClient(email="default@example.com", token="t")
+    return ClientRegistry(TENANTS, default, webhook_processor, max_clients=max_clients, client_factory=factory)
+
+
+def test_parse_tenants():
+    """Test tenant parsing and validation."""
+    assert TENANTS["a"].weight == 2.0
+    assert TENANTS["b"].credentials_key == TENANTS["b-alias"].credentials_key
+    assert parse_tenants("") == {}
+    with pytest.raises(ValueError):
+        parse_tenants('{"x": {"email": "x@example.com"}}')
+
+
+def test_namespaced_path():
+    """Test that tenant databases get their own files."""
+    assert namespaced_path("printavo_mirror.db", "a") == "printavo_mirror.a.db"
+    assert namespaced_path("mirror", "a") == "mirror.a"
+    assert namespaced_path(":memory:", "a") == ":memory:"
+    assert namespaced_path("printavo_mirror.db", None) == "printavo_mirror.db"
+
+
+@pytest.mark.asyncio
+async def test_registry_shares_clients_by_credentials_and_evicts_lru():
+    """Test client reuse, LRU eviction and unknown tenants."""
+    registry = make_registry(max_clients=2)
+    
+    a = await registry.get("a")
+    assert a.tenant_id == "a"
+    assert a.fair_queue is registry.fair_queue
+    assert await registry.get(None) is registry.default_client
+    b = await registry.get("b")
+    assert await registry.get("b-alias") is b
+    # Using a tenant's webhook processor marks its client as recently used
+    assert await registry.get_webhook_processor("a") is not webhook_processor
+    
+    await registry.get("c")
+    assert registry.get_stats()["open_clients"] == ["a", "c"]
+    assert registry.get_stats()["evicted"] == 1
+    assert await registry.get("b") is not b
+    
+    with pytest.raises(UnknownTenantError):
+        await registry.get("nope")
+    await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_evicted_client_closes_once_its_leases_end():
+    """Test that eviction doesn't close a client with requests in flight."""
+    registry = make_registry(max_clients=1)
+    
+    async with registry.lease("a") as a:
+        await registry.get("b")
+        await asyncio.sleep(0)
+        stats = registry.get_stats()
+        assert stats["draining"] == ["a"]
+        assert stats["clients"]["b"]["in_use"] == 0
+        assert stats["clients"]["b"]["circuit_breaker"]["state"] == "closed"
+        # The leased client keeps working
+        await a.execute_graphql("query GetStatuses { statuses { nodes { id } } }")
+        assert a.get_pool_stats()["open"] is True
+        
+    await asyncio.gather(*registry._draining)
+    assert registry.get_stats()["draining"] == []
+    # A closed client refuses to open a new connection pool
+    with pytest.raises(RuntimeError):
+        await a.execute_graphql("query GetStatuses { statuses { nodes { id } } }")
+    await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_current_client_follows_the_request_context():
+    """Test that tools see the client of the current request."""
+    registry = make_registry()
+    client = await registry.get("a")
+    
+    async def tool():
+        return current_client()
+        
+    with use_client(client):
+        assert await asyncio.ensure_future(tool()) is client
+    assert current_client() is printavo_client
+    await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_fair_queue_interleaves_tenants_by_weight():
+    """Test that a burst from one tenant doesn't starve another."""
+    queue = WeightedFairQueue(max_concurrency=1)
+    granted = []
+    
+    async def request(tenant, weight=1.0):
+        async with queue.slot(tenant, weight):
+            granted.append(tenant)
+            await asyncio.sleep(0)
+            
+    await queue.acquire("busy")
+    tasks = [asyncio.ensure_future(request("busy")) for _ in range(4)]
+    tasks += [asyncio.ensure_future(request("quiet", weight=2.0)) for _ in range(2)]
+    await asyncio.sleep(0)
+    queue.release()
+    await asyncio.gather(*tasks)
+    
+    assert granted == ["quiet", "busy", "quiet", "busy", "busy", "busy"]
+    assert queue.get_stats()["tenants"]["quiet"] == {"granted": 2, "queued": 2}
+    assert queue.get_stats()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_fair_queue_skips_cancelled_waiters():
+    """Test that cancelled waiters neither get nor leak slots."""
+    queue = WeightedFairQueue(max_concurrency=1)
+    await queue.acquire("a")
+    waiter = asyncio.ensure_future(queue.acquire("b"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.sleep(0)
+    queue.release()
+    
+    await asyncio.wait_for(queue.acquire("c"), timeout=1)
+    assert queue.get_stats()["active"] == 1
@@ -0,0 +1,119 @@
+"""
+Tests for bounded, prefetching execution of agent tool calls.
+"""
+
+import asyncio
+
+import pytest
+
+from app.agents.tool_calls import ToolCalls, bind_arguments, predict_tool_calls
+from app.printavo.freshness import REVALIDATING, record_stale
+
+
+def test_predict_tool_calls():
+    """Test that statuses (when mentioned) and mentioned visual IDs are predicted."""
+    assert predict_tool_calls("What's overdue?") == []
+    assert predict_tool_calls("Which orders have the Ready status?") == [("get_statuses", {})]
+    assert predict_tool_calls("Compare order 1234 with #1240, and order no. 1234") == [
+        ("get_order_by_visual_id", {"visual_id": "1234"}),
+        ("get_order_by_visual_id", {"visual_id": "1240"})
+    ]
+    assert predict_tool_calls("Orders over 500 from 2024") == []
+
+
+@pytest.mark.asyncio
+async def test_prefetched_call_is_reused():
+    """Test that a call matching a prefetch gets its result without calling again."""
+    calls = []
+    
+    async def get_order_by_visual_id(visual_id: str, verbose: bool = False):
+        calls.append(visual_id)
+        record_stale(30, REVALIDATING)
+        return {"visualId": visual_id}
+        
+    tool_calls = ToolCalls()
+    tool_calls.prefetch(get_order_by_visual_id, bind_arguments(get_order_by_visual_id, kwargs={"visual_id": "1234"}))
+    tool_calls.prefetch(get_order_by_visual_id, bind_arguments(get_order_by_visual_id, kwargs={"visual_id": "1234"}))
+    await asyncio.sleep(0)
+    
+    result, freshness = await tool_calls.call(get_order_by_visual_id, bind_arguments(get_order_by_visual_id, ("1234",)))
+    assert result == {"visualId": "1234"}
+    assert freshness.stale
+    assert calls == ["1234"]
+    
+    await tool_calls.call(get_order_by_visual_id, bind_arguments(get_order_by_visual_id, ("1234",)))
+    assert calls == ["1234", "1234"]
+    assert tool_calls.stats == {"calls": 2, "prefetched": 1, "prefetch_hits": 1, "prefetch_discarded": 0}
+
+
+@pytest.mark.asyncio
+async def test_unused_prefetches_are_cancelled():
+    """Test that prefetches the model didn't use are discarded when the run ends."""
+    started = asyncio.Event()
+    
+    async def get_statuses():
+        started.set()
+        await asyncio.sleep(60)
+        
+    stats = {}
+    tool_calls = ToolCalls(stats=stats)
+    tool_calls.prefetch(get_statuses, {})
+    await started.wait()
+    task = next(iter(tool_calls._prefetched.values()))
+    
+    tool_calls.close()
+    await asyncio.sleep(0)
+    assert task.cancelled()
+    assert stats["prefetch_discarded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_are_bounded():
+    """Test that at most max_concurrency tool calls run at once."""
+    running = 0
+    peak = 0
+    
+    async def get_orders(query: str):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return []
+        
+    tool_calls = ToolCalls(max_concurrency=2)
+    results = await asyncio.gather(*(tool_calls.call(get_orders, {"query": str(i)}) for i in range(5)))
+    
+    assert len(results) == 5
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_prefetches_leave_a_slot_for_real_calls():
+    """Test that prefetches can't take every slot from the calls the model makes."""
+    release = asyncio.Event()
+    running = []
+    
+    async def get_order_by_visual_id(visual_id: str):
+        running.append(visual_id)
+        await release.wait()
+        return {"visualId": visual_id}
+        
+    async def get_orders(query: str):
+        return []
+        
+    tool_calls = ToolCalls(max_concurrency=3)
+    for visual_id in ("1", "2", "3", "4"):
+        tool_calls.prefetch(get_order_by_visual_id, {"visual_id": visual_id})
+    await asyncio.sleep(0.01)
+    assert running == ["1", "2"]
+    
+    result, _ = await asyncio.wait_for(tool_calls.call(get_orders, {"query": "x"}), 1)
+    assert result == []
+    release.set()
+    tool_calls.close()
+    
+    # With a single slot, nothing is prefetched
+    single = ToolCalls(max_concurrency=1)
+    single.prefetch(get_orders, {"query": "x"})
+    assert single.stats["prefetched"] == 0
@@ -0,0 +1,100 @@
+"""
+Tests for the compact encoding of agent tool results.
+"""
+
+import csv
+import json
+
+from app.agents.tool_results import count_tokens, encode, encode_tool_result, track_encoding
+
+
+def make_orders(count: int):
+    """Build order dicts as returned by the get_orders tool."""
+    return [
+        {
+            "id": f"o{i}",
+            "name": f"Shirts, batch {i}",
+            "visualId": str(1000 + i),
+            "date": "2024-03-01T10:00:00Z",
+            "status": "In Production",
+            "customer": "Acme \"Tees\"",
+            "total": 100.0 + i,
+            "customerId": None
+        }
+        for i in range(count)
+    ]
+
+
+def test_records_become_a_table():
+    """Test that records are encoded as a header and CSV rows."""
+    text, omitted = encode(make_orders(3))
+    lines = text.split("\n")
+    
+    assert omitted == 0
+    assert lines[0] == "results[3]{id,name,visualId,date,status,customer,total}:"
+    rows = list(csv.reader(lines[1:]))
+    assert rows[0] == ["o0", "Shirts, batch 0", "1000", "2024-03-01T10:00:00Z", "In Production", "Acme \"Tees\"", "100"]
+    assert len(rows) == 3
+
+
+def test_other_results_stay_json():
+    """Test that single records, errors and scalars are left as JSON."""
+    order = make_orders(1)[0]
+    assert json.loads(encode(order)[0]) == order
+    assert json.loads(encode([{"error": "Failed"}])[0]) == [{"error": "Failed"}]
+    assert encode([])[0] == "[]"
+
+
+def test_tables_inside_results():
+    """Test that record lists within a dict become tables alongside the other entries."""
+    result = {
+        "results": make_orders(2),
+        "freshness": {"stale": True, "age_seconds": 60, "reason": "revalidating"}
+    }
+    lines = encode(result)[0].split("\n")
+    assert lines[0] == 'freshness: {"stale":true,"age_seconds":60,"reason":"revalidating"}'
+    assert lines[1].startswith("results[2]{")
+    assert len(lines) == 4
+
+
+def test_budget_truncates_with_marker():
+    """Test that rows beyond the token budget are replaced by a marker."""
+    text, omitted = encode(make_orders(50), max_tokens=200)
+    lines = text.split("\n")
+    
+    assert omitted > 0
+    assert lines[-1].startswith(f"... {omitted} more rows not shown; refine the query")
+    assert len(lines) == 1 + (50 - omitted) + 1
+    assert count_tokens("\n".join(lines[:-1])) <= 200
+
+
+def test_budget_covers_header_and_marker():
+    """Test that the whole encoding stays within the budget, even a tiny one."""
+    for max_tokens in (60, 120, 300):
+        text, omitted = encode(make_orders(50), max_tokens=max_tokens)
+        assert omitted > 0
+        assert count_tokens(text) <= max_tokens
+        
+    text, omitted = encode(make_orders(50), max_tokens=30)
+    assert text == "results: 50 rows not shown; refine the query (filters, sorting or a lower limit) to see them"
+    assert encode(make_orders(50), max_tokens=0) == ("", 50)
+    
+    result = {"summary": "x" * 400, "results": make_orders(5)}
+    text, omitted = encode(result, max_tokens=100)
+    assert omitted == 5
+    assert "results[5]" not in text
+
+def test_savings_are_tracked():
+    """Test that the tokens saved against plain JSON are recorded."""
+    orders = make_orders(20)
+    with track_encoding() as stats:
+        text = encode_tool_result(orders)
+        encode_tool_result({"error": "Failed"})
+        
+    assert stats.tokens == count_tokens(text) + count_tokens('{"error":"Failed"}')
+    assert stats.json_tokens == count_tokens(json.dumps(orders, separators=(",", ":"))) + count_tokens('{"error":"Failed"}')
+    assert stats.tokens_saved > stats.tokens / 2
+    
+    with track_encoding() as stats:
+        assert json.loads(encode_tool_result(orders, compact=False)) == orders
+    assert stats.tokens == 0
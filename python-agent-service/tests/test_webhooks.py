@@ -0,0 +1,183 @@
+"""
+Tests for Printavo webhook ingestion.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+
+import httpx
+import pytest
+
+from app.printavo.api import PrintavoAPIClient
+from app.printavo.mirror import OrderMirror
+from app.printavo.webhooks import WebhookEvent, WebhookProcessor, parse_event, verify_signature
+
+
+def make_node(n: int, updated_at: str, status: str = "In Production") -> dict:
+    """Build a raw order node with every mirrored field."""
+    return {
+        "id": f"order{n}",
+        "name": f"Order {n}",
+        "visualId": str(1000 + n),
+        "createdAt": f"2024-01-{n:02d}T00:00:00Z",
+        "updatedAt": updated_at,
+        "dueDate": None,
+        "total": 10.0 * n,
+        "status": {"id": status.lower(), "name": status, "color": "blue"},
+        "customer": {"id": "c1", "name": "Acme", "email": "team@acme.test"}
+    }
+
+
+class FakePrintavo:
+    """Serves OrdersPage requests from a dict of order nodes, most recently updated first."""
+    
+    def __init__(self, nodes):
+        self.nodes = {node["id"]: node for node in nodes}
+        self.requests = []
+    
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(body)
+        nodes = sorted(self.nodes.values(), key=lambda node: node["updatedAt"], reverse=True)
+        return httpx.Response(200, json={"data": {"orders": {
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "edges": [{"node": node} for node in nodes]
+        }}})
+
+
+def make_client(fake: FakePrintavo, mirror: OrderMirror = None) -> PrintavoAPIClient:
+    return PrintavoAPIClient(
+        api_url="https://printavo.test/api/v2",
+        email="test@example.com",
+        token="test-token",
+        transport=httpx.MockTransport(fake),
+        mirror=mirror
+    )
+
+
+def sign(secret: str, body: bytes) -> str:
+    return hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def test_verify_signature():
+    """Test HMAC verification with and without the sha256= prefix."""
+    body = b'{"event": "order.updated"}'
+    signature = sign("secret", body)
+    
+    assert verify_signature("secret", body, signature)
+    assert verify_signature("secret", body, f"sha256={signature}")
+    assert not verify_signature("secret", body + b" ", signature)
+    assert not verify_signature("other", body, signature)
+    assert not verify_signature("", body, signature)
+    assert not verify_signature("secret", body, None)
+
+
+def test_parse_event_shapes():
+    """Test that envelopes, bare orders and header event types are understood."""
+    event = parse_event({"eventId": "e1", "event": "order.deleted", "data": {"id": "order1", "visualId": 1001}})
+    assert event == WebhookEvent("e1", "order.deleted", "order1", "1001", True)
+    
+    event = parse_event({"id": "order2", "visualId": "1002"}, {"x-printavo-event": "Invoice.Updated"})
+    assert (event.kind, event.order_id, event.visual_id, event.deleted) == ("invoice.updated", "order2", "1002", False)
+    
+    # Without an event ID, identical payloads get the same ID
+    assert parse_event({"id": "order2"}).event_id == parse_event({"id": "order2"}).event_id
+    assert parse_event({"type": "status.updated"}).order_id is None
+    
+    with pytest.raises(ValueError):
+        parse_event(["not", "an", "object"])
+
+
+@pytest.mark.asyncio
+async def test_duplicates_are_dropped_and_bursts_coalesced():
+    """Test that redeliveries are ignored and one burst invalidates each order once."""
+    fake = FakePrintavo([make_node(1, "2024-02-01T00:00:00Z")])
+    client = make_client(fake)
+    processor = WebhookProcessor(client, window=0.01)
+    calls = []
+    client.invalidate_orders = lambda orders, deleted=(): calls.append((orders, list(deleted)))
+    
+    result = processor.submit([
+        WebhookEvent("e1", "order.updated", "order1", "1001"),
+        WebhookEvent("e1", "order.updated", "order1", "1001"),
+        WebhookEvent("e2", "order.updated", "order1"),
+        WebhookEvent("e3", "order.deleted", "order2", "1002", True),
+    ])
+    await asyncio.sleep(0.05)
+    
+    assert result == {"accepted": 3, "duplicates": 1}
+    assert calls == [({"order1": "1001", "order2": "1002"}, ["order2"])]
+    assert processor.get_stats()["coalesced"] == 1
+    assert processor.get_stats()["flushes"] == 1
+    
+    # Redeliveries after the burst are still recognised
+    assert processor.submit([WebhookEvent("e2", "order.updated", "order1")]) == {"accepted": 0, "duplicates": 1}
+    await processor.close()
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_events_invalidate_cached_lookups_and_sync_the_mirror():
+    """Test that a burst drops cached responses, deletes removed orders and resyncs the mirror once."""
+    fake = FakePrintavo([make_node(n, f"2024-02-{n:02d}T00:00:00Z") for n in range(1, 4)])
+    mirror = OrderMirror()
+    client = make_client(fake, mirror)
+    await mirror.sync(client)
+    
+    client.cache.set(client._visual_id_key("1001"), {"invoices": {"edges": []}}, 60)
+    client.cache.set(client._visual_id_key("1003"), {"invoices": {"edges": []}}, 60)
+    client.search_cache.set("", 10, ("id",), [{"id": "order1"}], 60)
+    client.visual_ids.record([{"id": "order2", "visualId": "1002"}])
+    
+    fake.nodes["order1"] = make_node(1, "2024-03-01T00:00:00Z", status="Completed")
+    del fake.nodes["order2"]
+    fake.requests.clear()
+    
+    processor = WebhookProcessor(client, window=60)
+    processor.submit([
+        WebhookEvent("e1", "order.updated", "order1"),
+        WebhookEvent("e2", "order.status_changed", "order1"),
+        WebhookEvent("e3", "order.deleted", "order2", "1002", True),
+    ])
+    await processor.drain()
+    
+    # The visual ID of order1 was resolved from the mirror, so order3's lookup stays cached
+    assert client._visual_id_key("1001") not in client.cache
+    assert client._visual_id_key("1003") in client.cache
+    assert len(client.search_cache) == 0
+    assert client.visual_ids.get("1002") is None
+    assert mirror.get_by_visual_id("1001")["status"]["name"] == "Completed"
+    assert mirror.get_by_visual_id("1002") is None
+    assert [r["operationName"] for r in fake.requests] == ["OrdersPage"]
+    await processor.close()
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_deletes_skip_the_sync_and_changes_never_run_a_full_sync(tmp_path):
+    """Test that delete-only bursts don't page Printavo and other bursts sync incrementally."""
+    fake = FakePrintavo([make_node(n, f"2024-02-{n:02d}T00:00:00Z") for n in range(1, 4)])
+    mirror = OrderMirror(path=str(tmp_path / "mirror.db"), full_sync_interval=0)
+    client = make_client(fake, mirror)
+    await mirror.sync(client)
+    fake.requests.clear()
+    
+    processor = WebhookProcessor(client, window=60)
+    processor.submit([WebhookEvent("e1", "order.deleted", "order2", "1002", True)])
+    await processor.drain()
+    
+    assert fake.requests == []
+    assert mirror.get_by_visual_id("1002") is None
+    assert mirror.get_stats()["pending_deletes"] == 0
+    
+    # A full sync is overdue, but a burst only syncs incrementally
+    fake.nodes["order1"] = make_node(1, "2024-03-01T00:00:00Z", status="Completed")
+    processor.submit([WebhookEvent("e2", "order.updated", "order1")])
+    await processor.drain()
+    
+    assert mirror.get_by_visual_id("1001")["status"]["name"] == "Completed"
+    assert mirror.get_stats()["full_syncs"] == 1
+    await processor.close()
+    await client.close()